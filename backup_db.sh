@@ -1,35 +1,31 @@
 #!/bin/bash
 
-# Database Backup Script for Shanti Yuwa Club
+# Database and Media Backup Script for Shanti Yuwa Club
 # Usage: ./backup_db.sh
+#
+# Each backup is a directory under backups/ with one compressed file per
+# table and a checksummed manifest (see `python manage.py backup --help`).
+# Restore with `python manage.py restore_backup <directory> --flush`.
 
-# Create backups directory if it doesn't exist
-mkdir -p backups
+echo "Starting database backup..."
 
-# Generate timestamp
-TIMESTAMP=$(date +"%Y%m%d_%H%M%S")
-BACKUP_FILE="backups/db_backup_${TIMESTAMP}.json"
+# Streams every table, verifies the result against its manifest
+# and keeps only the last 10 backups
+python manage.py backup --output-dir backups --keep 10
 
-echo "Starting database backup..."
-echo "Backup file: $BACKUP_FILE"
+if [ $? -ne 0 ]; then
+    echo "✗ Backup failed!"
+    exit 1
+fi
+
+echo "Starting media backup..."
 
-# Backup database using Django's dumpdata
-python manage.py dumpdata \
-    --natural-foreign \
-    --natural-primary \
-    --exclude contenttypes \
-    --exclude auth.permission \
-    --indent 2 \
-    > "$BACKUP_FILE"
+# Copies only new or changed files from media/ into backups/media
+python manage.py backup_media --output-dir backups/media
 
 if [ $? -eq 0 ]; then
     echo "✓ Backup completed successfully!"
-    echo "Backup saved to: $BACKUP_FILE"
-    
-    # Keep only last 10 backups
-    ls -t backups/db_backup_*.json | tail -n +11 | xargs -r rm
-    echo "Old backups cleaned up (keeping last 10)"
 else
-    echo "✗ Backup failed!"
+    echo "✗ Media backup failed!"
     exit 1
 fi
@@ -0,0 +1,65 @@
+"""
+Gunicorn configuration for production
+
+    gunicorn -c gunicorn.conf.py
+
+Environment overrides:
+    PORT                    port to bind (default 8000)
+    GUNICORN_WORKER_CLASS   'gthread' (default) or 'uvicorn_worker.UvicornWorker' for ASGI
+    WEB_CONCURRENCY         number of worker processes (default from the CPUs available, at most 8)
+    GUNICORN_THREADS        threads per gthread worker
+"""
+import os
+
+# CPUs this process may run on (a container's cpuset), not every CPU of the host
+cpu_count = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+
+# Upper limit for the default worker count. Each worker holds its own database
+# connections (one per thread, or a pool of DATABASE_POOL_MAX_SIZE), so the
+# default must not outgrow the database's max_connections on a large host.
+MAX_DEFAULT_WORKERS = 8
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+asgi = 'uvicorn' in worker_class.lower()
+wsgi_app = 'shanti_yuwa_club.asgi:application' if asgi else 'shanti_yuwa_club.wsgi:application'
+
+# Async workers multiplex requests on an event loop, so one per core is enough;
+# threaded workers wait on I/O, so use the classic (2 x cores) + 1.
+default_workers = min(cpu_count + 1 if asgi else cpu_count * 2 + 1, MAX_DEFAULT_WORKERS)
+workers = int(os.environ.get('WEB_CONCURRENCY', default_workers))
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+
+# Load Django once in the master and fork workers from it (shared memory, faster boot)
+preload_app = True
+
+# Recycle workers periodically to contain memory growth; jitter avoids restarting all at once
+max_requests = 1000
+max_requests_jitter = 100
+
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+
+# The embedded scheduler is started per worker below rather than at import time,
+# because with preload_app the import happens in the master process.
+os.environ.setdefault('SCHEDULER_STARTED_BY_SERVER', 'True')
+
+
+def when_ready(server):
+    """Runs in the master after the app is preloaded, before any worker is forked"""
+    from shanti_yuwa_club.warmup import warm_up
+    timings = warm_up()
+    server.log.info("Warm-up finished: %s", ", ".join(f"{k} {v:.2f}s" for k, v in timings.items()))
+
+
+def post_worker_init(worker):
+    from django.conf import settings
+    if settings.SCHEDULER_EMBEDDED:
+        # The leader lock makes sure only one worker actually runs jobs
+        from main.scheduler import start_embedded_scheduler
+        start_embedded_scheduler()
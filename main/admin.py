@@ -1,13 +1,17 @@
 from django.contrib import admin
+from django.contrib.admin import helpers
+from django.core.exceptions import PermissionDenied
 from django.shortcuts import render, redirect
 from django.urls import path
 from django.contrib import messages
 from django.utils.html import format_html
 from django.db.models import Count
 from django.utils import timezone
-from .models import Program, GalleryCategory, GalleryImage, TeamMember, Event, ContactMessage, MemberProfile, EventAttendance, ProgramParticipation, OTPVerification
-from .forms import MultipleImageUploadForm
-from .admin_dashboard import DashboardStats
+from django.contrib.auth.models import User
+from .models import Program, GalleryCategory, GalleryImage, TeamMember, Event, ContactMessage, MemberProfile, EventAttendance, ProgramParticipation, OTPVerification, ScheduledJob, ArchivedContactMessage, ArchivedEventAttendance, QueuedBroadcast
+from .forms import MultipleImageUploadForm, BroadcastEmailForm, DonorSearchForm
+from .broadcast_utils import get_broadcast_recipients, queue_broadcast
+from .donor_utils import compatible_donor_groups, find_donors
 
 # Customize the default admin site
 admin.site.site_header = "Shanti Yuwa Club Administration"
@@ -18,8 +22,10 @@ admin.site.index_title = "Welcome to Shanti Yuwa Club Admin Portal"
 _original_index = admin.site.index
 
 def custom_index(request, extra_context=None):
+    from .admin_dashboard import DashboardStats  # only needed once someone opens the dashboard
+
     extra_context = extra_context or {}
-    extra_context['stats'] = DashboardStats.get_stats()
+    extra_context['stats'] = DashboardStats.get_cached_stats()
     extra_context['recent'] = DashboardStats.get_recent_activity()
     extra_context['engagement'] = DashboardStats.get_member_engagement()
     extra_context['program_stats'] = DashboardStats.get_program_stats()
@@ -28,6 +34,44 @@ def custom_index(request, extra_context=None):
 
 admin.site.index = custom_index
 
+
+def broadcast_email_view(modeladmin, request, queryset, recipients):
+    """
+    Intermediate page for the broadcast admin actions.
+    Shows the compose form first, then queues the message for `recipients`
+    on submit. The scheduler sends it, so the request returns right away.
+    """
+    if 'apply' in request.POST:
+        form = BroadcastEmailForm(request.POST)
+        if form.is_valid():
+            broadcast = queue_broadcast(
+                recipients,
+                subject=form.cleaned_data['subject'],
+                message=form.cleaned_data['message'],
+                created_by=request.user,
+            )
+            modeladmin.message_user(
+                request,
+                f'Broadcast to {broadcast.recipient_count} member(s) queued. '
+                'It is sent in the background; follow its progress under "Queued broadcasts".',
+                messages.SUCCESS,
+            )
+            return None
+    else:
+        form = BroadcastEmailForm()
+
+    return render(request, 'admin/broadcast_email.html', {
+        'form': form,
+        'title': 'Send broadcast email',
+        'opts': modeladmin.model._meta,
+        'queryset': queryset,
+        'recipient_count': recipients.count(),
+        'action': request.POST.get('action'),
+        'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        'has_permission': True,
+    })
+
+
 # Register your models here.
 @admin.register(Program)
 class ProgramAdmin(admin.ModelAdmin):
@@ -273,7 +317,7 @@ class EventAdmin(admin.ModelAdmin):
             return format_html('<span style="color: #007bff;">In {} days</span>', delta)
     days_until_event.short_description = "Status"
     
-    actions = ['activate_events', 'deactivate_events']
+    actions = ['activate_events', 'deactivate_events', 'email_registered_members']
     
     def activate_events(self, request, queryset):
         updated = queryset.update(is_active=True)
@@ -284,6 +328,11 @@ class EventAdmin(admin.ModelAdmin):
         updated = queryset.update(is_active=False)
         self.message_user(request, f'{updated} event(s) successfully deactivated.', messages.SUCCESS)
     deactivate_events.short_description = "Deactivate selected events"
+    
+    def email_registered_members(self, request, queryset):
+        recipients = get_broadcast_recipients(events=queryset)
+        return broadcast_email_view(self, request, queryset, recipients)
+    email_registered_members.short_description = "Email members registered for selected events"
 
 
 @admin.register(ContactMessage)
@@ -342,6 +391,7 @@ class MemberProfileAdmin(admin.ModelAdmin):
     readonly_fields = ('user', 'member_since', 'joined_date')
     list_editable = ('is_verified',)
     list_per_page = 25
+    change_list_template = 'admin/member_profile_changelist.html'
     
     fieldsets = (
         ('User Information', {
@@ -362,6 +412,38 @@ class MemberProfileAdmin(admin.ModelAdmin):
     def member_since(self, obj):
         return obj.user.date_joined.strftime('%b %d, %Y')
     member_since.short_description = "Member Since"
+    
+    actions = ['email_members']
+    
+    def email_members(self, request, queryset):
+        recipients = get_broadcast_recipients(queryset=User.objects.filter(member_profile__in=queryset))
+        return broadcast_email_view(self, request, queryset, recipients)
+    email_members.short_description = "Send broadcast email to selected members"
+    
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path('donors/', self.admin_site.admin_view(self.donor_search_view), name='member-donor-search'),
+        ]
+        return custom_urls + urls
+    
+    def donor_search_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        form = DonorSearchForm(request.GET or None)
+        donors = groups = None
+        if form.is_valid():
+            groups = compatible_donor_groups(form.cleaned_data['blood_group'])
+            donors = find_donors(form.cleaned_data['blood_group'])
+        
+        return render(request, 'admin/donor_search.html', {
+            'form': form,
+            'donors': donors,
+            'groups': groups,
+            'title': 'Find Blood Donors',
+            'opts': self.model._meta,
+            'has_permission': True,
+        })
 
 
 @admin.register(EventAttendance)
@@ -465,4 +547,85 @@ class OTPVerificationAdmin(admin.ModelAdmin):
     def mark_as_verified(self, request, queryset):
         updated = queryset.update(is_verified=True)
         self.message_user(request, f'{updated} OTP(s) marked as verified.', messages.SUCCESS)
-    mark_as_verified.short_description = "Mark as verified"
\ No newline at end of file
+    mark_as_verified.short_description = "Mark as verified"
+
+
+@admin.register(ScheduledJob)
+class ScheduledJobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'last_run_at', 'duration_display', 'status_badge')
+    list_filter = ('last_status',)
+    readonly_fields = ('name', 'last_run_at', 'last_duration', 'last_status', 'last_error')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def duration_display(self, obj):
+        return f"{obj.last_duration:.2f}s"
+    duration_display.short_description = "Duration"
+    
+    def status_badge(self, obj):
+        if obj.last_status == 'failed':
+            return format_html('<span style="background-color: #dc3545; color: white; padding: 4px 8px; border-radius: 4px;">Failed</span>')
+        return format_html('<span style="background-color: #28a745; color: white; padding: 4px 8px; border-radius: 4px;">✓ Success</span>')
+    status_badge.short_description = "Status"
+
+
+@admin.register(QueuedBroadcast)
+class QueuedBroadcastAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'created_by', 'created_at', 'progress_display', 'status_badge', 'sent_at')
+    list_filter = ('status',)
+    list_select_related = ('created_by',)
+    search_fields = ('subject',)
+    exclude = ('recipient_ids',)
+    readonly_fields = ('subject', 'message', 'recipient_count', 'created_by', 'created_at', 'status',
+                       'recipients_done', 'sent_count', 'sent_at', 'error')
+    
+    def get_queryset(self, request):
+        # The recipient list can hold thousands of IDs; the pages only need the counts
+        return super().get_queryset(request).defer('recipient_ids')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def progress_display(self, obj):
+        return f"{obj.recipients_done} / {obj.recipient_count} ({obj.sent_count} sent)"
+    progress_display.short_description = "Progress"
+    
+    def status_badge(self, obj):
+        colors = {'queued': '#6c757d', 'sending': '#007bff', 'sent': '#28a745', 'failed': '#dc3545'}
+        return format_html(
+            '<span style="background-color: {}; color: white; padding: 4px 8px; border-radius: 4px;">{}</span>',
+            colors[obj.status], obj.get_status_display(),
+        )
+    status_badge.short_description = "Status"
+
+
+class ArchiveAdmin(admin.ModelAdmin):
+    """Archived rows can be browsed and deleted, not added or edited"""
+    list_per_page = 50
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedContactMessage)
+class ArchivedContactMessageAdmin(ArchiveAdmin):
+    list_display = ('name', 'email', 'subject', 'created_at', 'archived_at')
+    search_fields = ('name', 'email', 'subject', 'message')
+    date_hierarchy = 'created_at'
+
+
+@admin.register(ArchivedEventAttendance)
+class ArchivedEventAttendanceAdmin(ArchiveAdmin):
+    list_display = ('get_member_name', 'event', 'status', 'registered_at', 'archived_at')
+    list_filter = ('status',)
+    search_fields = ('member__user__username', 'member__user__first_name', 'member__user__last_name', 'event__title')
+    list_select_related = ('member__user', 'event')
+    date_hierarchy = 'registered_at'
+    
+    def get_member_name(self, obj):
+        return obj.member.user.get_full_name() or obj.member.user.username
+    get_member_name.short_description = "Member"
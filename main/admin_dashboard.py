@@ -1,5 +1,6 @@
-from django.db.models import Count, Q
-from .models import Program, GalleryImage, TeamMember, MemberProfile, EventAttendance, ProgramParticipation, Event
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef
+from .models import Program, GalleryImage, TeamMember, MemberProfile, EventAttendance, ProgramParticipation, Event, ArchivedEventAttendance
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta
@@ -9,6 +10,21 @@ import json
 class DashboardStats:
     """Dashboard statistics for admin panel"""
     
+    CACHE_KEY = 'admin_dashboard_stats'
+    CACHE_TIMEOUT = 60 * 30
+    
+    @classmethod
+    def refresh_cache(cls):
+        """Recompute the overall statistics and store them in the cache"""
+        stats = cls.get_stats()
+        cache.set(cls.CACHE_KEY, stats, cls.CACHE_TIMEOUT)
+        return stats
+    
+    @classmethod
+    def get_cached_stats(cls):
+        """Overall statistics from the cache, computing them on a miss"""
+        return cache.get(cls.CACHE_KEY) or cls.refresh_cache()
+    
     @staticmethod
     def get_stats():
         """Get overall dashboard statistics"""
@@ -73,9 +89,12 @@ class DashboardStats:
     def get_member_engagement():
         """Get member engagement metrics"""
         total_members = MemberProfile.objects.count()
+        # Archived attendance (see retention_utils) still counts as taking part
         active_members = MemberProfile.objects.filter(
-            Q(event_attendances__isnull=False) | Q(program_participations__isnull=False)
-        ).distinct().count()
+            Exists(EventAttendance.objects.filter(member=OuterRef('pk')))
+            | Exists(ArchivedEventAttendance.objects.filter(member=OuterRef('pk')))
+            | Exists(ProgramParticipation.objects.filter(member=OuterRef('pk')))
+        ).count()
         
         engagement = {
             'total': total_members,
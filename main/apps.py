@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class MainConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'main'
+
+    def ready(self):
+        # Before any database connection opens, so every connection counts its queries
+        from shanti_yuwa_club import metrics
+        metrics.install()
@@ -0,0 +1,150 @@
+"""
+Async versions of the public pages, served when settings.ASYNC_PUBLIC_VIEWS is on
+
+Each view issues its independent queries together with asyncio.gather() and
+materialises every queryset before rendering, so templates never hit the
+database from the event loop. Under an ASGI server a worker keeps serving
+other requests while these queries are in flight.
+"""
+import asyncio
+from collections import defaultdict
+from django.core.paginator import Paginator
+from django.http import Http404
+from django.shortcuts import render
+from .models import Program, GalleryImage, GalleryCategory, TeamMember, Event, ProgramParticipation
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def _get_user(request):
+    """Resolve the user once, so templates and context processors don't query it synchronously"""
+    user = await request.auser()
+    request.user = user
+    return user
+
+
+async def _enrolled_program_ids(request):
+    user = await _get_user(request)
+    if not user.is_authenticated:
+        return []
+    return await _alist(
+        ProgramParticipation.objects.filter(member__user=user).values_list('program_id', flat=True)
+    )
+
+
+async def _apaginate(queryset, per_page, page_number):
+    """Async equivalent of Paginator(queryset, per_page).get_page(page_number)"""
+    paginator = Paginator(queryset, per_page)
+    paginator.count = await queryset.acount()  # prime the cached count
+    page = paginator.get_page(page_number)
+    page.object_list = await _alist(page.object_list)
+    return page
+
+
+async def _home_gallery_images():
+    """Up to 6 images spread across categories, same selection as views.home"""
+    categories, images = await asyncio.gather(
+        _alist(GalleryCategory.objects.all()),
+        _alist(GalleryImage.objects.select_related('category').order_by('category', '-created_at')),
+    )
+    if not categories:
+        return images[:6]
+
+    cat_map = defaultdict(list)
+    for img in images:
+        cat_map[img.category_id].append(img)
+
+    gallery_images = []
+    images_per_category = max(1, 6 // len(categories))
+    remaining_slots = 6
+    for category in categories:
+        if remaining_slots <= 0:
+            break
+        category_images = cat_map.get(category.id, [])[:images_per_category]
+        gallery_images.extend(category_images)
+        remaining_slots -= len(category_images)
+
+    if len(gallery_images) < 6:
+        chosen = {img.id for img in gallery_images}
+        newest = sorted(images, key=lambda img: img.created_at, reverse=True)
+        gallery_images.extend([img for img in newest if img.id not in chosen][:6 - len(gallery_images)])
+    return gallery_images
+
+
+async def home(request):
+    """View for homepage"""
+    programs, team_members, events, gallery_images, enrolled_program_ids = await asyncio.gather(
+        _alist(Program.objects.filter(is_active=True)[:3]),
+        _alist(TeamMember.objects.filter(is_active=True)[:4]),
+        _alist(Event.objects.filter(is_active=True).order_by('date')[:3]),
+        _home_gallery_images(),
+        _enrolled_program_ids(request),
+    )
+    context = {
+        'programs': programs,
+        'team_members': team_members,
+        'events': events,
+        'gallery_images': gallery_images,
+        'enrolled_program_ids': enrolled_program_ids,
+    }
+    return render(request, 'main/home.html', context)
+
+
+async def about(request):
+    """View for about page"""
+    team_members, _ = await asyncio.gather(
+        _alist(TeamMember.objects.filter(is_active=True)),
+        _get_user(request),
+    )
+    return render(request, 'main/about.html', {'team_members': team_members})
+
+
+async def programs(request):
+    """View for programs listing page"""
+    programs, enrolled_program_ids = await asyncio.gather(
+        _apaginate(Program.objects.filter(is_active=True), 6, request.GET.get('page')),
+        _enrolled_program_ids(request),
+    )
+    context = {
+        'programs': programs,
+        'enrolled_program_ids': enrolled_program_ids,
+    }
+    return render(request, 'main/programs.html', context)
+
+
+async def program_detail(request, slug):
+    """View for individual program details"""
+    program, related_programs, _ = await asyncio.gather(
+        Program.objects.filter(slug=slug, is_active=True).afirst(),
+        _alist(Program.objects.filter(is_active=True).exclude(slug=slug).order_by('-created_at')[:3]),
+        _get_user(request),
+    )
+    if program is None:
+        raise Http404("No Program matches the given query.")
+    context = {
+        'program': program,
+        'related_programs': related_programs,
+    }
+    return render(request, 'main/program_detail.html', context)
+
+
+async def gallery(request):
+    """View for gallery page"""
+    selected_category = request.GET.get('category')
+    images = GalleryImage.objects.select_related('category')
+    if selected_category:
+        images = images.filter(category__name=selected_category)
+
+    categories, gallery_images, _ = await asyncio.gather(
+        _alist(GalleryCategory.objects.all()),
+        _apaginate(images, 12, request.GET.get('page')),
+        _get_user(request),
+    )
+    context = {
+        'categories': categories,
+        'gallery_images': gallery_images,
+        'selected_category': selected_category,
+    }
+    return render(request, 'main/gallery.html', context)
@@ -0,0 +1,424 @@
+"""
+Database backup and restore utilities
+
+A backup is a directory with one compressed NDJSON file per table (one JSON
+object per row, keyed by column attname) and a manifest.json listing the
+tables in foreign-key order with their row counts and SHA-256 checksums.
+Rows are streamed with iterator(), so memory use doesn't grow with table size.
+Restores stream the files back and insert them with bulk_create().
+"""
+import datetime
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from django.apps import apps
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.db.migrations.recorder import MigrationRecorder
+from django.utils import timezone
+
+BACKUP_FORMAT = 1
+# Field types whose JSON representation needs field.to_python() on restore
+CONVERTED_FIELD_TYPES = {
+    'DateTimeField', 'DateField', 'TimeField', 'DurationField', 'DecimalField', 'UUIDField',
+}
+BACKUP_PREFIX = 'db_backup_'
+MANIFEST_NAME = 'manifest.json'
+COMPRESSION_EXTENSIONS = {'gzip': '.ndjson.gz', 'zstd': '.ndjson.zst'}
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd compression needs the 'zstandard' package (pip install zstandard)")
+    return zstandard
+
+
+def sort_models_by_dependency(models):
+    """Order models so every model comes after the models its foreign keys point to"""
+    models = list(models)
+    remaining = set(models)
+    ordered = []
+    while remaining:
+        ready = [
+            model for model in models
+            if model in remaining and not any(
+                field.related_model in remaining and field.related_model is not model
+                for field in model._meta.concrete_fields if field.is_relation
+            )
+        ]
+        if not ready:
+            # Circular dependency: keep the original order for the rest
+            ready = [model for model in models if model in remaining]
+        for model in ready:
+            remaining.discard(model)
+            ordered.append(model)
+    return ordered
+
+
+def get_backup_models(exclude=()):
+    """
+    Every concrete, managed model (including auto-created many-to-many tables)
+    in foreign-key order. `exclude` holds app labels or 'app_label.ModelName'.
+    """
+    exclude = {label.lower() for label in exclude}
+    models = [
+        model for model in apps.get_models(include_auto_created=True)
+        if model._meta.managed and not model._meta.proxy
+        and model._meta.app_label not in exclude
+        and model._meta.label_lower not in exclude
+    ]
+    return sort_models_by_dependency(models)
+
+
+def get_column_names(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+class BackupJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder without its millisecond truncation of datetimes and times"""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class _HashingWriter:
+    """File wrapper that hashes and counts the (compressed) bytes written through it"""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.f.write(data)
+
+    def flush(self):
+        self.f.flush()
+
+
+def _compressor(raw, compression):
+    if compression == 'zstd':
+        return _zstandard().ZstdCompressor(level=3).stream_writer(raw, closefd=False)
+    return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6, mtime=0)
+
+
+def _decompressor(raw, compression):
+    if compression == 'zstd':
+        return io.BufferedReader(_zstandard().ZstdDecompressor().stream_reader(raw), READ_CHUNK_SIZE)
+    return gzip.GzipFile(fileobj=raw, mode='rb')
+
+
+def export_table(model, directory, compression='gzip', using='default', chunk_size=2000):
+    """Stream one table into `directory`, returning its manifest entry"""
+    columns = get_column_names(model)
+    filename = model._meta.label_lower + COMPRESSION_EXTENSIONS[compression]
+    queryset = model._base_manager.using(using).order_by('pk').values(*columns)
+    encoder = BackupJSONEncoder(separators=(',', ':'), ensure_ascii=False)
+
+    rows = 0
+    with open(os.path.join(directory, filename), 'wb') as raw:
+        writer = _HashingWriter(raw)
+        with _compressor(writer, compression) as stream:
+            lines = []
+            for row in queryset.iterator(chunk_size=chunk_size):
+                lines.append(encoder.encode(row))
+                if len(lines) >= chunk_size:
+                    stream.write(('\n'.join(lines) + '\n').encode('utf-8'))
+                    rows += len(lines)
+                    lines = []
+            if lines:
+                stream.write(('\n'.join(lines) + '\n').encode('utf-8'))
+                rows += len(lines)
+
+    return {
+        'model': model._meta.label_lower,
+        'table': model._meta.db_table,
+        'file': filename,
+        'columns': columns,
+        'rows': rows,
+        'bytes': writer.size,
+        'sha256': writer.sha256.hexdigest(),
+    }
+
+
+def get_applied_migrations(using):
+    """{app_label: last applied migration} so a restore can check schema compatibility"""
+    applied = {}
+    for app_label, name in sorted(MigrationRecorder(connections[using]).applied_migrations()):
+        applied[app_label] = name
+    return applied
+
+
+def _export_in_snapshot(model, directory, compression, using, chunk_size, snapshot):
+    """Worker thread: export one table inside the coordinator's Postgres snapshot"""
+    connection = connections[using]
+    try:
+        with transaction.atomic(using=using):
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                cursor.execute("SET TRANSACTION SNAPSHOT %s", [snapshot])
+            return export_table(model, directory, compression, using, chunk_size)
+    finally:
+        connection.close()
+
+
+def create_backup(output_dir, compression='gzip', jobs=1, exclude=(), using='default',
+                  chunk_size=2000, progress=None):
+    """
+    Back up every table into a new directory under `output_dir` and return its path.
+
+    All tables are read from one consistent snapshot. On PostgreSQL, `jobs` > 1
+    exports tables in parallel threads that share the snapshot through
+    pg_export_snapshot() (like pg_dump --jobs); other databases export
+    sequentially. The directory is written under a temporary name and renamed
+    when complete, so an interrupted backup never looks like a finished one.
+    `progress` is called with each table's manifest entry.
+    """
+    if compression == 'zstd':
+        _zstandard()
+    connection = connections[using]
+    models = get_backup_models(exclude)
+    # Microseconds, so backups started within the same second don't collide
+    name = BACKUP_PREFIX + timezone.localtime().strftime('%Y%m%d_%H%M%S_%f')
+    final_path = os.path.join(output_dir, name)
+    partial_path = final_path + '.partial'
+    if os.path.exists(final_path):
+        raise FileExistsError(f"Backup {final_path} already exists")
+    # Fails if another run is writing the same directory
+    os.makedirs(partial_path)
+
+    started = time.monotonic()
+    try:
+        with transaction.atomic(using=using):
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            if connection.vendor == 'postgresql' and jobs > 1:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_export_snapshot()")
+                    snapshot = cursor.fetchone()[0]
+                with ThreadPoolExecutor(max_workers=jobs) as pool:
+                    futures = [
+                        pool.submit(_export_in_snapshot, model, partial_path, compression,
+                                    using, chunk_size, snapshot)
+                        for model in models
+                    ]
+                    tables = []
+                    for future in futures:
+                        tables.append(future.result())
+                        if progress:
+                            progress(tables[-1])
+            else:
+                tables = []
+                for model in models:
+                    tables.append(export_table(model, partial_path, compression, using, chunk_size))
+                    if progress:
+                        progress(tables[-1])
+            migrations = get_applied_migrations(using)
+
+        manifest = {
+            'format': BACKUP_FORMAT,
+            'created_at': timezone.now().isoformat(),
+            'duration': round(time.monotonic() - started, 3),
+            'database': {'alias': using, 'vendor': connection.vendor},
+            'compression': compression,
+            'migrations': migrations,
+            'tables': tables,
+        }
+        with open(os.path.join(partial_path, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.rename(partial_path, final_path)
+    except BaseException:
+        shutil.rmtree(partial_path, ignore_errors=True)
+        raise
+    return final_path
+
+
+def load_manifest(backup_path):
+    with open(os.path.join(backup_path, MANIFEST_NAME), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format') != BACKUP_FORMAT:
+        raise ValueError(f"Unsupported backup format: {manifest.get('format')}")
+    return manifest
+
+
+def iter_rows(backup_path, manifest, entry):
+    """Yield the rows of one table in a backup as dicts"""
+    with open(os.path.join(backup_path, entry['file']), 'rb') as raw:
+        with _decompressor(raw, manifest['compression']) as stream:
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def verify_backup(backup_path):
+    """Check every table file against the manifest's checksum and row count. Returns a list of problems."""
+    manifest = load_manifest(backup_path)
+    problems = []
+    for entry in manifest['tables']:
+        path = os.path.join(backup_path, entry['file'])
+        if not os.path.exists(path):
+            problems.append(f"{entry['file']}: missing")
+            continue
+
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(READ_CHUNK_SIZE), b''):
+                sha256.update(block)
+        if sha256.hexdigest() != entry['sha256']:
+            problems.append(f"{entry['file']}: checksum mismatch")
+            continue
+
+        rows = sum(1 for _ in iter_rows(backup_path, manifest, entry))
+        if rows != entry['rows']:
+            problems.append(f"{entry['file']}: {rows} rows, manifest says {entry['rows']}")
+    return problems
+
+
+def list_backups(output_dir):
+    """Completed backup directories in `output_dir`, newest first"""
+    if not os.path.isdir(output_dir):
+        return []
+    names = [
+        name for name in os.listdir(output_dir)
+        if name.startswith(BACKUP_PREFIX) and not name.endswith('.partial')
+        and os.path.exists(os.path.join(output_dir, name, MANIFEST_NAME))
+    ]
+    return [os.path.join(output_dir, name) for name in sorted(names, reverse=True)]
+
+
+def rotate_backups(output_dir, keep):
+    """Delete all but the newest `keep` backups, returning the deleted paths"""
+    removed = list_backups(output_dir)[keep:]
+    for path in removed:
+        shutil.rmtree(path)
+    return removed
+
+
+class RestoreError(Exception):
+    pass
+
+
+@contextmanager
+def auto_timestamps_disabled(models):
+    """
+    Keep auto_now/auto_now_add fields from overwriting restored values.
+    bulk_create() still calls pre_save() on every field; it never calls
+    Model.save() or sends signals, so Program.save()'s slug loop and the
+    create_member_profile post_save handler don't run during a restore.
+    """
+    changed = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                changed.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in changed:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _row_builder(model, columns):
+    """Function turning a backup row (dict) into an unsaved instance of the current model"""
+    fields = model._meta.concrete_fields
+    converters = {
+        field.attname: field.to_python
+        for field in fields if field.get_internal_type() in CONVERTED_FIELD_TYPES
+    }
+    missing = [field for field in fields if field.attname not in columns]
+
+    def build(row):
+        for attname, to_python in converters.items():
+            value = row.get(attname)
+            if value is not None:
+                row[attname] = to_python(value)
+        for field in missing:
+            row[field.attname] = field.get_default()
+        # Positional arguments are the fast path through Model.__init__
+        return model(*[row[field.attname] for field in fields])
+
+    return build
+
+
+def get_restore_plan(manifest, exclude=()):
+    """[(model, manifest entry)] for the tables in a backup that exist in this project"""
+    exclude = {label.lower() for label in exclude}
+    plan, unknown = [], []
+    for entry in manifest['tables']:
+        app_label = entry['model'].split('.')[0]
+        if entry['model'] in exclude or app_label in exclude:
+            continue
+        try:
+            plan.append((apps.get_model(entry['model']), entry))
+        except LookupError:
+            unknown.append(entry['model'])
+    return plan, unknown
+
+
+def restore_backup(backup_path, using='default', flush=False, exclude=(), batch_size=2000, progress=None):
+    """
+    Load a backup made by create_backup() in one transaction.
+
+    Rows are streamed from each file and inserted with bulk_create() in batches
+    of `batch_size`, with constraint checks deferred until every table is
+    loaded (as loaddata does). With `flush`, the restored tables are emptied
+    first; otherwise they must be empty. Sequences are reset afterwards so new
+    rows don't collide with restored primary keys. Returns {model label: rows}.
+    """
+    manifest = load_manifest(backup_path)
+    plan, _ = get_restore_plan(manifest, exclude)
+    models = [model for model, _ in plan]
+    connection = connections[using]
+
+    with transaction.atomic(using=using):
+        if flush:
+            tables = [model._meta.db_table for model in models]
+            connection.ops.execute_sql_flush(
+                connection.ops.sql_flush(no_style(), tables, allow_cascade=connection.vendor == 'postgresql')
+            )
+        else:
+            non_empty = [model._meta.label_lower for model in models if model._base_manager.using(using).exists()]
+            if non_empty:
+                raise RestoreError(f"Tables already contain data: {', '.join(non_empty)}")
+
+        restored = {}
+        with auto_timestamps_disabled(models), connection.constraint_checks_disabled():
+            for model, entry in plan:
+                build = _row_builder(model, set(entry['columns']))
+                rows = iter_rows(backup_path, manifest, entry)
+                count = 0
+                while True:
+                    batch = [build(row) for row in islice(rows, batch_size)]
+                    if not batch:
+                        break
+                    model._base_manager.using(using).bulk_create(batch, batch_size=batch_size)
+                    count += len(batch)
+                restored[model._meta.label_lower] = count
+                if progress:
+                    progress(model, count)
+
+        connection.check_constraints(table_names=[model._meta.db_table for model in models])
+
+        sequence_sql = connection.ops.sequence_reset_sql(no_style(), models)
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+    return restored
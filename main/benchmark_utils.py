@@ -0,0 +1,185 @@
+"""
+Helpers for the benchmark commands: route discovery, request drivers and latency summaries
+"""
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib import admin
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from .models import Event, Program
+import main.urls
+
+# Routes that end the session they are requested with; re-logged in before each request
+LOGOUT_ROUTES = {'member_logout'}
+
+
+def summarize(latencies, elapsed):
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(latencies),
+        'throughput': len(latencies) / elapsed if elapsed else 0,
+        'p50': quantiles[49] * 1000,
+        'p95': quantiles[94] * 1000,
+        'p99': quantiles[98] * 1000,
+    }
+
+
+def sample_arguments():
+    """Values for the URL parameters of main/urls.py, taken from the current data"""
+    program = Program.objects.filter(is_active=True).order_by('pk').first()
+    event = Event.objects.filter(is_active=True, date__gte=timezone.now()).order_by('date').first()
+    return {
+        'slug': program.slug if program else None,
+        'program_id': program.pk if program else None,
+        'event_id': event.pk if event else None,
+    }
+
+
+def get_routes():
+    """
+    [(name, url)] for every named route in main/urls.py, then every admin
+    changelist. Routes whose parameters have no sample value are left out.
+    """
+    arguments = sample_arguments()
+    routes = []
+    for pattern in main.urls.urlpatterns:
+        if not pattern.name:
+            continue
+        kwargs = {name: arguments.get(name) for name in pattern.pattern.converters}
+        if None in kwargs.values():
+            continue
+        routes.append((pattern.name, reverse(pattern.name, kwargs=kwargs)))
+    routes.append(('admin:index', reverse('admin:index')))
+    for model in admin.site._registry:
+        name = f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist'
+        routes.append((name, reverse(name)))
+    return routes
+
+
+def logged_in_client(user):
+    """Test client with `user` logged in on both the site and the admin session cookie"""
+    from shanti_yuwa_club.middleware import AdminSessionMiddleware
+    client = Client()
+    if user is not None:
+        client.force_login(user)
+        session_key = client.cookies[settings.SESSION_COOKIE_NAME].value
+        client.cookies[AdminSessionMiddleware.ADMIN_SESSION_COOKIE_NAME] = session_key
+    return client
+
+
+def run_client(client, name, url, requests, user=None):
+    """
+    `requests` sequential requests through the test client (the full
+    middleware stack, no network). Returns the summary plus the status, the
+    number of queries per request and the SQL of one request.
+    """
+    queries = 0
+
+    def count_query(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    def prepare():
+        if name in LOGOUT_ROUTES and user is not None:
+            client.force_login(user)
+
+    prepare()
+    response = client.get(url)  # warm up
+    prepare()
+    with CaptureQueriesContext(connections['default']) as captured:
+        client.get(url)
+    sql = [query['sql'] for query in captured.captured_queries]
+
+    latencies = []
+    start = time.perf_counter()
+    with connections['default'].execute_wrapper(count_query):
+        for _ in range(requests):
+            prepare()
+            began = time.perf_counter()
+            client.get(url)
+            latencies.append(time.perf_counter() - began)
+    prepare()  # leave the client logged in for the routes that follow
+    result = summarize(latencies, time.perf_counter() - start)
+    result.update(status=response.status_code, queries=queries / requests, sql=sql)
+    return result
+
+
+class _NoRedirects(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def run_http(base_url, url, requests, concurrency, cookies=None):
+    """
+    `requests` GETs of `url` against a running server from `concurrency`
+    threads, each on its own connection. Redirects are not followed.
+    """
+    opener = urllib.request.build_opener(_NoRedirects)
+    headers = {'Cookie': '; '.join(f'{key}={value}' for key, value in (cookies or {}).items())}
+    statuses = {}
+    lock = threading.Lock()
+
+    def fetch(_):
+        request = urllib.request.Request(base_url + url, headers=headers)
+        began = time.perf_counter()
+        try:
+            with opener.open(request, timeout=60) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            status = e.code
+        elapsed = time.perf_counter() - began
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+        return elapsed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(fetch, range(requests)))
+    result = summarize(latencies, time.perf_counter() - start)
+    result['status'] = max(statuses, key=statuses.get)
+    return result
+
+
+def compare_results(previous, current, threshold=0.2):
+    """
+    Lines describing how `current` differs from `previous` (both benchmark
+    JSON documents), and whether anything regressed: p95 slower by more than
+    `threshold` or more queries per request.
+    """
+    def key(result):
+        return (result['scale'], result['driver'], result['user'], result['route'])
+
+    before = {key(result): result for result in previous['results']}
+    lines = []
+    regressed = False
+    for result in current['results']:
+        old = before.get(key(result))
+        if old is None:
+            continue
+        change = (result['p95'] - old['p95']) / old['p95'] if old['p95'] else 0
+        more_queries = result.get('queries') is not None and old.get('queries') is not None \
+            and result['queries'] > old['queries']
+        flag = ''
+        if change > threshold or more_queries:
+            flag = '  REGRESSION'
+            regressed = True
+        queries = ''
+        if result.get('queries') is not None and old.get('queries') is not None:
+            queries = f"  queries {old['queries']:g} -> {result['queries']:g}"
+        lines.append(
+            f"{result['scale']:>8,} {result['driver']:<7}{result['user']:<10}{result['route']:<45}"
+            f"p95 {old['p95']:8.1f} -> {result['p95']:8.1f} ms ({change:+.0%}){queries}{flag}"
+        )
+    return lines, regressed
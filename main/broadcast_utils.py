@@ -0,0 +1,168 @@
+"""
+Bulk email utilities for member broadcasts
+"""
+import logging
+import time
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template import Context, Template
+from django.template.loader import render_to_string
+from django.utils import timezone
+from .models import EventAttendance, QueuedBroadcast
+
+logger = logging.getLogger(__name__)
+
+
+def get_broadcast_recipients(membership_type=None, is_verified=None, events=None, queryset=None):
+    """
+    Build the User queryset for a broadcast.
+    Filters are optional and combined; users without an email address are skipped.
+    `events` is a list or queryset of events whose registered (not cancelled)
+    members should receive the message.
+    """
+    users = queryset if queryset is not None else User.objects.all()
+    users = users.filter(is_active=True).exclude(email='')
+
+    if membership_type:
+        users = users.filter(member_profile__membership_type=membership_type)
+    if is_verified is not None:
+        users = users.filter(member_profile__is_verified=is_verified)
+    if events is not None:
+        registrations = EventAttendance.objects.filter(event__in=events).exclude(status='cancelled')
+        users = users.filter(member_profile__in=registrations.values('member_id'))
+
+    return users.only('id', 'username', 'email', 'first_name', 'last_name').order_by('id')
+
+
+def send_broadcast(recipients, subject, message, batch_size=None, rate_limit=None, connection=None, context=None):
+    """
+    Render and send a templated message to every user in `recipients`.
+
+    `subject` and `message` may use template variables such as {{ first_name }},
+    plus those in `context`, which is the same for every recipient.
+    Recipients are streamed with iterator(), rendered in batches of `batch_size`
+    and sent over a single SMTP connection. `rate_limit` caps the number of
+    emails sent per second (0 or None means unlimited).
+    Returns the number of emails sent.
+    """
+    batch_size = batch_size or settings.BROADCAST_BATCH_SIZE
+    if rate_limit is None:
+        rate_limit = settings.BROADCAST_RATE_LIMIT
+
+    # Compile the templates once, render once per recipient
+    subject_template = Template(subject)
+    message_template = Template(message)
+
+    connection = connection or get_connection(fail_silently=False)
+    sent = 0
+    started = time.monotonic()
+    batch = []
+
+    with connection:
+        for user in recipients.iterator(chunk_size=batch_size):
+            batch.append(_build_message(user, subject_template, message_template, connection, context))
+            if len(batch) >= batch_size:
+                sent += connection.send_messages(batch) or 0
+                batch = []
+                _throttle(sent, started, rate_limit)
+
+        if batch:
+            sent += connection.send_messages(batch) or 0
+
+    return sent
+
+
+def queue_broadcast(recipients, subject, message, created_by=None):
+    """
+    Store a broadcast to `recipients` for the scheduler's send_broadcasts job,
+    so a web request never waits on SMTP. Returns the QueuedBroadcast.
+    """
+    recipient_ids = list(recipients.values_list('id', flat=True))
+    return QueuedBroadcast.objects.create(
+        subject=subject,
+        message=message,
+        recipient_ids=recipient_ids,
+        recipient_count=len(recipient_ids),
+        created_by=created_by,
+    )
+
+
+def send_queued_broadcasts(connection=None):
+    """
+    Send the queued broadcasts, oldest first. Progress is saved after every
+    batch, so a broadcast interrupted by a restart resumes where it stopped
+    (resending at most one batch). Returns the number of emails sent.
+    """
+    sent = 0
+    for broadcast in QueuedBroadcast.objects.filter(status__in=['queued', 'sending']).order_by('created_at'):
+        try:
+            sent += _send_queued_broadcast(broadcast, connection)
+        except Exception as e:
+            logger.exception("Broadcast %s failed", broadcast.pk)
+            broadcast.status = 'failed'
+            broadcast.error = str(e)
+            broadcast.save(update_fields=['status', 'error'])
+    return sent
+
+
+def _send_queued_broadcast(broadcast, connection=None):
+    batch_size = settings.BROADCAST_BATCH_SIZE
+    broadcast.status = 'sending'
+    broadcast.save(update_fields=['status'])
+    sent = 0
+    started = time.monotonic()
+    while broadcast.recipients_done < len(broadcast.recipient_ids):
+        batch = broadcast.recipient_ids[broadcast.recipients_done:broadcast.recipients_done + batch_size]
+        recipients = get_broadcast_recipients(queryset=User.objects.filter(id__in=batch))
+        count = send_broadcast(recipients, broadcast.subject, broadcast.message, batch_size, 0, connection)
+        broadcast.recipients_done += len(batch)
+        broadcast.sent_count += count
+        broadcast.save(update_fields=['recipients_done', 'sent_count'])
+        sent += count
+        _throttle(sent, started, settings.BROADCAST_RATE_LIMIT)
+    broadcast.status = 'sent'
+    broadcast.sent_at = timezone.now()
+    broadcast.save(update_fields=['status', 'sent_at'])
+    return sent
+
+
+def _build_message(user, subject_template, message_template, connection, extra_context=None):
+    """Render a single recipient's email"""
+    context = {
+        **(extra_context or {}),
+        'username': user.username,
+        'first_name': user.first_name or user.username,
+        'last_name': user.last_name,
+        'full_name': user.get_full_name() or user.username,
+        'email': user.email,
+        'site_name': 'Shanti Yuwa Club',
+    }
+    subject = _render_text(subject_template, context).strip()
+    body = _render_text(message_template, context)
+    html_message = render_to_string('emails/broadcast.html', dict(context, subject=subject, body=body))
+
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[user.email],
+        connection=connection,
+    )
+    email.attach_alternative(html_message, 'text/html')
+    return email
+
+
+def _render_text(template, context):
+    """Render a plain-text template without HTML escaping"""
+    return template.render(Context(context, autoescape=False))
+
+
+def _throttle(sent, started, rate_limit):
+    """Sleep long enough to keep the average send rate under `rate_limit` per second"""
+    if not rate_limit:
+        return
+    expected_elapsed = sent / rate_limit
+    actual_elapsed = time.monotonic() - started
+    if expected_elapsed > actual_elapsed:
+        time.sleep(expected_elapsed - actual_elapsed)
@@ -0,0 +1,181 @@
+"""
+Write-behind buffer for contact form submissions
+
+With settings.CONTACT_WRITE_BEHIND the contact view doesn't insert the
+message: it appends it to a local spool file (one JSON line per message)
+and the `flush_contact_messages` job inserts the spooled messages with
+bulk_create(). A spam wave then costs file appends instead of database
+writes. The spool is a plain file, so queued messages survive a worker
+restart; it is per host, like the scheduler lock, so each host must run
+the scheduler (`run_scheduler` or SCHEDULER_EMBEDDED).
+
+Identical messages (same email, subject and text) are dropped for
+CONTACT_DEDUPE_SECONDS whichever mode is on. The sender sees the usual
+success message either way.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import ContactMessage
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, assume a single process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ['name', 'email', 'subject', 'message']
+
+
+def spool_path():
+    return settings.CONTACT_SPOOL_FILE or os.path.join(
+        tempfile.gettempdir(), 'shanti_yuwa_club_contact_spool.jsonl'
+    )
+
+
+def content_hash(data):
+    """Hash of the email, subject and message, ignoring case and whitespace"""
+    normalized = '\0'.join(' '.join(str(data[field]).split()).lower() for field in ['email', 'subject', 'message'])
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def dedupe_key(data):
+    return f"contact:{content_hash(data)}"
+
+
+def is_duplicate(data):
+    """True if the same message was submitted within CONTACT_DEDUPE_SECONDS, otherwise remember it"""
+    return not cache.add(dedupe_key(data), 1, timeout=settings.CONTACT_DEDUPE_SECONDS)
+
+
+def _lock(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX)
+
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def append(data):
+    """Append a validated submission (ContactForm.cleaned_data) to the spool"""
+    line = json.dumps({
+        **{field: data[field] for field in FIELDS},
+        'created_at': timezone.now().isoformat(),
+    }) + '\n'
+    path = spool_path()
+    while True:
+        with open(path, 'a', encoding='utf-8') as f:
+            _lock(f)
+            try:
+                # flush() renames the spool under its lock: if that happened while we
+                # waited for the lock, this file is being flushed, so write to a new one
+                try:
+                    current = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if not os.path.samestat(current, os.fstat(f.fileno())):
+                    continue
+                f.write(line)
+                f.flush()
+                return
+            finally:
+                _unlock(f)
+
+
+def submit(form):
+    """
+    Store a valid ContactForm: spool it with CONTACT_WRITE_BEHIND, else
+    save it now. Returns False if it was dropped as a duplicate.
+    """
+    if is_duplicate(form.cleaned_data):
+        return False
+    try:
+        if settings.CONTACT_WRITE_BEHIND:
+            append(form.cleaned_data)
+        else:
+            form.save()
+    except Exception:
+        # Not stored, so a retry must not be dropped as a duplicate
+        cache.delete(dedupe_key(form.cleaned_data))
+        raise
+    return True
+
+
+def _take_spool(path):
+    """Move the spool aside so new submissions start a new file; returns the moved path or None"""
+    try:
+        f = open(path, 'r', encoding='utf-8')
+    except FileNotFoundError:
+        return None
+    with f:
+        _lock(f)
+        try:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            taken = f"{path}.{time.time_ns()}.flushing"
+            os.rename(path, taken)
+            return taken
+        finally:
+            _unlock(f)
+
+
+def _read_messages(path):
+    messages = []
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                created_at = parse_datetime(record['created_at'])
+                message = ContactMessage(**{field: record[field] for field in FIELDS}, created_at=created_at)
+                message.full_clean(exclude=['created_at'])
+            except Exception as e:
+                # A line cut short by a crash mid-write, or edited by hand
+                logger.warning("Skipping line %s of %s: %s", number, path, e)
+                continue
+            messages.append(message)
+    return messages
+
+
+def flush(batch_size=None):
+    """
+    Insert every spooled message and return how many were saved.
+    Spool files left by an interrupted flush are inserted first; a file is
+    deleted once its transaction has committed.
+    """
+    batch_size = batch_size or settings.CONTACT_FLUSH_BATCH_SIZE
+    path = spool_path()
+    directory, name = os.path.split(path)
+    _take_spool(path)
+    pending = sorted(
+        os.path.join(directory, entry) for entry in os.listdir(directory or '.')
+        if entry.startswith(f'{name}.') and entry.endswith('.flushing')
+    )
+    saved = 0
+    for taken in pending:
+        messages = _read_messages(taken)
+        submitted = [message.created_at for message in messages]
+        with transaction.atomic():
+            ContactMessage.objects.bulk_create(messages, batch_size=batch_size)
+            # created_at is auto_now_add, so the insert stamped it with the flush
+            # time: put back when each message was submitted
+            for message, created_at in zip(messages, submitted):
+                message.created_at = created_at
+            ContactMessage.objects.bulk_update(messages, ['created_at'], batch_size=batch_size)
+        os.remove(taken)
+        saved += len(messages)
+    if saved:
+        logger.info("Saved %d spooled contact messages", saved)
+    return saved
@@ -0,0 +1,171 @@
+"""
+Copy every table from one configured database alias to another
+
+Tables are copied in foreign-key order, in primary-key batches read with
+keyset pagination (pk > last copied pk), so each batch is a cheap indexed
+query however large the table. PostgreSQL targets are written with
+COPY ... FROM STDIN, others with executemany(). Every batch commits on its
+own: after an interruption the copy resumes from the highest primary key
+already in the target, and a state file records the tables that are done.
+"""
+import hashlib
+import json
+import os
+from django.core.management.color import no_style
+from django.db import connections, models as django_models, transaction
+from .backup_utils import BackupJSONEncoder, get_backup_models, get_column_names
+
+
+def load_state(path, source, target):
+    """State of an interrupted copy between the same aliases, or None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        state = json.load(f)
+    if state.get('source') != source or state.get('target') != target:
+        return None
+    return state
+
+
+def save_state(path, state):
+    with open(path + '.partial', 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + '.partial', path)
+
+
+def flush_tables(models, using):
+    """Delete every row of `models` in `using` (TRUNCATE on PostgreSQL)"""
+    connection = connections[using]
+    tables = [model._meta.db_table for model in models]
+    with transaction.atomic(using=using):
+        connection.ops.execute_sql_flush(
+            connection.ops.sql_flush(no_style(), tables, allow_cascade=connection.vendor == 'postgresql')
+        )
+
+
+def reset_sequences(models, using):
+    connection = connections[using]
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def _has_integer_pk(model):
+    return isinstance(model._meta.pk, (django_models.AutoField, django_models.IntegerField))
+
+
+def _resume_point(model, target):
+    """
+    Where to continue copying `model`: None to start from the beginning.
+    Integer primary keys sort the same everywhere, so the copy continues after
+    the target's highest pk. Other keys (session keys) may collate differently
+    between backends, so a partly copied table is emptied and copied again.
+    """
+    rows = model._base_manager.using(target)
+    if not rows.exists():
+        return None
+    if _has_integer_pk(model):
+        return rows.aggregate(last=django_models.Max('pk'))['last']
+    flush_tables([model], target)
+    return None
+
+
+def copy_table(model, source, target, batch_size=5000, start_after=None, progress=None):
+    """Copy the rows of `model` with pk > `start_after` from `source` to `target`, returning the count"""
+    fields = model._meta.concrete_fields
+    attnames = get_column_names(model)
+    pk_index = attnames.index(model._meta.pk.attname)
+
+    connection = connections[target]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = ', '.join(quote(field.column) for field in fields)
+    use_copy = connection.vendor == 'postgresql'
+    insert_sql = f"INSERT INTO {table} ({columns}) VALUES ({', '.join(['%s'] * len(fields))})"
+
+    queryset = model._base_manager.using(source).order_by('pk').values_list(*attnames)
+    copied = 0
+    last = start_after
+    while True:
+        batch = queryset if last is None else queryset.filter(pk__gt=last)
+        rows = list(batch[:batch_size])
+        if not rows:
+            break
+        prepared = [
+            [field.get_db_prep_save(value, connection=connection) for field, value in zip(fields, row)]
+            for row in rows
+        ]
+        with transaction.atomic(using=target), connection.cursor() as cursor:
+            if use_copy:
+                with cursor.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+                    for row in prepared:
+                        copy.write_row(row)
+            else:
+                cursor.executemany(insert_sql, prepared)
+        copied += len(rows)
+        last = rows[-1][pk_index]
+        if progress:
+            progress(model, copied)
+    return copied
+
+
+def copy_database(source, target, state_path, batch_size=5000, exclude=(), progress=None):
+    """
+    Copy every table from `source` to `target`, resuming from `state_path` if
+    it records an interrupted copy between the same aliases. The target's
+    tables are emptied when a new copy starts. Returns {model label: rows copied in this run}.
+    """
+    models = get_backup_models(exclude)
+    state = load_state(state_path, source, target)
+    if state is None:
+        flush_tables(models, target)
+        state = {'source': source, 'target': target, 'done': []}
+        save_state(state_path, state)
+
+    copied = {}
+    for model in models:
+        label = model._meta.label_lower
+        if label in state['done']:
+            continue
+        copied[label] = copy_table(
+            model, source, target, batch_size, start_after=_resume_point(model, target), progress=progress,
+        )
+        state['done'].append(label)
+        save_state(state_path, state)
+
+    reset_sequences(models, target)
+    return copied
+
+
+def table_checksum(model, using, chunk_size=5000):
+    """
+    (row count, checksum) of a table. The checksum sums per-row hashes, so it
+    doesn't depend on row order, which can differ between backends for
+    non-integer keys.
+    """
+    encoder = BackupJSONEncoder(separators=(',', ':'), sort_keys=True)
+    rows = model._base_manager.using(using).values_list(*get_column_names(model))
+    count = 0
+    total = 0
+    for row in rows.iterator(chunk_size=chunk_size):
+        digest = hashlib.sha256(encoder.encode(list(row)).encode('utf-8')).digest()
+        total = (total + int.from_bytes(digest[:8], 'big')) % 2 ** 64
+        count += 1
+    return count, f'{total:016x}'
+
+
+def verify_copy(source, target, exclude=(), progress=None):
+    """Compare row counts and checksums of every table. Returns a list of mismatch descriptions."""
+    problems = []
+    for model in get_backup_models(exclude):
+        source_count, source_sum = table_checksum(model, source)
+        target_count, target_sum = table_checksum(model, target)
+        if progress:
+            progress(model, source_count, source_sum == target_sum and source_count == target_count)
+        if source_count != target_count:
+            problems.append(f"{model._meta.label_lower}: {source_count} rows in {source}, {target_count} in {target}")
+        elif source_sum != target_sum:
+            problems.append(f"{model._meta.label_lower}: checksum differs")
+    return problems
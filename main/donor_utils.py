@@ -0,0 +1,38 @@
+"""
+Blood donor lookup for the admin "Find blood donors" page
+"""
+from functools import lru_cache
+from django.db.models import F
+from .models import MemberProfile
+
+
+def can_donate(donor_group, recipient_group):
+    """
+    Red cell compatibility: the donor must not carry an A or B antigen the
+    recipient lacks, and Rh+ blood can only go to Rh+ recipients.
+    """
+    donor_abo, donor_rh = donor_group[:-1], donor_group[-1]
+    recipient_abo, recipient_rh = recipient_group[:-1], recipient_group[-1]
+    antigens_ok = set(donor_abo.replace('O', '')) <= set(recipient_abo.replace('O', ''))
+    return antigens_ok and (donor_rh == '-' or recipient_rh == '+')
+
+
+@lru_cache(maxsize=None)
+def compatible_donor_groups(recipient_group):
+    """Blood groups that can donate to `recipient_group`, the same group first"""
+    groups = [group for group, label in MemberProfile.BLOOD_GROUP_CHOICES if can_donate(group, recipient_group)]
+    return tuple(sorted(groups, key=lambda group: group != recipient_group))
+
+
+def find_donors(recipient_group, limit=50):
+    """
+    Verified, active members who can donate to `recipient_group`, most
+    recently active (last login) first. Served by the
+    (blood_group, is_verified) index.
+    """
+    return (
+        MemberProfile.objects
+        .filter(blood_group__in=compatible_donor_groups(recipient_group), is_verified=True, user__is_active=True)
+        .select_related('user')
+        .order_by(F('user__last_login').desc(nulls_last=True), 'pk')[:limit]
+    )
@@ -0,0 +1,118 @@
+"""
+Run recorded SQL through EXPLAIN and find full table scans and sorts
+
+The plans are read from EXPLAIN QUERY PLAN on SQLite and EXPLAIN (FORMAT
+JSON) on PostgreSQL. A scan or sort of a small table is the right plan, so
+they are only reported for tables with at least `min_rows` rows: run the
+advisor against a database seeded to a realistic size (`seed_data`).
+"""
+import json
+import re
+from django.db import DatabaseError, connections, transaction
+
+SELECT_RE = re.compile(r'^\s*(SELECT|WITH)\b', re.IGNORECASE)
+# SQLite plan lines: "SCAN main_event", "SEARCH main_event USING INDEX ...", "USE TEMP B-TREE FOR ORDER BY"
+SQLITE_ACCESS_RE = re.compile(r'^(SCAN|SEARCH) (\w+)')
+
+
+def load_benchmark_queries(paths):
+    """{sql: set of routes that ran it} from benchmark_routes JSON files"""
+    queries = {}
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            document = json.load(f)
+        for result in document['results']:
+            for sql in result.get('sql') or []:
+                if SELECT_RE.match(sql):
+                    queries.setdefault(sql, set()).add(f"{result['user']} {result['route']}")
+    return queries
+
+
+def explain(sql, using):
+    """
+    [(kind, table, detail)] for the scans and sorts in the plan of `sql`,
+    where kind is 'scan' or 'sort'. Raises DatabaseError if it can't be explained.
+    """
+    connection = connections[using]
+    # A savepoint so a failed EXPLAIN doesn't break the rest of the run on PostgreSQL
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return list(_postgres_findings(plan[0]['Plan']))
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return list(_sqlite_findings(row[3] for row in cursor.fetchall()))
+    raise DatabaseError(f"EXPLAIN is not supported on {connection.vendor}")
+
+
+def _sqlite_findings(details):
+    table = None
+    for detail in details:
+        match = SQLITE_ACCESS_RE.match(detail)
+        if match:
+            table = match.group(2)
+            if match.group(1) == 'SCAN' and ' USING ' not in detail:
+                yield 'scan', table, detail
+        elif detail.startswith('USE TEMP B-TREE'):
+            # Sorts the rows of the table read just before
+            yield 'sort', table, detail
+
+
+def _postgres_findings(node):
+    if node['Node Type'] == 'Seq Scan':
+        yield 'scan', node['Relation Name'], f"Seq Scan on {node['Relation Name']} (~{node['Plan Rows']} rows)"
+    elif node['Node Type'] in ('Sort', 'Incremental Sort'):
+        yield 'sort', _first_relation(node), f"{node['Node Type']} by {', '.join(node.get('Sort Key', []))}"
+    for child in node.get('Plans', []):
+        yield from _postgres_findings(child)
+
+
+def _first_relation(node):
+    if 'Relation Name' in node:
+        return node['Relation Name']
+    for child in node.get('Plans', []):
+        relation = _first_relation(child)
+        if relation:
+            return relation
+    return None
+
+
+def count_rows(table, using):
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+        return cursor.fetchone()[0]
+
+
+def advise(queries, using, min_rows=1000):
+    """
+    Explain every query. Returns (findings, failures): findings are dicts
+    with kind, table, rows, detail, sql and routes for the scans and sorts
+    of tables with at least `min_rows` rows; failures are (sql, error) pairs.
+    """
+    tables = set(connections[using].introspection.table_names())
+    sizes = {}
+    findings = []
+    failures = []
+    for sql, routes in queries.items():
+        try:
+            plan = explain(sql, using)
+        except DatabaseError as e:
+            failures.append((sql, str(e).strip().splitlines()[0]))
+            continue
+        for kind, table, detail in plan:
+            # Subquery and CTE aliases are not tables
+            if table not in tables:
+                continue
+            if table not in sizes:
+                sizes[table] = count_rows(table, using)
+            rows = sizes[table]
+            if rows < min_rows:
+                continue
+            findings.append({'kind': kind, 'table': table, 'rows': rows, 'detail': detail,
+                             'sql': sql, 'routes': sorted(routes)})
+    findings.sort(key=lambda finding: (finding['kind'] != 'scan', -finding['rows'], finding['sql']))
+    return findings, failures
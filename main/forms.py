@@ -142,3 +142,29 @@ class MemberProfileForm(forms.ModelForm):
             profile.save()
         return profile
 
+
+
+# ========================
+# ADMIN FORMS
+# ========================
+
+class BroadcastEmailForm(forms.Form):
+    """Compose form for the member broadcast admin action"""
+    subject = forms.CharField(
+        max_length=200,
+        widget=forms.TextInput(attrs={'class': 'vTextField'}),
+        help_text="You can use {{ first_name }}, {{ full_name }} and {{ username }}"
+    )
+    message = forms.CharField(
+        widget=forms.Textarea(attrs={'rows': 10, 'cols': 80}),
+        help_text="Plain text message. The same template variables are available."
+    )
+
+
+class DonorSearchForm(forms.Form):
+    """Blood group search on the admin donor lookup page"""
+    blood_group = forms.ChoiceField(
+        choices=MemberProfile.BLOOD_GROUP_CHOICES,
+        label="Patient's blood group",
+        help_text="Verified members who can donate to this group, most recently active first"
+    )
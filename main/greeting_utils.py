@@ -0,0 +1,152 @@
+"""
+Birthday and membership anniversary greetings
+
+Members are found through MemberProfile.birthday_key / anniversary_key
+(MMDD integers, indexed), so a day or a week is one or two index range
+queries rather than a month/day extract over every row. Invalid MMDD
+values such as 0132 never occur, so a range across a month end is exact.
+
+Members born (or who joined) on Feb 29 are greeted on Feb 28 in
+non-leap years.
+
+Each day sent is recorded in GreetingDay, birthdays and anniversaries
+separately. The hourly scheduler job sends every day since the last one
+completed, so a day missed while the scheduler was down is sent late (up to
+CATCH_UP_DAYS back) rather than skipped, and a day is never sent twice.
+"""
+import calendar
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.db.models import Max, Q
+from django.utils import timezone
+from .broadcast_utils import get_broadcast_recipients, send_broadcast
+from .models import GreetingDay, MemberProfile, date_key
+
+BIRTHDAY_SUBJECT = "Happy birthday, {{ first_name }}!"
+BIRTHDAY_MESSAGE = (
+    "Dear {{ first_name }},\n\n"
+    "Everyone at {{ site_name }} wishes you a very happy birthday and a wonderful year ahead.\n"
+)
+ANNIVERSARY_SUBJECT = "{{ years }} year{{ years|pluralize }} with {{ site_name }}"
+ANNIVERSARY_MESSAGE = (
+    "Dear {{ first_name }},\n\n"
+    "Today marks {{ years }} year{{ years|pluralize }} since you joined {{ site_name }}. "
+    "Thank you for being part of the club!\n"
+)
+
+FIELDS = {'birthday': 'birthday_key', 'anniversary': 'anniversary_key'}
+
+# Greetings older than this are not worth sending late
+CATCH_UP_DAYS = 3
+
+
+def key_range_filter(field, start, days=1):
+    """
+    Q for the members whose `field` key falls on one of the `days` days
+    starting at `start`, including Feb 29 on Feb 28 of a non-leap year.
+    """
+    if days >= 366:
+        return Q(**{f'{field}__isnull': False})
+    end = start + timedelta(days=days - 1)
+    end_key = date_key(end)
+    # Feb 29 is celebrated on Feb 28 when there is no Feb 29
+    if end_key == 228 and not calendar.isleap(end.year):
+        end_key = 229
+    start_key = date_key(start)
+    if start_key <= end_key:
+        return Q(**{f'{field}__range': (start_key, end_key)})
+    # The range wraps around the new year
+    return Q(**{f'{field}__gte': start_key}) | Q(**{f'{field}__lte': end_key})
+
+
+def celebration_date(key, start):
+    """The date on or after `start` when a member with this MMDD key is greeted"""
+    for offset in range(366):
+        day = start + timedelta(days=offset)
+        if date_key(day) == key or (key == 229 and date_key(day) == 228 and not calendar.isleap(day.year)):
+            return day
+    return None
+
+
+def celebrating(kind, start, days=1):
+    """
+    Active members with an email whose birthday or anniversary (`kind`)
+    falls within `days` days from `start`, with `celebrated_on` and, for
+    anniversaries, `years` set. Members who joined this year are skipped.
+    """
+    field = FIELDS[kind]
+    profiles = (
+        MemberProfile.objects.filter(key_range_filter(field, start, days))
+        .filter(user__is_active=True).exclude(user__email='')
+        .select_related('user')
+    )
+    result = []
+    for profile in profiles:
+        profile.celebrated_on = celebration_date(getattr(profile, field), start)
+        if kind == 'anniversary':
+            profile.years = profile.celebrated_on.year - profile.joined_date.year
+            if profile.years < 1:
+                continue
+        result.append(profile)
+    return sorted(result, key=lambda profile: (profile.celebrated_on, profile.pk))
+
+
+def send_greetings(day=None, force=False, connection=None):
+    """
+    Email the birthday and anniversary greetings of `day` (default today)
+    through the batched broadcast sender. Returns {'birthday': sent,
+    'anniversary': sent}, or None if that day's greetings were already sent
+    (recorded in GreetingDay) and `force` is not set.
+
+    Each kind is recorded as soon as it has gone out, so if the anniversaries
+    fail the retry doesn't send the birthday greetings again.
+    """
+    day = day or timezone.localdate()
+    record, _ = GreetingDay.objects.get_or_create(date=day)
+    if not force and record.birthdays_sent is not None and record.anniversaries_sent is not None:
+        return None
+    sent = {'birthday': 0, 'anniversary': 0}
+
+    if force or record.birthdays_sent is None:
+        birthdays = MemberProfile.objects.filter(key_range_filter('birthday_key', day))
+        sent['birthday'] = send_broadcast(
+            get_broadcast_recipients(queryset=User.objects.filter(member_profile__in=birthdays)),
+            BIRTHDAY_SUBJECT, BIRTHDAY_MESSAGE, connection=connection,
+        )
+        record.birthdays_sent = sent['birthday']
+        record.save(update_fields=['birthdays_sent', 'sent_at'])
+
+    if force or record.anniversaries_sent is None:
+        # One broadcast per join year, since the message says how many years
+        anniversaries = MemberProfile.objects.filter(
+            key_range_filter('anniversary_key', day), joined_date__year__lt=day.year,
+        )
+        for year in anniversaries.values_list('joined_date__year', flat=True).distinct().order_by():
+            recipients = User.objects.filter(member_profile__in=anniversaries.filter(joined_date__year=year))
+            sent['anniversary'] += send_broadcast(
+                get_broadcast_recipients(queryset=recipients), ANNIVERSARY_SUBJECT, ANNIVERSARY_MESSAGE,
+                connection=connection, context={'years': day.year - year},
+            )
+        record.anniversaries_sent = sent['anniversary']
+        record.save(update_fields=['anniversaries_sent', 'sent_at'])
+    return sent
+
+
+def send_due_greetings(today=None, connection=None):
+    """
+    Send the greetings of every day after the last one sent, up to `today`
+    and at most CATCH_UP_DAYS back (only `today` if none was ever sent).
+    Returns {day: counts} for the days sent.
+    """
+    today = today or timezone.localdate()
+    last_sent = GreetingDay.objects.filter(
+        date__lte=today, birthdays_sent__isnull=False, anniversaries_sent__isnull=False,
+    ).aggregate(last=Max('date'))['last']
+    day = today if last_sent is None else max(last_sent + timedelta(days=1), today - timedelta(days=CATCH_UP_DAYS))
+    results = {}
+    while day <= today:
+        sent = send_greetings(day, connection=connection)
+        if sent is not None:
+            results[day] = sent
+        day += timedelta(days=1)
+    return results
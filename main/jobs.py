@@ -0,0 +1,64 @@
+"""
+Periodic maintenance jobs, run by main.scheduler
+"""
+from datetime import timedelta
+import logging
+from importlib import import_module
+from django.conf import settings
+from .scheduler import job
+from .admin_dashboard import DashboardStats
+from . import contact_buffer
+from .retention_utils import apply_retention
+from .greeting_utils import send_due_greetings
+from .broadcast_utils import send_queued_broadcasts
+
+logger = logging.getLogger(__name__)
+
+
+@job(interval=timedelta(days=1))
+def clear_expired_sessions():
+    """Purge expired sessions (same as `manage.py clearsessions`)"""
+    engine = import_module(settings.SESSION_ENGINE)
+    try:
+        engine.SessionStore.clear_expired()
+    except NotImplementedError:
+        # Cookie-based sessions expire on the client
+        pass
+
+
+@job(interval=timedelta(days=1))
+def archive_old_records():
+    """Archive read contact messages and past attendance, purge expired OTPs"""
+    counts = apply_retention()
+    logger.info("Retention: %s", ' '.join(f"{name}={count}" for name, count in counts.items()))
+
+
+# Hourly, not daily: a daily interval drifts past midnight and skips a date.
+# Each day is sent once (see greeting_utils.send_due_greetings).
+@job(interval=timedelta(hours=1))
+def send_member_greetings():
+    """Email the birthday and anniversary greetings of today and any missed days"""
+    if not settings.MEMBER_GREETINGS_ENABLED:
+        return
+    for day, sent in send_due_greetings().items():
+        logger.info("Greetings for %s sent: %s birthday, %s anniversary", day, sent['birthday'], sent['anniversary'])
+
+
+@job(interval=timedelta(minutes=1))
+def send_broadcasts():
+    """Send the broadcast emails queued from the admin"""
+    sent = send_queued_broadcasts()
+    if sent:
+        logger.info("Broadcast emails sent: %s", sent)
+
+
+@job(interval=timedelta(minutes=15))
+def refresh_dashboard_stats():
+    """Recompute the admin dashboard statistics into the cache"""
+    DashboardStats.refresh_cache()
+
+
+@job(interval=timedelta(minutes=1))
+def flush_contact_messages():
+    """Insert the contact messages spooled by the write-behind buffer"""
+    contact_buffer.flush()
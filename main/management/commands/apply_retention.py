@@ -0,0 +1,28 @@
+"""
+Archive read contact messages and past event attendance, and purge expired OTPs
+"""
+from django.core.management.base import BaseCommand
+from main.retention_utils import POLICIES, apply_retention
+
+
+class Command(BaseCommand):
+    help = ("Move read contact messages and attendance at long-past events to the archive tables and delete "
+            "expired OTPs, as configured by the *_RETENTION_* settings")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--policy', action='append', choices=list(POLICIES), dest='policies',
+                            help="Only apply this policy (repeatable)")
+        parser.add_argument('--batch-size', type=int, help="Rows moved per transaction")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the rows that would be affected")
+
+    def handle(self, *args, **options):
+        counts = apply_retention(options['policies'], options['batch_size'], options['dry_run'])
+        for name, count in counts.items():
+            description, expired, archive = POLICIES[name]
+            if options['dry_run']:
+                action = "Would archive" if archive else "Would delete"
+            else:
+                action = "Archived" if archive else "Deleted"
+            self.stdout.write(f"{action} {count:,} {description}")
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"✓ Retention applied ({sum(counts.values()):,} rows)"))
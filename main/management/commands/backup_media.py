@@ -0,0 +1,74 @@
+"""
+Incremental, content-addressed backup of MEDIA_ROOT
+"""
+import os
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from main.media_backup_utils import (
+    backup_media, latest_manifest, load_manifest, restore_media, rotate_manifests, verify_store, verify_tree,
+)
+
+
+class Command(BaseCommand):
+    help = "Back up new or changed media files, or verify/restore a tree against a media manifest"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default=str(settings.MEDIA_ROOT), help="Tree to back up (default: MEDIA_ROOT)")
+        parser.add_argument('--output-dir', default=os.path.join('backups', 'media'),
+                            help="Backup store (default: backups/media)")
+        parser.add_argument('--jobs', type=int, default=8, help="Files hashed/copied in parallel")
+        parser.add_argument('--keep', type=int, default=30,
+                            help="Manifests to keep; objects only older ones use are deleted (0 = all)")
+        parser.add_argument('--full', action='store_true', help="Re-hash every file, ignoring size/mtime")
+        parser.add_argument('--manifest', help="Manifest to verify or restore (default: the latest)")
+        parser.add_argument('--verify', nargs='?', const=str(settings.MEDIA_ROOT), metavar='DIR',
+                            help="Check a tree (default: MEDIA_ROOT) against the manifest instead of backing up")
+        parser.add_argument('--verify-store', action='store_true',
+                            help="Check that every object the manifest references is present and intact")
+        parser.add_argument('--restore', metavar='DIR', help="Recreate the manifest's tree in DIR")
+
+    def handle(self, *args, **options):
+        store = options['output_dir']
+        if options['verify'] or options['verify_store'] or options['restore']:
+            manifest = self.get_manifest(store, options['manifest'])
+            if options['restore']:
+                written = restore_media(store, manifest, options['restore'], jobs=options['jobs'])
+                self.stdout.write(f"Restored {written} of {len(manifest['files'])} files into {options['restore']}")
+            if options['verify_store']:
+                self.report(verify_store(store, manifest, jobs=options['jobs']), "backup store")
+            if options['verify'] or options['restore']:
+                tree = options['restore'] or options['verify']
+                self.report(verify_tree(tree, manifest, jobs=options['jobs']), tree)
+            return
+
+        if not os.path.isdir(options['source']):
+            raise CommandError(f"Media directory {options['source']} does not exist")
+
+        started = time.monotonic()
+        result = backup_media(options['source'], store, jobs=options['jobs'], full=options['full'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"{result['files']} files: {result['hashed']} hashed, {result['copied']} copied "
+            f"({result['bytes_copied'] / 1024 / 1024:.1f} MB), {result['removed']} removed since the last backup"
+        )
+        self.stdout.write(self.style.SUCCESS(f"✓ Media backup completed in {elapsed:.1f}s: {result['manifest']}"))
+
+        if options['keep']:
+            manifests, objects = rotate_manifests(store, options['keep'])
+            if manifests:
+                self.stdout.write(f"Old backups cleaned up (removed {manifests} manifests, {objects} unused files)")
+
+    def get_manifest(self, store, path):
+        try:
+            manifest = load_manifest(path) if path else latest_manifest(store)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read manifest: {e}")
+        if manifest is None:
+            raise CommandError(f"No media backups in {store}")
+        return manifest
+
+    def report(self, problems, name):
+        if problems:
+            raise CommandError(f"{name} does not match the manifest:\n" + "\n".join(problems))
+        self.stdout.write(self.style.SUCCESS(f"✓ {name} matches the manifest"))
@@ -0,0 +1,102 @@
+"""
+Benchmark the sync (WSGI) public views against the async (ASGI) ones, in-process
+"""
+import asyncio
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib import admin
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import setup_test_environment
+from django.urls import path
+from main import async_views, views
+from main.benchmark_utils import summarize
+from main.models import Program
+import main.urls
+
+PUBLIC_VIEWS = ['home', 'about', 'programs', 'program_detail', 'gallery']
+
+
+def build_urlconf(view_module):
+    """URLconf module serving the public pages from `view_module` and everything else as usual"""
+    routes = {
+        'home': '',
+        'about': 'about/',
+        'programs': 'programs/',
+        'program_detail': 'programs/<slug:slug>/',
+        'gallery': 'gallery/',
+    }
+    admin.autodiscover()
+    urlconf = types.ModuleType(f'benchmark_urls_{view_module.__name__}')
+    urlconf.urlpatterns = [
+        path('admin/', admin.site.urls),
+        *[path(route, getattr(view_module, name), name=name) for name, route in routes.items()],
+        *[p for p in main.urls.urlpatterns if p.name not in PUBLIC_VIEWS],
+    ]
+    return urlconf
+
+
+def run_wsgi(urls, concurrency):
+    """Sync views through the WSGI handler, `concurrency` threads like a gthread worker"""
+    local = threading.local()
+
+    def fetch(url):
+        if not hasattr(local, 'client'):
+            local.client = Client()
+        start = time.perf_counter()
+        response = local.client.get(url)
+        assert response.status_code == 200, (url, response.status_code)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(fetch, urls))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def run_asgi(urls, concurrency):
+    """Async views through the ASGI handler, `concurrency` requests in flight on one event loop"""
+    async def main():
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(url):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(url)
+                assert response.status_code == 200, (url, response.status_code)
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*[fetch(url) for url in urls])
+        return summarize(latencies, time.perf_counter() - start)
+
+    return asyncio.run(main())
+
+
+class Command(BaseCommand):
+    help = "Compare latency and throughput per worker of the WSGI and ASGI public views"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Requests per run")
+        parser.add_argument('--concurrency', type=int, default=10, help="Concurrent requests per worker")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        slug = Program.objects.filter(is_active=True).values_list('slug', flat=True).first()
+        pages = ['/', '/about/', '/programs/', '/gallery/'] + ([f'/programs/{slug}/'] if slug else [])
+        urls = [pages[i % len(pages)] for i in range(options['requests'])]
+        concurrency = options['concurrency']
+
+        self.stdout.write(f"{len(urls)} requests over {len(pages)} pages, concurrency {concurrency}\n")
+        self.stdout.write(f"{'':<6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name, view_module, runner in [('WSGI', views, run_wsgi), ('ASGI', async_views, run_asgi)]:
+            with override_settings(ROOT_URLCONF=build_urlconf(view_module)):
+                runner(pages, 1)  # warm up templates and connections
+                result = runner(urls, concurrency)
+            self.stdout.write(
+                f"{name:<6}{result['throughput']:>10.1f}{result['p50']:>10.1f}"
+                f"{result['p95']:>10.1f}{result['p99']:>10.1f}"
+            )
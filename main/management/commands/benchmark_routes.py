@@ -0,0 +1,174 @@
+"""
+Benchmark every route in main/urls.py and every admin changelist at several data sizes
+"""
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import override_settings
+from django.test.testcases import LiveServerThread, _StaticFilesHandler
+from django.utils import timezone
+from main.benchmark_utils import (
+    LOGOUT_ROUTES, compare_results, get_routes, logged_in_client, run_client, run_http,
+)
+from main.models import MemberProfile
+from main.seed_utils import seed
+
+BENCHMARK_SETTINGS = {
+    # Never touch the real cache, replicas or mailbox
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    'DATABASE_REPLICAS': [],
+    'EMAIL_BACKEND': 'django.core.mail.backends.locmem.EmailBackend',
+    'ALLOWED_HOSTS': ['testserver', 'localhost', '127.0.0.1'],
+    'DEBUG': False,
+    'SECURE_SSL_REDIRECT': False,
+    'PROFILING_ENABLED': False,
+}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=settings.BASE_DIR, timeout=10).stdout.strip() or None
+    except OSError:
+        return None
+
+
+class Command(BaseCommand):
+    help = ("Measure p50/p95/p99 latency, throughput and queries per request of every route, anonymous "
+            "and logged in, on a throwaway database seeded at each --scales size")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='1000,10000,100000',
+                            help="Comma-separated member counts to seed (default: 1000,10000,100000)")
+        parser.add_argument('--requests', type=int, default=30, help="Requests per route with the test client")
+        parser.add_argument('--http-requests', type=int, default=100,
+                            help="Requests per route with the HTTP driver (0 to skip it)")
+        parser.add_argument('--concurrency', type=int, default=8, help="HTTP driver threads")
+        parser.add_argument('--routes', action='append', default=[],
+                            help="Only benchmark routes whose name contains this (repeatable)")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed for the generated data")
+        parser.add_argument('--output', help="JSON results file (default: benchmarks/routes_<timestamp>.json)")
+        parser.add_argument('--compare', metavar='JSON', help="Earlier results to compare against")
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help="p95 slowdown reported as a regression with --compare (default: 0.2 = 20%%)")
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help="Exit with an error if --compare finds a regression")
+
+    def handle(self, *args, **options):
+        try:
+            scales = [int(scale) for scale in options['scales'].split(',')]
+        except ValueError:
+            raise CommandError("--scales must be comma-separated integers")
+        previous = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as f:
+                previous = json.load(f)
+
+        connection = connections[DEFAULT_DB_ALIAS]
+        document = {
+            'created_at': timezone.now().isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'requests': options['requests'],
+            'http_requests': options['http_requests'],
+            'concurrency': options['concurrency'],
+            'seed': options['seed'],
+            'results': [],
+        }
+
+        with tempfile.TemporaryDirectory() as tmp, override_settings(**BENCHMARK_SETTINGS):
+            if connection.vendor == 'sqlite':
+                # A file rather than the in-memory default, so the server threads share it
+                connection.settings_dict['TEST']['NAME'] = os.path.join(tmp, 'benchmark.sqlite3')
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            server = None
+            try:
+                if options['http_requests']:
+                    server = LiveServerThread('localhost', _StaticFilesHandler, port=0)
+                    server.daemon = True
+                    server.start()
+                    server.is_ready.wait()
+                    if server.error:
+                        raise server.error
+                for scale in scales:
+                    document['results'] += self.run_scale(scale, options, server)
+            finally:
+                if server is not None:
+                    server.terminate()
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        output = options['output'] or os.path.join(
+            'benchmarks', f"routes_{timezone.now().strftime('%Y%m%d_%H%M%S')}.json"
+        )
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"✓ Results saved to {output}"))
+
+        if previous is not None:
+            lines, regressed = compare_results(previous, document, options['threshold'])
+            self.stdout.write(f"\nCompared with {options['compare']} ({previous.get('revision') or 'unknown revision'}):")
+            for line in lines:
+                self.stdout.write(self.style.WARNING(line) if line.endswith('REGRESSION') else line)
+            if regressed and options['fail_on_regression']:
+                raise CommandError("Performance regressed")
+
+    def run_scale(self, scale, options, server):
+        call_command('flush', interactive=False, verbosity=0)
+        cache.clear()
+        started = time.monotonic()
+        counts = seed(scale, seed=options['seed'])
+        self.stdout.write(f"\n{scale:,} members: seeded {sum(counts.values()):,} rows "
+                          f"in {time.monotonic() - started:.1f}s")
+
+        staff = User.objects.create_superuser('benchmark_admin', 'admin@example.com', None)
+        # A member with some history, so the portal pages have something to show
+        member = (MemberProfile.objects.filter(event_attendances__isnull=False, program_participations__isnull=False)
+                  .select_related('user').order_by('pk').first()).user
+        routes = [
+            (name, url) for name, url in get_routes()
+            if not options['routes'] or any(part in name for part in options['routes'])
+        ]
+        users = [('anonymous', None), ('member', member), ('staff', staff)]
+
+        self.stdout.write(f"{'driver':<7}{'user':<10}{'route':<45}{'status':>7}{'p50 ms':>9}{'p95 ms':>9}"
+                          f"{'p99 ms':>9}{'req/s':>9}{'queries':>9}")
+        results = []
+        for label, user in users:
+            client = logged_in_client(user)
+            # The admin for staff; the site anonymously and as a member
+            user_routes = [(name, url) for name, url in routes if name.startswith('admin:') == (label == 'staff')]
+            for name, url in user_routes:
+                result = run_client(client, name, url, options['requests'], user=user)
+                results.append(self.report(scale, 'client', label, name, url, result))
+
+            if server is None:
+                continue
+            cookies = {key: morsel.value for key, morsel in client.cookies.items()}
+            base_url = f'http://{server.host}:{server.port}'
+            for name, url in user_routes:
+                if name in LOGOUT_ROUTES:
+                    continue
+                result = run_http(base_url, url, options['http_requests'], options['concurrency'], cookies)
+                results.append(self.report(scale, 'http', label, name, url, result))
+        return results
+
+    def report(self, scale, driver, user, name, url, result):
+        queries = result.get('queries')
+        self.stdout.write(
+            f"{driver:<7}{user:<10}{name:<45}{result['status']:>7}{result['p50']:>9.1f}{result['p95']:>9.1f}"
+            f"{result['p99']:>9.1f}{result['throughput']:>9.1f}{'' if queries is None else f'{queries:g}':>9}"
+        )
+        return {'scale': scale, 'driver': driver, 'user': user, 'route': name, 'url': url, **result}
@@ -0,0 +1,113 @@
+"""
+Benchmark concurrent SQLite write throughput: default settings vs the tuned profile
+"""
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+# Django's SQLite defaults: rollback journal, 5 second busy timeout, deferred transactions
+DEFAULT_PROFILE = {'init_command': '', 'transaction_mode': 'DEFERRED', 'timeout': 5}
+
+
+def connect(path, profile):
+    conn = sqlite3.connect(path, timeout=profile['timeout'], isolation_level=None)
+    for command in profile['init_command'].split(';'):
+        if command.strip():
+            conn.execute(command)
+    return conn
+
+
+def write_worker(args):
+    """
+    One simulated gunicorn worker: each transaction reads then writes, like
+    get_or_create() on EventAttendance or an OTP send followed by a session save.
+    """
+    path, profile, worker_id, transactions = args
+    conn = connect(path, profile)
+    committed = locked = 0
+    start = time.perf_counter()
+    for i in range(transactions):
+        try:
+            conn.execute(f"BEGIN {profile['transaction_mode']}")
+            conn.execute("SELECT COUNT(*) FROM attendance WHERE member_id = ?", (worker_id,)).fetchone()
+            conn.execute(
+                "INSERT INTO attendance (member_id, event_id, status, notes) VALUES (?, ?, 'registered', ?)",
+                (worker_id, i, 'x' * 200),
+            )
+            conn.execute("UPDATE counters SET value = value + 1 WHERE id = 1")
+            conn.execute("COMMIT")
+            committed += 1
+        except sqlite3.OperationalError as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            if 'locked' not in str(e) and 'busy' not in str(e):
+                raise
+            locked += 1
+    conn.close()
+    return committed, locked, time.perf_counter() - start
+
+
+def run_profile(profile, workers, transactions):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.sqlite3')
+        conn = connect(path, profile)
+        conn.executescript("""
+            CREATE TABLE attendance (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                member_id INTEGER NOT NULL,
+                event_id INTEGER NOT NULL,
+                status VARCHAR(20) NOT NULL,
+                notes TEXT NOT NULL
+            );
+            CREATE INDEX attendance_member ON attendance (member_id);
+            CREATE TABLE counters (id INTEGER PRIMARY KEY, value INTEGER NOT NULL);
+            INSERT INTO counters VALUES (1, 0);
+        """)
+        conn.close()
+
+        start = time.perf_counter()
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(write_worker, [(path, profile, w, transactions) for w in range(workers)])
+        elapsed = time.perf_counter() - start
+
+    committed = sum(r[0] for r in results)
+    locked = sum(r[1] for r in results)
+    return {
+        'committed': committed,
+        'locked_errors': locked,
+        'elapsed': elapsed,
+        'throughput': committed / elapsed if elapsed else 0,
+    }
+
+
+class Command(BaseCommand):
+    help = "Compare concurrent write throughput of default SQLite settings and SQLITE_TUNED_OPTIONS"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help="Concurrent writer processes")
+        parser.add_argument('--transactions', type=int, default=500, help="Write transactions per worker")
+
+    def handle(self, *args, **options):
+        profiles = [
+            ('default', DEFAULT_PROFILE),
+            ('tuned', settings.SQLITE_TUNED_OPTIONS),
+        ]
+        self.stdout.write(
+            f"{options['workers']} workers x {options['transactions']} read-then-write transactions\n"
+        )
+        results = {}
+        for name, profile in profiles:
+            results[name] = result = run_profile(profile, options['workers'], options['transactions'])
+            self.stdout.write(
+                f"{name:<8} {result['committed']:>7} committed  {result['locked_errors']:>6} 'database is locked'"
+                f"  {result['elapsed']:7.2f}s  {result['throughput']:9.1f} txn/s"
+            )
+
+        if results['default']['throughput']:
+            gain = results['tuned']['throughput'] / results['default']['throughput']
+            self.stdout.write(self.style.SUCCESS(f"\nTuned profile: {gain:.1f}x committed write throughput"))
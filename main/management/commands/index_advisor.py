@@ -0,0 +1,70 @@
+"""
+Explain the queries recorded by benchmark_routes and report full table scans and sorts
+"""
+import glob
+import os
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from main.explain_utils import advise, load_benchmark_queries
+
+
+class Command(BaseCommand):
+    help = ("Replay the SQL saved by benchmark_routes through EXPLAIN on this database (SQLite or PostgreSQL) "
+            "and list the sequential scans and sorts of large tables, with the routes that run them")
+
+    def add_arguments(self, parser):
+        parser.add_argument('results', nargs='*',
+                            help="benchmark_routes JSON files (default: the newest in benchmarks/)")
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help="Database alias to explain against")
+        parser.add_argument('--min-rows', type=int, default=1000,
+                            help="Ignore tables with fewer rows; scanning small tables is fine (default: 1000)")
+
+    def handle(self, *args, **options):
+        paths = options['results']
+        if not paths:
+            found = sorted(glob.glob(os.path.join('benchmarks', 'routes_*.json')))
+            if not found:
+                raise CommandError("No benchmark results in benchmarks/. Run benchmark_routes first.")
+            paths = found[-1:]
+        if options['database'] not in connections:
+            raise CommandError(f"Unknown database alias '{options['database']}'")
+        vendor = connections[options['database']].vendor
+        if vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f"EXPLAIN is only supported on SQLite and PostgreSQL, not {vendor}")
+
+        try:
+            queries = load_benchmark_queries(paths)
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Cannot read benchmark results: {e}")
+        self.stdout.write(f"Explaining {len(queries)} distinct queries from {', '.join(paths)} on {vendor}")
+
+        findings, failures = advise(queries, options['database'], options['min_rows'])
+        verbose = options['verbosity'] > 1
+        for title, kind in [("Full table scans", 'scan'), ("Sorts without an index", 'sort')]:
+            selected = [finding for finding in findings if finding['kind'] == kind]
+            if not selected:
+                continue
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{title} ({len(selected)})"))
+            for finding in selected:
+                routes = finding['routes']
+                shown = ', '.join(routes[:3]) + (f" and {len(routes) - 3} more" if len(routes) > 3 else "")
+                sql = finding['sql'] if verbose else finding['sql'][:200] + ('...' if len(finding['sql']) > 200 else '')
+                self.stdout.write(self.style.WARNING(f"  {finding['table']} ({finding['rows']:,} rows): {finding['detail']}"))
+                self.stdout.write(f"    routes: {shown}")
+                self.stdout.write(f"    {sql}")
+
+        if failures:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\nCould not explain ({len(failures)})"))
+            for sql, error in failures[:10 if not verbose else None]:
+                self.stdout.write(f"  {error}: {sql[:120]}")
+            self.stdout.write("  Queries recorded on a different database engine may not run here.")
+
+        scans = sum(finding['kind'] == 'scan' for finding in findings)
+        if scans:
+            self.stdout.write(self.style.WARNING(
+                f"\n{scans} full scans of tables with {options['min_rows']:,}+ rows"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"\n✓ No full scans of tables with {options['min_rows']:,}+ rows"
+            ))
@@ -0,0 +1,89 @@
+"""
+Copy all data from one database alias to another (e.g. db.sqlite3 to Postgres), resumably
+"""
+import os
+import tempfile
+import time
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from main.db_copy_utils import copy_database, load_state, verify_copy
+
+
+class Command(BaseCommand):
+    help = ("Copy every table from --source to --target in foreign-key order using batched reads and "
+            "COPY (PostgreSQL) or executemany, then verify row counts and checksums")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default=DEFAULT_DB_ALIAS, help="Alias to copy from (default: default)")
+        parser.add_argument('--target', default='target',
+                            help="Alias to copy to (default: target, configured by DATABASE_TARGET_URL)")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per read and per COPY/INSERT")
+        parser.add_argument('--exclude', action='append', default=[],
+                            help="App label or app_label.ModelName to skip (repeatable)")
+        parser.add_argument('--state-file', help="Progress file used to resume (default: in the temp directory)")
+        parser.add_argument('--restart', action='store_true', help="Ignore saved progress and start over")
+        parser.add_argument('--verify-only', action='store_true', help="Only compare row counts and checksums")
+        parser.add_argument('--no-input', action='store_false', dest='interactive',
+                            help="Don't ask before emptying the target tables")
+
+    def handle(self, *args, **options):
+        source, target = options['source'], options['target']
+        for alias in (source, target):
+            if alias not in connections:
+                raise CommandError(f"Unknown database alias '{alias}'. Set DATABASE_TARGET_URL to configure 'target'.")
+        if source == target:
+            raise CommandError("--source and --target must be different databases")
+
+        state_path = options['state_file'] or os.path.join(
+            tempfile.gettempdir(), f'shanti_yuwa_club_migrate_{source}_to_{target}.json'
+        )
+        if options['restart'] and os.path.exists(state_path):
+            os.remove(state_path)
+
+        if not options['verify_only']:
+            self.copy(source, target, state_path, options)
+
+        self.stdout.write("Verifying row counts and checksums...")
+
+        def verified(model, rows, ok):
+            status = "ok" if ok else "MISMATCH"
+            self.stdout.write(f"  {model._meta.label_lower:<40}{rows:>10,} rows  {status}")
+
+        problems = verify_copy(source, target, exclude=options['exclude'], progress=verified)
+        if problems:
+            raise CommandError("Verification failed:\n" + "\n".join(problems))
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        self.stdout.write(self.style.SUCCESS(f"✓ '{target}' matches '{source}'"))
+
+    def copy(self, source, target, state_path, options):
+        resuming = load_state(state_path, source, target) is not None
+        if resuming:
+            self.stdout.write(f"Resuming interrupted copy ({state_path})")
+        else:
+            # Create the schema first; the tables migrate fills (content types,
+            # permissions) are emptied and copied from the source like the rest
+            call_command('migrate', database=target, interactive=False, verbosity=0)
+            if options['interactive']:
+                answer = input(f"This will delete all existing rows in '{target}' "
+                               f"({connections[target].settings_dict['NAME']}). Type 'yes' to continue: ")
+                if answer != 'yes':
+                    raise CommandError("Migration cancelled")
+
+        last_report = {}
+
+        def progress(model, rows):
+            label = model._meta.label_lower
+            if rows - last_report.get(label, 0) >= 50000:
+                last_report[label] = rows
+                self.stdout.write(f"  {label:<40}{rows:>10,} rows...")
+
+        started = time.monotonic()
+        copied = copy_database(
+            source, target, state_path,
+            batch_size=options['batch_size'], exclude=options['exclude'], progress=progress,
+        )
+        for label, rows in copied.items():
+            self.stdout.write(f"  {label:<40}{rows:>10,} rows copied")
+        self.stdout.write(f"Copied {sum(copied.values()):,} rows in {time.monotonic() - started:.1f}s")
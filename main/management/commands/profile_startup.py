@@ -0,0 +1,119 @@
+"""
+Profile process start-up: per-module import times, wall-clock and memory
+
+Runs a fresh interpreter with `python -X importtime`, so the numbers are what
+a new worker, scheduler or management command pays, not this (already warm)
+process.
+"""
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Executed in the child interpreter. `setup` is what every process pays,
+# `urls` adds loading the URLconf (views, admin) like a web worker's first request.
+# -X importtime only sees import statements, so modules Django loads through
+# importlib.import_module (app models, admin modules, URLconfs) are timed here.
+PROBE = """
+import importlib, json, os, resource, sys, time
+dynamic = {}
+_import_module = importlib.import_module
+
+def import_module(name, package=None):
+    loaded = name in sys.modules
+    started = time.perf_counter()
+    try:
+        return _import_module(name, package)
+    finally:
+        if not loaded and name in sys.modules:
+            dynamic.setdefault(name, int((time.perf_counter() - started) * 1e6))
+
+importlib.import_module = import_module
+start = time.perf_counter()
+import django
+django.setup()
+if sys.argv[1] == 'urls':
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'elapsed': elapsed, 'max_rss_kb': rss, 'dynamic': dynamic}))
+"""
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from -X importtime output"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header line
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(fields[0]), int(fields[1]), depth))
+    return modules
+
+
+class Command(BaseCommand):
+    help = "Report import-time cost of starting a process, per module and per package"
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=['setup', 'urls'], default='urls',
+                            help="setup: django.setup() only; urls: also load the URLconf (default)")
+        parser.add_argument('--limit', type=int, default=20, help="Rows per table")
+        parser.add_argument('--json', action='store_true', help="Print the raw results as JSON")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE))
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE, options['target']],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Start-up probe failed:\n{result.stderr[-2000:]}")
+
+        summary = json.loads(result.stdout.strip().splitlines()[-1])
+        modules = parse_importtime(result.stderr)
+        packages = defaultdict(int)
+        for name, self_us, _, _ in modules:
+            packages[name.split('.')[0]] += self_us
+
+        dynamic = summary.pop('dynamic')
+        if options['json']:
+            self.stdout.write(json.dumps({
+                **summary,
+                'dynamic_imports_us': dynamic,
+                'target': options['target'],
+                'modules': [{'module': m, 'self_us': s, 'cumulative_us': c} for m, s, c, _ in modules],
+                'packages': dict(packages),
+            }, indent=2))
+            return
+
+        limit = options['limit']
+        total_us = sum(c for _, _, c, depth in modules if depth == 0)
+        self.stdout.write(
+            f"Target '{options['target']}': {summary['elapsed'] * 1000:.0f} ms wall-clock, "
+            f"{total_us / 1000:.0f} ms in imports, {len(modules)} modules, "
+            f"peak RSS {summary['max_rss_kb'] / 1024:.1f} MB\n"
+        )
+
+        self.stdout.write(f"{'Package':<40}{'self ms':>10}")
+        for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:limit]:
+            self.stdout.write(f"{package:<40}{self_us / 1000:>10.1f}")
+
+        self.stdout.write(f"\n{'Module':<50}{'self ms':>10}{'cumul. ms':>12}")
+        for name, self_us, cumulative_us, _ in sorted(modules, key=lambda m: -m[1])[:limit]:
+            self.stdout.write(f"{name:<50}{self_us / 1000:>10.1f}{cumulative_us / 1000:>12.1f}")
+
+        self.stdout.write(f"\n{'Loaded by Django (import_module)':<50}{'':>10}{'cumul. ms':>12}")
+        for name, cumulative_us in sorted(dynamic.items(), key=lambda item: -item[1])[:limit]:
+            self.stdout.write(f"{name:<50}{'':>10}{cumulative_us / 1000:>12.1f}")
+
+        self.stdout.write(self.style.SUCCESS(f"\n✓ Profiled start-up of {len(modules)} modules"))
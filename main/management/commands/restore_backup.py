@@ -0,0 +1,94 @@
+"""
+Restore a backup made by the `backup` command with batched bulk inserts
+"""
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from main.backup_utils import (
+    RestoreError, get_applied_migrations, get_restore_plan, list_backups, load_manifest, restore_backup,
+    verify_backup,
+)
+
+
+class Command(BaseCommand):
+    help = "Load a backup directory into the database in one transaction, bypassing per-row save() and signals"
+
+    def add_arguments(self, parser):
+        parser.add_argument('backup', nargs='?',
+                            help="Backup directory (default: the newest one in --backup-dir)")
+        parser.add_argument('--backup-dir', default='backups', help="Where to look for the newest backup")
+        parser.add_argument('--flush', action='store_true',
+                            help="Delete the existing rows of every restored table first")
+        parser.add_argument('--exclude', action='append', default=[],
+                            help="App label or app_label.ModelName to skip (repeatable)")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Rows per INSERT")
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help="Database alias to restore into")
+        parser.add_argument('--skip-verify', action='store_true', help="Don't check file checksums first")
+        parser.add_argument('--no-input', action='store_false', dest='interactive',
+                            help="Don't ask for confirmation before --flush")
+
+    def handle(self, *args, **options):
+        path = options['backup']
+        if not path:
+            backups = list_backups(options['backup_dir'])
+            if not backups:
+                raise CommandError(f"No backups in {options['backup_dir']}")
+            path = backups[0]
+        if not os.path.isdir(path):
+            raise CommandError(f"No backup at {path}")
+        if options['database'] not in connections:
+            raise CommandError(f"Unknown database alias '{options['database']}'")
+
+        try:
+            manifest = load_manifest(path)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read backup: {e}")
+        self.stdout.write(f"Restoring {path} (taken {manifest['created_at']} from {manifest['database']['vendor']})")
+
+        if not options['skip_verify']:
+            problems = verify_backup(path)
+            if problems:
+                raise CommandError("Backup verification failed:\n" + "\n".join(problems))
+
+        current = get_applied_migrations(options['database'])
+        for app_label, name in manifest['migrations'].items():
+            if current.get(app_label) != name:
+                self.stdout.write(self.style.WARNING(
+                    f"Backup was taken at {app_label}.{name}, this database is at "
+                    f"{app_label}.{current.get(app_label)}; columns are matched by name"
+                ))
+
+        _, unknown = get_restore_plan(manifest, options['exclude'])
+        for label in unknown:
+            self.stdout.write(self.style.WARNING(f"Skipping {label}: no such model in this project"))
+
+        if options['flush'] and options['interactive']:
+            try:
+                answer = input(f"This will delete all rows in the restored tables of '{options['database']}'. "
+                               "Type 'yes' to continue: ")
+            except EOFError:
+                raise CommandError("Cannot ask for confirmation without a terminal. Pass --no-input to restore anyway.")
+            if answer != 'yes':
+                raise CommandError("Restore cancelled")
+
+        def progress(model, rows):
+            self.stdout.write(f"  {model._meta.label_lower:<40}{rows:>10,} rows")
+
+        started = time.monotonic()
+        try:
+            restored = restore_backup(
+                path,
+                using=options['database'],
+                flush=options['flush'],
+                exclude=options['exclude'],
+                batch_size=options['batch_size'],
+                progress=progress,
+            )
+        except RestoreError as e:
+            raise CommandError(f"{e}. Re-run with --flush to replace them.")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Restored {sum(restored.values()):,} rows in {len(restored)} tables "
+            f"in {time.monotonic() - started:.1f}s"
+        ))
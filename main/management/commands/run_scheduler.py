@@ -0,0 +1,58 @@
+"""
+Run the periodic maintenance jobs registered in main/jobs.py
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from main import scheduler
+from main.models import ScheduledJob
+
+
+class Command(BaseCommand):
+    help = "Run the maintenance scheduler (retention, session cleanup, stats refresh, emails)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run due jobs once and exit")
+        parser.add_argument('--job', help="Run this job immediately, whether due or not")
+        parser.add_argument('--list', action='store_true', help="List registered jobs and their last run")
+        parser.add_argument('--tick', type=int, help="Seconds between checks for due jobs")
+
+    def handle(self, *args, **options):
+        scheduler.load_jobs()
+
+        if options['list']:
+            runs = {job.name: job for job in ScheduledJob.objects.all()}
+            now = timezone.now()
+            for name, entry in sorted(scheduler.registry.items()):
+                run = runs.get(name)
+                if run and run.last_run_at:
+                    last = f"{run.last_run_at:%Y-%m-%d %H:%M:%S} ({run.last_status}, {run.last_duration:.2f}s)"
+                    next_run = scheduler.next_run_at(name, run.last_run_at)
+                else:
+                    last, next_run = "never", None
+                due = "now" if next_run is None or next_run <= now else f"{next_run:%Y-%m-%d %H:%M:%S}"
+                self.stdout.write(f"{name:<28} every {entry['interval']}  last run: {last}  next run: {due}")
+            return
+
+        if options['job']:
+            if options['job'] not in scheduler.registry:
+                raise CommandError(f"Unknown job: {options['job']}")
+            status = scheduler.run_job(options['job'])
+            self.stdout.write(f"{options['job']}: {status}")
+            return
+
+        if options['once']:
+            lock = scheduler.LeaderLock()
+            if not lock.acquire():
+                raise CommandError("Another scheduler process holds the lock")
+            try:
+                ran = scheduler.run_pending()
+            finally:
+                lock.release()
+            self.stdout.write(f"Ran {len(ran)} job(s): {', '.join(ran) or '-'}")
+            return
+
+        self.stdout.write("Scheduler running. Press Ctrl+C to stop.")
+        try:
+            scheduler.run_forever(tick=options['tick'])
+        except KeyboardInterrupt:
+            pass
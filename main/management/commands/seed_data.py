@@ -0,0 +1,45 @@
+"""
+Fill the database with synthetic members and club activity for scale testing
+"""
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from main.seed_utils import seed
+
+
+class Command(BaseCommand):
+    help = ("Generate members with profiles, event registrations, program enrolments and OTP history, plus "
+            "programs, events, gallery images and messages in proportion, using batched bulk inserts")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=1000, help="Members to add (default: 1000)")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed; the same seed gives the same data")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Members per transaction and rows per INSERT")
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help="Database alias to fill")
+        parser.add_argument('--force', action='store_true', help="Allow running with DEBUG off")
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError("DEBUG is off: this may be a production database. Use --force to seed it anyway.")
+        if options['database'] not in connections:
+            raise CommandError(f"Unknown database alias '{options['database']}'")
+        if options['members'] < 0 or options['batch_size'] < 1:
+            raise CommandError("--members must be 0 or more and --batch-size at least 1")
+
+        total = options['members']
+        started = time.monotonic()
+
+        def progress(done):
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"  {done:>10,} / {total:,} members ({done / elapsed:,.0f}/s)")
+
+        counts = seed(total, seed=options['seed'], batch_size=options['batch_size'],
+                      using=options['database'], progress=progress if total > options['batch_size'] else None)
+        elapsed = time.monotonic() - started
+        for model, rows in counts.items():
+            self.stdout.write(f"  {model:<25}{rows:>12,}")
+        rows = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Added {rows:,} rows in {elapsed:.1f}s ({rows / elapsed if elapsed else rows:,.0f} rows/s)"
+        ))
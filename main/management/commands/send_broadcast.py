@@ -0,0 +1,62 @@
+"""
+Send a templated broadcast email to a filtered set of members
+"""
+from django.core.management.base import BaseCommand, CommandError
+from main.broadcast_utils import get_broadcast_recipients, send_broadcast
+from main.models import Event, MemberProfile
+
+
+class Command(BaseCommand):
+    help = "Send a templated email to members, filtered by membership type, verification or event registration"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subject', required=True, help="Subject line (template variables allowed)")
+        parser.add_argument('--message', help="Message body (template variables allowed)")
+        parser.add_argument('--message-file', help="Read the message body from this file")
+        parser.add_argument(
+            '--membership-type',
+            choices=[choice for choice, label in MemberProfile.MEMBERSHIP_CHOICES],
+        )
+        verified = parser.add_mutually_exclusive_group()
+        verified.add_argument('--verified', dest='is_verified', action='store_const', const=True)
+        verified.add_argument('--unverified', dest='is_verified', action='store_const', const=False)
+        parser.add_argument('--event', type=int, action='append', dest='events',
+                            help="Only members registered for this event ID (repeatable)")
+        parser.add_argument('--batch-size', type=int, help="Emails rendered and sent per batch")
+        parser.add_argument('--rate', type=float, help="Maximum emails per second (0 = unlimited)")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the recipients")
+
+    def handle(self, *args, **options):
+        if options['message_file']:
+            with open(options['message_file'], encoding='utf-8') as f:
+                message = f.read()
+        elif options['message']:
+            message = options['message']
+        else:
+            raise CommandError("Provide --message or --message-file")
+
+        events = None
+        if options['events']:
+            events = Event.objects.filter(id__in=options['events'])
+            if events.count() != len(set(options['events'])):
+                raise CommandError("One or more event IDs do not exist")
+
+        recipients = get_broadcast_recipients(
+            membership_type=options['membership_type'],
+            is_verified=options['is_verified'],
+            events=events,
+        )
+
+        total = recipients.count()
+        self.stdout.write(f"Recipients: {total}")
+        if options['dry_run'] or not total:
+            return
+
+        sent = send_broadcast(
+            recipients,
+            subject=options['subject'],
+            message=message,
+            batch_size=options['batch_size'],
+            rate_limit=options['rate'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"✓ {sent} email(s) sent"))
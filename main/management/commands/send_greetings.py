@@ -0,0 +1,42 @@
+"""
+Send today's birthday and membership anniversary greetings, or list the upcoming ones
+"""
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from main.greeting_utils import celebrating, send_greetings
+
+
+class Command(BaseCommand):
+    help = ("Email the members whose birthday or membership anniversary is today (also sent daily by the "
+            "scheduler), or list those coming up with --dry-run")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Day to greet for, YYYY-MM-DD (default: today)")
+        parser.add_argument('--days', type=int, default=1,
+                            help="With --dry-run, list this many days from --date (e.g. 7 for the week)")
+        parser.add_argument('--dry-run', action='store_true', help="Only list the members who would be greeted")
+        parser.add_argument('--force', action='store_true', help="Send even if this day's greetings were already sent")
+
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options['date']) if options['date'] else timezone.localdate()
+        except ValueError:
+            raise CommandError("--date must be YYYY-MM-DD")
+
+        if options['dry_run']:
+            for kind in ['birthday', 'anniversary']:
+                profiles = celebrating(kind, day, options['days'])
+                self.stdout.write(self.style.MIGRATE_HEADING(f"{kind.capitalize()}s ({len(profiles)})"))
+                for profile in profiles:
+                    years = f"  {profile.years} year(s)" if kind == 'anniversary' else ''
+                    self.stdout.write(f"  {profile.celebrated_on:%a %b %d}  "
+                                      f"{profile.user.get_full_name() or profile.user.username} <{profile.user.email}>{years}")
+            return
+
+        sent = send_greetings(day, force=options['force'])
+        if sent is None:
+            raise CommandError(f"Greetings for {day} were already sent. Use --force to send them again.")
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {sent['birthday']} birthday and {sent['anniversary']} anniversary greeting(s) sent"
+        ))
@@ -0,0 +1,13 @@
+"""
+Compile templates, populate the URL resolver and prime caches
+"""
+from django.core.management.base import BaseCommand
+from shanti_yuwa_club.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = "Run the server warm-up steps and report how long each takes"
+
+    def handle(self, *args, **options):
+        for step, seconds in warm_up().items():
+            self.stdout.write(f"{step:<20} {seconds:6.2f}s")
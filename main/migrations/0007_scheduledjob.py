@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_delete_heroimage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('last_duration', models.FloatField(default=0, help_text='Duration of the last run in seconds')),
+                ('last_status', models.CharField(blank=True, choices=[('success', 'Success'), ('failed', 'Failed')], max_length=20)),
+                ('last_error', models.TextField(blank=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_scheduledjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['is_read', '-created_at'], name='main_contac_is_read_d0daa0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['is_active', 'date'], name='main_event_is_acti_a615fd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventattendance',
+            index=models.Index(fields=['member', 'status'], name='main_eventa_member__7f3487_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='galleryimage',
+            index=models.Index(fields=['category', '-created_at'], name='main_galler_categor_46df2c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='program',
+            index=models.Index(fields=['is_active', '-created_at'], name='main_progra_is_acti_0b5006_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='programparticipation',
+            index=models.Index(fields=['member', 'status'], name='main_progra_member__8c11af_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teammember',
+            index=models.Index(fields=['is_active', 'display_order'], name='main_teamme_is_acti_1beb79_idx'),
+        ),
+    ]
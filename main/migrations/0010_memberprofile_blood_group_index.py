@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_retention_archives'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='memberprofile',
+            index=models.Index(fields=['blood_group', 'is_verified'], name='main_member_blood_g_be3461_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import ExtractDay, ExtractMonth
+
+
+def fill_date_keys(apps, schema_editor):
+    """Set birthday_key and anniversary_key (MMDD) on existing profiles; NULL dates give NULL keys"""
+    MemberProfile = apps.get_model('main', 'MemberProfile')
+    MemberProfile.objects.using(schema_editor.connection.alias).update(
+        birthday_key=ExtractMonth('date_of_birth') * 100 + ExtractDay('date_of_birth'),
+        anniversary_key=ExtractMonth('joined_date') * 100 + ExtractDay('joined_date'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_memberprofile_blood_group_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='memberprofile',
+            name='anniversary_key',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='memberprofile',
+            name='birthday_key',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='memberprofile',
+            index=models.Index(fields=['birthday_key'], name='main_member_birthda_2ade84_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='memberprofile',
+            index=models.Index(fields=['anniversary_key'], name='main_member_anniver_bf8887_idx'),
+        ),
+        migrations.RunPython(fill_date_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_queued_broadcast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GreetingDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('birthdays_sent', models.PositiveIntegerField(default=0)),
+                ('anniversaries_sent', models.PositiveIntegerField(default=0)),
+                ('sent_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+    ]
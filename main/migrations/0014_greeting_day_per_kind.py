@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0013_greeting_day'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='greetingday',
+            name='anniversaries_sent',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='greetingday',
+            name='birthdays_sent',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
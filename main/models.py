@@ -1,3 +1,4 @@
+from datetime import date
 from django.db import models
 from django.contrib.auth.models import User
 from ckeditor.fields import RichTextField
@@ -33,6 +34,9 @@ class Program(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_active', '-created_at']),
+        ]
 
 class GalleryCategory(models.Model):
     name = models.CharField(max_length=100)
@@ -55,6 +59,9 @@ class GalleryImage(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['category', '-created_at']),
+        ]
 
 class TeamMember(models.Model):
     name = models.CharField(max_length=100)
@@ -72,6 +79,9 @@ class TeamMember(models.Model):
     
     class Meta:
         ordering = ['display_order']
+        indexes = [
+            models.Index(fields=['is_active', 'display_order']),
+        ]
 
 class Event(models.Model):
     title = models.CharField(max_length=200)
@@ -87,6 +97,9 @@ class Event(models.Model):
     
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['is_active', 'date']),
+        ]
 
 class ContactMessage(models.Model):
     name = models.CharField(max_length=100)
@@ -101,12 +114,20 @@ class ContactMessage(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_read', '-created_at']),
+        ]
 
 
 # ========================
 # MEMBER PORTAL MODELS
 # ========================
 
+def date_key(value):
+    """MMDD of a date as an integer (Feb 29 is 229), or None"""
+    return value.month * 100 + value.day if value else None
+
+
 class MemberProfile(models.Model):
     """Extended profile for club members"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='member_profile')
@@ -138,12 +159,41 @@ class MemberProfile(models.Model):
     ]
     membership_type = models.CharField(max_length=20, choices=MEMBERSHIP_CHOICES, default='regular')
     
+    # Month and day as MMDD (e.g. 1231), kept in sync by save(), so birthdays and
+    # anniversaries are found with an index range query (see main/greeting_utils.py)
+    birthday_key = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    anniversary_key = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    
+    class Meta:
+        indexes = [
+            # Blood donor lookup (main/donor_utils.py)
+            models.Index(fields=['blood_group', 'is_verified']),
+            models.Index(fields=['birthday_key']),
+            models.Index(fields=['anniversary_key']),
+        ]
+    
     def __str__(self):
         return f"{self.user.get_full_name() or self.user.username}'s Profile"
     
+    def set_date_keys(self):
+        """Recompute birthday_key and anniversary_key (call before bulk_create(), which skips save())"""
+        self.birthday_key = date_key(self.date_of_birth)
+        # joined_date is only filled in by save() on creation
+        self.anniversary_key = date_key(self.joined_date or date.today())
+    
+    def save(self, *args, **kwargs):
+        self.set_date_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'birthday_key', 'anniversary_key'}
+        super().save(*args, **kwargs)
+    
     @property
     def total_events_attended(self):
-        return self.event_attendances.filter(status='attended').count()
+        # Attendance at long-past events is moved to ArchivedEventAttendance by the retention policy
+        return self.event_attendances.filter(status='attended').order_by().values('pk').union(
+            self.archived_event_attendances.filter(status='attended').order_by().values('pk'), all=True,
+        ).count()
     
     @property
     def total_programs_participated(self):
@@ -168,6 +218,9 @@ class EventAttendance(models.Model):
     class Meta:
         unique_together = ['member', 'event']
         ordering = ['-registered_at']
+        indexes = [
+            models.Index(fields=['member', 'status']),
+        ]
     
     def __str__(self):
         return f"{self.member.user.username} - {self.event.title}"
@@ -199,6 +252,9 @@ class ProgramParticipation(models.Model):
     class Meta:
         unique_together = ['member', 'program']
         ordering = ['-enrolled_at']
+        indexes = [
+            models.Index(fields=['member', 'status']),
+        ]
     
     def __str__(self):
         return f"{self.member.user.username} - {self.program.title}"
@@ -245,3 +301,119 @@ class OTPVerification(models.Model):
         return not self.is_expired() and not self.is_verified
 
 
+# ========================
+# ARCHIVE MODELS
+# ========================
+# Rows moved out of the hot tables by the retention policy (see main/retention_utils.py).
+# They keep their original primary key.
+
+class ArchivedContactMessage(models.Model):
+    """Read contact message older than CONTACT_MESSAGE_RETENTION_DAYS"""
+    name = models.CharField(max_length=100)
+    email = models.EmailField()
+    subject = models.CharField(max_length=200)
+    message = models.TextField()
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.name} - {self.subject}"
+    
+    class Meta:
+        ordering = ['-created_at']
+
+
+class ArchivedEventAttendance(models.Model):
+    """Attendance at an event held more than EVENT_ATTENDANCE_RETENTION_DAYS ago"""
+    member = models.ForeignKey(MemberProfile, on_delete=models.CASCADE, related_name='archived_event_attendances')
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='archived_attendances')
+    registered_at = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=EventAttendance.STATUS_CHOICES)
+    notes = models.TextField(blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-registered_at']
+        indexes = [
+            models.Index(fields=['member', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"{self.member.user.username} - {self.event.title}"
+
+
+# ========================
+# SCHEDULER MODELS
+# ========================
+
+class ScheduledJob(models.Model):
+    """Last run of each periodic maintenance job (see main/scheduler.py)"""
+    name = models.CharField(max_length=100, unique=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    last_duration = models.FloatField(default=0, help_text="Duration of the last run in seconds")
+    
+    STATUS_CHOICES = [
+        ('success', 'Success'),
+        ('failed', 'Failed'),
+    ]
+    last_status = models.CharField(max_length=20, choices=STATUS_CHOICES, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    class Meta:
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
+class GreetingDay(models.Model):
+    """A day whose birthday and anniversary greetings were sent (see main/greeting_utils.py)"""
+    date = models.DateField(unique=True)
+    # Greetings sent of each kind; None until that kind has gone out
+    birthdays_sent = models.PositiveIntegerField(null=True, blank=True)
+    anniversaries_sent = models.PositiveIntegerField(null=True, blank=True)
+    sent_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-date']
+    
+    def __str__(self):
+        return str(self.date)
+
+
+# ========================
+# BROADCAST MODELS
+# ========================
+
+class QueuedBroadcast(models.Model):
+    """
+    Broadcast email composed in the admin, sent in the background by the
+    scheduler's send_broadcasts job (see main/broadcast_utils.py)
+    """
+    subject = models.CharField(max_length=200)
+    message = models.TextField()
+    recipient_ids = models.JSONField(default=list, help_text="IDs of the users selected when it was queued")
+    recipient_count = models.PositiveIntegerField(default=0)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    recipients_done = models.PositiveIntegerField(default=0, help_text="Recipients processed so far")
+    sent_count = models.PositiveIntegerField(default=0)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return self.subject
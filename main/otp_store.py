@@ -0,0 +1,153 @@
+"""
+Pluggable storage for pending OTP codes
+
+The store is chosen with settings.OTP_STORE:
+- CacheOTPStore keeps OTPs in the cache with a TTL, so sending and verifying
+  a code never writes to the primary database. It needs a cache shared by
+  all workers (e.g. Redis).
+- DatabaseOTPStore keeps them in the OTPVerification table (the original behaviour).
+
+With settings.OTP_AUDIT_TRAIL enabled, the cache store also records each sent
+OTP in OTPVerification as an audit trail.
+"""
+import hashlib
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import OTPVerification
+
+
+class BaseOTPStore:
+    """
+    Interface for OTP stores.
+    Records are dicts with: otp, created_at, expires_at, attempts, is_verified.
+    """
+
+    def create(self, email, otp, expires_at):
+        """Store a new OTP for `email`, replacing any pending one"""
+        raise NotImplementedError
+
+    def get(self, email):
+        """Return the latest OTP record for `email`, or None"""
+        raise NotImplementedError
+
+    def increment_attempts(self, email):
+        """Atomically increment and return the attempt counter"""
+        raise NotImplementedError
+
+    def mark_verified(self, email):
+        """Mark the latest OTP for `email` as used"""
+        raise NotImplementedError
+
+
+class CacheOTPStore(BaseOTPStore):
+    """OTP store backed by the Django cache; entries expire on their own"""
+
+    # Keep records a little past their expiry so users see "expired" rather than "not found"
+    GRACE_SECONDS = 600
+
+    def _key(self, email):
+        digest = hashlib.sha256(email.strip().lower().encode('utf-8')).hexdigest()
+        return f"otp:{digest}"
+
+    def _timeout(self, expires_at):
+        return max(1, int((expires_at - timezone.now()).total_seconds()) + self.GRACE_SECONDS)
+
+    def create(self, email, otp, expires_at):
+        key = self._key(email)
+        timeout = self._timeout(expires_at)
+        cache.set_many({
+            key: {
+                'otp': otp,
+                'created_at': timezone.now(),
+                'expires_at': expires_at,
+                'is_verified': False,
+            },
+            f"{key}:attempts": 0,
+        }, timeout=timeout)
+
+        if settings.OTP_AUDIT_TRAIL:
+            OTPVerification.objects.create(email=email, otp=otp, expires_at=expires_at)
+
+    def get(self, email):
+        key = self._key(email)
+        values = cache.get_many([key, f"{key}:attempts"])
+        record = values.get(key)
+        if record is None:
+            return None
+        return dict(record, attempts=values.get(f"{key}:attempts", 0))
+
+    def increment_attempts(self, email):
+        key = f"{self._key(email)}:attempts"
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # Counter evicted or expired; the record check will catch expiry
+            cache.set(key, 1, timeout=self.GRACE_SECONDS)
+            return 1
+
+    def mark_verified(self, email):
+        key = self._key(email)
+        record = cache.get(key)
+        if record is None:
+            return
+        record['is_verified'] = True
+        cache.set(key, record, timeout=self._timeout(record['expires_at']))
+
+        if settings.OTP_AUDIT_TRAIL:
+            OTPVerification.objects.filter(
+                email=email, otp=record['otp'], is_verified=False
+            ).update(is_verified=True)
+
+
+class DatabaseOTPStore(BaseOTPStore):
+    """OTP store backed by the OTPVerification table"""
+
+    def _latest(self, email):
+        return OTPVerification.objects.filter(email=email).order_by('-created_at').first()
+
+    def create(self, email, otp, expires_at):
+        # Delete any existing unverified OTPs for this email
+        OTPVerification.objects.filter(email=email, is_verified=False).delete()
+        OTPVerification.objects.create(email=email, otp=otp, expires_at=expires_at)
+
+    def get(self, email):
+        otp_obj = self._latest(email)
+        if otp_obj is None:
+            return None
+        return {
+            'otp': otp_obj.otp,
+            'created_at': otp_obj.created_at,
+            'expires_at': otp_obj.expires_at,
+            'attempts': otp_obj.attempts,
+            'is_verified': otp_obj.is_verified,
+        }
+
+    def increment_attempts(self, email):
+        otp_obj = self._latest(email)
+        OTPVerification.objects.filter(pk=otp_obj.pk).update(attempts=F('attempts') + 1)
+        otp_obj.refresh_from_db(fields=['attempts'])
+        return otp_obj.attempts
+
+    def mark_verified(self, email):
+        otp_obj = self._latest(email)
+        if otp_obj is not None:
+            OTPVerification.objects.filter(pk=otp_obj.pk).update(is_verified=True)
+
+
+_stores = {}
+
+
+def get_otp_store():
+    """Return the configured OTP store instance"""
+    if settings.OTP_STORE not in _stores:
+        _stores[settings.OTP_STORE] = import_string(settings.OTP_STORE)()
+    return _stores[settings.OTP_STORE]
+
+
+def otp_expiry(minutes=None):
+    """Expiry time for a freshly generated OTP"""
+    return timezone.now() + timedelta(minutes=minutes or settings.OTP_EXPIRY_MINUTES)
@@ -3,12 +3,12 @@ OTP utilities for email verification
 """
 import random
 import string
-from datetime import timedelta
 from django.utils import timezone
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
-from .models import OTPVerification
+from .otp_store import get_otp_store, otp_expiry
+from .retention_utils import apply_retention
 
 
 def generate_otp(length=6):
@@ -18,32 +18,28 @@ def generate_otp(length=6):
 
 def send_otp_email(email):
     """
-    Generate OTP, save to database, and send via email.
-    Returns the OTP object and True if successful, or (None, False) if failed.
+    Generate OTP, save it to the OTP store, and send via email.
+    Returns the OTP record and True if successful, or (None, False) if failed.
     """
     try:
-        # Delete any existing unverified OTPs for this email
-        OTPVerification.objects.filter(email=email, is_verified=False).delete()
+        store = get_otp_store()
         
         # Generate OTP
         otp_code = generate_otp()
         
-        # Set expiration time (10 minutes from now)
-        expires_at = timezone.now() + timedelta(minutes=10)
+        # Set expiration time
+        expires_in_minutes = settings.OTP_EXPIRY_MINUTES
+        expires_at = otp_expiry(expires_in_minutes)
         
-        # Save OTP to database
-        otp_obj = OTPVerification.objects.create(
-            email=email,
-            otp=otp_code,
-            expires_at=expires_at
-        )
+        # Save OTP, replacing any pending one for this email
+        store.create(email, otp_code, expires_at)
         
         # Prepare email content
         subject = "Shanti Yuwa Club - Email Verification OTP"
         context = {
             'email': email,
             'otp': otp_code,
-            'expires_in_minutes': 10,
+            'expires_in_minutes': expires_in_minutes,
             'site_name': 'Shanti Yuwa Club'
         }
         
@@ -58,7 +54,7 @@ Hello,
 
 Your OTP for email verification is: {otp_code}
 
-This OTP will expire in 10 minutes.
+This OTP will expire in {expires_in_minutes} minutes.
 
 If you didn't request this, please ignore this email.
 
@@ -76,7 +72,7 @@ Shanti Yuwa Club Team
             fail_silently=False,
         )
         
-        return otp_obj, True
+        return store.get(email), True
         
     except Exception as e:
         print(f"Error sending OTP email: {str(e)}")
@@ -88,40 +84,38 @@ def verify_otp(email, otp_code):
     Verify the OTP code for a given email.
     Returns (True, message) if successful, or (False, error_message) if failed.
     """
-    try:
-        # Get the latest OTP for this email
-        otp_obj = OTPVerification.objects.filter(email=email).latest('created_at')
-    except OTPVerification.DoesNotExist:
+    store = get_otp_store()
+    
+    # Get the latest OTP for this email
+    record = store.get(email)
+    if record is None:
         return False, "No OTP found for this email. Please request a new one."
     
     # Check if OTP is expired
-    if otp_obj.is_expired():
+    if timezone.now() > record['expires_at']:
         return False, "OTP has expired. Please request a new one."
     
     # Check if OTP is already verified
-    if otp_obj.is_verified:
+    if record['is_verified']:
         return False, "This OTP has already been used."
     
-    # Increment attempts
-    otp_obj.attempts += 1
-    otp_obj.save()
+    # Increment attempts (atomic, so parallel guesses can't share an attempt)
+    attempts = store.increment_attempts(email)
     
     # Check if too many attempts
-    if otp_obj.attempts > 5:
+    if attempts > 5:
         return False, "Too many failed attempts. Please request a new OTP."
     
     # Check OTP code
-    if otp_obj.otp != str(otp_code).strip():
-        return False, f"Invalid OTP. Attempts remaining: {5 - otp_obj.attempts}"
+    if record['otp'] != str(otp_code).strip():
+        return False, f"Invalid OTP. Attempts remaining: {5 - attempts}"
     
     # Mark as verified
-    otp_obj.is_verified = True
-    otp_obj.save()
+    store.mark_verified(email)
     
     return True, "Email verified successfully!"
 
 
 def cleanup_expired_otps():
-    """Delete expired OTPs older than 1 hour"""
-    expiration_time = timezone.now() - timedelta(hours=1)
-    OTPVerification.objects.filter(expires_at__lt=expiration_time).delete()
+    """Delete OTPs expired more than OTP_RETENTION_HOURS ago (the retention policy, also run daily)"""
+    return apply_retention(['otps'])['otps']
@@ -6,10 +6,14 @@ from django.contrib import messages
 from django.views.decorators.http import require_http_methods
 from django.http import JsonResponse
 from .otp_utils import send_otp_email, verify_otp
-from .models import OTPVerification
+from .throttling import throttle
+
+OTP_WAIT_MESSAGE = 'Please wait before requesting a new OTP'
 
 
 @require_http_methods(["GET", "POST"])
+@throttle('otp_ip', key='ip', message=OTP_WAIT_MESSAGE)
+@throttle('otp_email', key='post:email', message=OTP_WAIT_MESSAGE)
 def send_otp_view(request):
     """
     Send OTP to the provided email address
@@ -23,7 +27,7 @@ def send_otp_view(request):
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return JsonResponse({'success': False, 'error': 'Email is required'})
             messages.error(request, 'Email is required')
-            return redirect(request.META.get('HTTP_REFERER', 'register'))
+            return redirect(request.META.get('HTTP_REFERER', 'member_register'))
         
         # Send OTP
         otp_obj, success = send_otp_email(email)
@@ -44,7 +48,7 @@ def send_otp_view(request):
                     'error': 'Failed to send OTP. Please try again later.'
                 })
             messages.error(request, 'Failed to send OTP. Please try again later.')
-            return redirect(request.META.get('HTTP_REFERER', 'register'))
+            return redirect(request.META.get('HTTP_REFERER', 'member_register'))
     
     return render(request, 'members/send_otp.html')
 
@@ -83,7 +87,7 @@ def verify_otp_view(request):
             
             messages.success(request, message)
             # Redirect to registration form with verified email
-            return redirect('register')
+            return redirect('member_register')
         else:
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return JsonResponse({
@@ -97,6 +101,8 @@ def verify_otp_view(request):
 
 
 @require_http_methods(["POST"])
+@throttle('otp_ip', key='ip', message=OTP_WAIT_MESSAGE, json_only=True)
+@throttle('otp_email', key='post:email', message=OTP_WAIT_MESSAGE, json_only=True)
 def resend_otp_view(request):
     """
     Resend OTP to the provided email
@@ -107,20 +113,7 @@ def resend_otp_view(request):
     if not email:
         return JsonResponse({'success': False, 'error': 'Email is required'})
     
-    # Check if there's a recent OTP
-    try:
-        otp_obj = OTPVerification.objects.filter(email=email).latest('created_at')
-        # Allow resend only if more than 1 minute has passed since last OTP
-        from django.utils import timezone
-        from datetime import timedelta
-        if (timezone.now() - otp_obj.created_at).total_seconds() < 60:
-            return JsonResponse({
-                'success': False,
-                'error': 'Please wait before requesting a new OTP'
-            })
-    except OTPVerification.DoesNotExist:
-        pass
-    
+    # The one-minute resend cooldown is enforced by the 'otp_email' throttle
     # Send new OTP
     otp_obj, success = send_otp_email(email)
     
@@ -0,0 +1,105 @@
+"""
+Retention policies for the append-heavy tables
+
+- Read contact messages older than CONTACT_MESSAGE_RETENTION_DAYS move to
+  ArchivedContactMessage.
+- Attendance at events held more than EVENT_ATTENDANCE_RETENTION_DAYS ago
+  moves to ArchivedEventAttendance.
+- OTPs expired more than OTP_RETENTION_HOURS ago are deleted.
+
+Rows are moved in chunks of RETENTION_BATCH_SIZE, each in its own
+transaction, so a large backlog never holds long locks and an interrupted
+run simply continues next time. A retention of 0 keeps the rows forever.
+Run by the `apply_retention` command and the daily scheduler job.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import (
+    ArchivedContactMessage, ArchivedEventAttendance, ContactMessage, EventAttendance, OTPVerification,
+)
+
+
+def move_in_batches(queryset, archive_model, fields, batch_size):
+    """
+    Copy the rows of `queryset` into `archive_model` (same primary key and
+    `fields`) and delete them, `batch_size` at a time. Returns the count.
+    """
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(queryset.order_by('pk').values('pk', *fields)[:batch_size])
+            if not rows:
+                return moved
+            # ignore_conflicts: rows copied by a run that failed before its delete committed
+            archive_model.objects.bulk_create(
+                [archive_model(**row) for row in rows], ignore_conflicts=True,
+            )
+            queryset.model.objects.filter(pk__in=[row['pk'] for row in rows]).delete()
+        moved += len(rows)
+
+
+def delete_in_batches(queryset, batch_size):
+    """Delete the rows of `queryset`, `batch_size` at a time. Returns the count."""
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        queryset.model.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
+
+
+def expired_contact_messages(now):
+    if not settings.CONTACT_MESSAGE_RETENTION_DAYS:
+        return ContactMessage.objects.none()
+    return ContactMessage.objects.filter(
+        is_read=True, created_at__lt=now - timedelta(days=settings.CONTACT_MESSAGE_RETENTION_DAYS),
+    )
+
+
+def expired_event_attendances(now):
+    if not settings.EVENT_ATTENDANCE_RETENTION_DAYS:
+        return EventAttendance.objects.none()
+    return EventAttendance.objects.filter(
+        event__date__lt=now - timedelta(days=settings.EVENT_ATTENDANCE_RETENTION_DAYS),
+    )
+
+
+def expired_otps(now):
+    return OTPVerification.objects.filter(expires_at__lt=now - timedelta(hours=settings.OTP_RETENTION_HOURS))
+
+
+# name -> (description, queryset function, archive model and fields, or None to delete)
+POLICIES = {
+    'contact_messages': (
+        'read contact messages', expired_contact_messages,
+        (ArchivedContactMessage, ['name', 'email', 'subject', 'message', 'created_at']),
+    ),
+    'event_attendance': (
+        'past event attendances', expired_event_attendances,
+        (ArchivedEventAttendance, ['member_id', 'event_id', 'registered_at', 'status', 'notes']),
+    ),
+    'otps': ('expired OTPs', expired_otps, None),
+}
+
+
+def apply_retention(policies=None, batch_size=None, dry_run=False, now=None):
+    """
+    Apply the named retention policies (default: all). Returns
+    {name: number of rows archived or deleted, or that would be with dry_run}.
+    """
+    batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+    now = now or timezone.now()
+    counts = {}
+    for name in policies or POLICIES:
+        description, expired, archive = POLICIES[name]
+        queryset = expired(now)
+        if dry_run:
+            counts[name] = queryset.count()
+        elif archive is None:
+            counts[name] = delete_in_batches(queryset, batch_size)
+        else:
+            counts[name] = move_in_batches(queryset, *archive, batch_size)
+    return counts
@@ -0,0 +1,149 @@
+"""
+Lightweight periodic job scheduler
+
+Jobs are registered with the @job decorator (see main/jobs.py) and run either
+by the `run_scheduler` management command or by an embedded worker thread
+(settings.SCHEDULER_EMBEDDED). A file lock makes sure only one process on the
+host (one gunicorn worker, or the command) runs jobs at a time. Each job's
+last run time, duration and result are stored in ScheduledJob.
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+import traceback
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, assume a single process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# name -> {'func': callable, 'interval': timedelta}
+registry = {}
+
+
+def job(interval, name=None):
+    """Register a function as a periodic job running every `interval` (a timedelta)"""
+    def decorator(func):
+        registry[name or func.__name__] = {'func': func, 'interval': interval}
+        return func
+    return decorator
+
+
+def load_jobs():
+    """Import the modules that register jobs"""
+    from . import jobs  # noqa: F401
+
+
+class LeaderLock:
+    """Non-blocking, process-wide file lock held by the process that runs jobs"""
+
+    def __init__(self, path=None):
+        self.path = path or settings.SCHEDULER_LOCK_FILE or os.path.join(
+            tempfile.gettempdir(), 'shanti_yuwa_club_scheduler.lock'
+        )
+        self._file = None
+
+    def acquire(self):
+        if self._file is not None:
+            return True
+        lock_file = open(self.path, 'a')
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+
+def run_job(name):
+    """Run a single registered job now and record the result"""
+    from .models import ScheduledJob
+
+    entry = registry[name]
+    started_at = timezone.now()
+    start = time.monotonic()
+    status, error = 'success', ''
+    try:
+        entry['func']()
+    except Exception:
+        status, error = 'failed', traceback.format_exc()
+        logger.exception("Scheduled job %s failed", name)
+    duration = time.monotonic() - start
+
+    ScheduledJob.objects.update_or_create(name=name, defaults={
+        'last_run_at': started_at,
+        'last_duration': duration,
+        'last_status': status,
+        'last_error': error,
+    })
+    logger.info("Scheduled job %s finished (%s) in %.2fs", name, status, duration)
+    return status
+
+
+def run_pending(now=None):
+    """Run every job whose interval has elapsed since its last run"""
+    from .models import ScheduledJob
+
+    load_jobs()
+    now = now or timezone.now()
+    last_runs = dict(ScheduledJob.objects.values_list('name', 'last_run_at'))
+    ran = []
+    for name, entry in registry.items():
+        last_run_at = last_runs.get(name)
+        if last_run_at is None or now >= next_run_at(name, last_run_at):
+            run_job(name)
+            ran.append(name)
+    return ran
+
+
+def run_forever(tick=None, stop_event=None):
+    """Scheduler loop: run due jobs every `tick` seconds while holding the leader lock"""
+    tick = tick or settings.SCHEDULER_TICK_SECONDS
+    stop_event = stop_event or threading.Event()
+    lock = LeaderLock()
+    while not stop_event.is_set():
+        if lock.acquire():
+            try:
+                run_pending()
+            except Exception:
+                logger.exception("Scheduler tick failed")
+            finally:
+                close_old_connections()
+        stop_event.wait(tick)
+    lock.release()
+
+
+_thread = None
+
+
+def start_embedded_scheduler():
+    """Start the scheduler in a daemon thread (once per process)"""
+    global _thread
+    if _thread is None or not _thread.is_alive():
+        _thread = threading.Thread(target=run_forever, name='scheduler', daemon=True)
+        _thread.start()
+    return _thread
+
+
+def next_run_at(name, last_run_at):
+    """When a job is next due, given its last run time (None: never run, due now)"""
+    if last_run_at is None:
+        return None
+    return last_run_at + registry[name]['interval']
@@ -0,0 +1,267 @@
+"""
+Synthetic club data for benchmarks and scale tests
+
+Rows are built in memory and written with bulk_create() in large batches,
+one transaction per batch of members, so memory stays flat however many
+rows are generated. bulk_create() never sends post_save, so the
+create_member_profile signal doesn't fire: profiles are bulk created next
+to their users instead of one INSERT per user. auto_now/auto_now_add are
+switched off (backup_utils.auto_timestamps_disabled) so join, registration
+and message dates can be spread over the past years.
+
+The same seed, member count and starting data give the same rows.
+"""
+import random
+from datetime import datetime, time as dt_time, timedelta
+from functools import reduce
+from operator import or_
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+from .backup_utils import auto_timestamps_disabled
+from .models import (
+    ContactMessage, Event, EventAttendance, GalleryCategory, GalleryImage, MemberProfile, OTPVerification, Program,
+    ProgramParticipation, TeamMember,
+)
+
+SEED_PASSWORD = UNUSABLE_PASSWORD_PREFIX + 'seeded'  # nobody can log in as a generated member
+SEEDED_MODELS = [User, MemberProfile, Program, Event, EventAttendance, ProgramParticipation, GalleryCategory,
+                 GalleryImage, TeamMember, ContactMessage, OTPVerification]
+HISTORY_DAYS = 5 * 365
+
+GALLERY_CATEGORIES = ['Events', 'Programs', 'Community Service', 'Sports', 'Culture', 'Meetings']
+PROGRAM_TITLES = ['Blood Donation Camp', 'Tree Plantation', 'Youth Leadership Training', 'Health Awareness',
+                  'Clean-up Campaign', 'Football Tournament', 'Computer Literacy Class', 'Disaster Relief',
+                  'Cultural Festival', 'Scholarship Program', 'Free Health Camp', 'Career Counselling']
+EVENT_TITLES = ['Monthly Meeting', 'Blood Donation Drive', 'Sports Day', 'Annual General Meeting', 'Workshop',
+                'Community Clean-up', 'Fundraising Dinner', 'Tihar Celebration', 'Training Session']
+LOCATIONS = ['Club Hall', 'Community Ground', 'Ward Office', 'Public School Hall', 'Tundikhel']
+FIRST_NAMES = ['Aarav', 'Sita', 'Ram', 'Gita', 'Hari', 'Anita', 'Bikash', 'Sunita', 'Rajesh', 'Puja',
+               'Nabin', 'Kabita', 'Suman', 'Asmita', 'Dipak', 'Rita', 'Binod', 'Sarita', 'Kiran', 'Manisha']
+LAST_NAMES = ['Shrestha', 'Sharma', 'Thapa', 'Gurung', 'Tamang', 'Rai', 'Magar', 'Karki', 'Adhikari',
+              'Singh', 'Poudel', 'Bhandari', 'Khadka', 'Lama', 'Basnet']
+ADDRESSES = ['Kathmandu', 'Lalitpur', 'Bhaktapur', 'Kirtipur', 'Pokhara', 'Butwal', 'Biratnagar', 'Dharan']
+
+# Approximate population frequencies
+BLOOD_GROUP_WEIGHTS = {'O+': 35, 'A+': 28, 'B+': 27, 'AB+': 7, 'O-': 1, 'A-': 1, 'B-': 0.7, 'AB-': 0.3}
+MEMBERSHIP_WEIGHTS = {'regular': 70, 'active': 25, 'executive': 5}
+ROLE_WEIGHTS = {'participant': 80, 'volunteer': 15, 'coordinator': 4, 'lead': 1}
+PARTICIPATION_STATUS_WEIGHTS = {'active': 50, 'completed': 40, 'dropped': 10}
+
+
+def allocate_slugs(titles, using=DEFAULT_DB_ALIAS):
+    """
+    Unique Program slugs for `titles` with one query, numbering repeats the
+    way Program.save() does ('title', 'title-1', 'title-2', ...) without its
+    query per attempt.
+    """
+    bases = [slugify(title) or 'program' for title in titles]
+    prefixes = reduce(or_, [Q(slug__startswith=base) for base in set(bases)], Q(pk__in=[]))
+    taken = set(Program.objects.using(using).filter(prefixes).values_list('slug', flat=True))
+    slugs = []
+    counters = {}
+    for base in bases:
+        slug = base
+        counter = counters.get(base, 0)
+        while slug in taken:
+            counter += 1
+            slug = f'{base}-{counter}'
+        counters[base] = counter
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def free_usernames(using=DEFAULT_DB_ALIAS, prefix='member'):
+    """
+    'member1', 'member2', ... skipping names already taken, with one query,
+    so seeding again or next to real accounts never repeats a username.
+    """
+    taken = set(User.objects.using(using).filter(username__startswith=prefix).values_list('username', flat=True))
+    n = 0
+    while True:
+        n += 1
+        if f'{prefix}{n}' not in taken:
+            yield f'{prefix}{n}'
+
+
+class Generator:
+    """Random values with realistic distributions, from one seeded Random"""
+
+    def __init__(self, seed, now):
+        self.rng = random.Random(seed)
+        self.now = now
+
+    def weighted(self, weights):
+        return self.rng.choices(list(weights), weights=list(weights.values()))[0]
+
+    def past(self, max_days=HISTORY_DAYS, recent_bias=1.0):
+        """A moment in the last `max_days`; recent_bias > 1 favours recent dates (a growing club)"""
+        return self.now - timedelta(days=max_days * self.rng.random() ** recent_bias,
+                                    seconds=self.rng.randint(0, 86399))
+
+    def between(self, start, end):
+        return start + (end - start) * self.rng.random()
+
+    def birth_date(self):
+        # Members are mostly in their twenties
+        age = self.rng.triangular(15, 45, 22)
+        return (self.now - timedelta(days=age * 365.25)).date()
+
+    def activity(self, limit):
+        """How many events or programs a member took part in: most a few, some a lot"""
+        return min(limit, int(self.rng.paretovariate(1.3)) - 1)
+
+
+def seed(members, seed=0, batch_size=5000, using=DEFAULT_DB_ALIAS, progress=None):
+    """
+    Add `members` members with their event registrations, program
+    enrolments and OTP history, plus programs, events, gallery images and
+    messages in proportion. Returns {model name: rows added}.
+    """
+    gen = Generator(seed, timezone.now())
+    counts = dict.fromkeys([model.__name__ for model in SEEDED_MODELS], 0)
+
+    with auto_timestamps_disabled(SEEDED_MODELS):
+        with transaction.atomic(using=using):
+            categories, programs, events = _seed_content(gen, members, batch_size, using, counts)
+        usernames = free_usernames(using)
+        for start in range(0, members, batch_size):
+            names = [next(usernames) for _ in range(min(batch_size, members - start))]
+            with transaction.atomic(using=using):
+                _seed_members(gen, names, programs, events, batch_size, using, counts)
+            if progress:
+                progress(counts['User'])
+    return counts
+
+
+def _seed_content(gen, members, batch_size, using, counts):
+    """Programs, events, gallery, team and contact messages; returns (categories, programs, events)"""
+    rng = gen.rng
+
+    # The same categories on every run
+    categories = []
+    for name in GALLERY_CATEGORIES:
+        category, created = GalleryCategory.objects.using(using).get_or_create(name=name)
+        categories.append(category)
+        counts['GalleryCategory'] += created
+    titles = [rng.choice(PROGRAM_TITLES) for _ in range(max(12, members // 500))]
+    programs = []
+    for title, slug in zip(titles, allocate_slugs(titles, using)):
+        created = gen.past()
+        programs.append(Program(
+            title=title, slug=slug, short_description=f'{title} organised by the club',
+            content=f'<p>{title}: details, schedule and how to take part.</p>', image='programs/seed.jpg',
+            is_active=rng.random() < 0.85, created_at=created, updated_at=gen.between(created, gen.now),
+        ))
+    programs = Program.objects.using(using).bulk_create(programs, batch_size=batch_size)
+
+    events = []
+    for _ in range(max(20, members // 50)):
+        # Mostly past events, with the next six months already planned
+        start = gen.now + timedelta(days=rng.uniform(-2 * 365, 180))
+        start = timezone.make_aware(datetime.combine(start.date(), dt_time(rng.randint(8, 18))))
+        events.append(Event(
+            title=rng.choice(EVENT_TITLES), date=start, location=rng.choice(LOCATIONS),
+            description='<p>All members are welcome.</p>', image='events/seed.jpg',
+            is_active=rng.random() < 0.95, created_at=min(start, gen.now) - timedelta(days=rng.randint(7, 60)),
+        ))
+    events = Event.objects.using(using).bulk_create(events, batch_size=batch_size)
+
+    TeamMember.objects.using(using).bulk_create([
+        TeamMember(name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}', position=position,
+                   bio='Serving the club and the community.', image='team/seed.jpg', display_order=order)
+        for order, position in enumerate(['President', 'Vice President', 'Secretary', 'Treasurer',
+                                          'Coordinator', 'Coordinator', 'Member', 'Member'])
+    ])
+    gallery = GalleryImage.objects.using(using).bulk_create([
+        GalleryImage(title=f'{rng.choice(EVENT_TITLES)} photo', category_id=rng.choice(categories).pk,
+                     image='gallery/seed.jpg', created_at=gen.past(recent_bias=2))
+        for _ in range(max(24, members // 20))
+    ], batch_size=batch_size)
+    messages = ContactMessage.objects.using(using).bulk_create([
+        ContactMessage(name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                       email=f'visitor{n}@example.com', subject='Membership enquiry',
+                       message='Hello, I would like to know how to join the club.',
+                       created_at=created, is_read=created < gen.now - timedelta(days=7) or rng.random() < 0.3)
+        for n, created in enumerate(gen.past(recent_bias=2) for _ in range(members // 20))
+    ], batch_size=batch_size)
+
+    counts.update(Program=len(programs), Event=len(events), TeamMember=8,
+                  GalleryImage=len(gallery), ContactMessage=len(messages))
+    return categories, programs, events
+
+
+def _seed_members(gen, usernames, programs, events, batch_size, using, counts):
+    """Users named `usernames` with their profiles, registrations, enrolments and OTPs"""
+    rng = gen.rng
+    users = []
+    for username in usernames:
+        joined = gen.past(recent_bias=2)
+        # Most members have logged in at some point, many recently
+        last_login = gen.between(joined, gen.now) if rng.random() < 0.8 else None
+        users.append(User(
+            username=username, email=f'{username}@example.com',
+            first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+            password=SEED_PASSWORD, date_joined=joined, last_login=last_login,
+        ))
+    users = User.objects.using(using).bulk_create(users)
+
+    profiles = [
+        MemberProfile(
+            user_id=user.pk, phone=f'98{rng.randint(10000000, 99999999)}', address=rng.choice(ADDRESSES),
+            date_of_birth=gen.birth_date() if rng.random() < 0.7 else None,
+            blood_group=gen.weighted(BLOOD_GROUP_WEIGHTS) if rng.random() < 0.8 else '',
+            joined_date=user.date_joined.date(), is_verified=rng.random() < 0.6,
+            membership_type=gen.weighted(MEMBERSHIP_WEIGHTS),
+        )
+        for user in users
+    ]
+    for profile in profiles:
+        profile.set_date_keys()
+    profiles = MemberProfile.objects.using(using).bulk_create(profiles)
+
+    attendances = []
+    participations = []
+    otps = []
+    for user, profile in zip(users, profiles):
+        # Only events after the member joined
+        for event in rng.sample(events, gen.activity(len(events))):
+            if event.date < user.date_joined:
+                continue
+            registered = max(user.date_joined, event.date - timedelta(days=rng.uniform(1, 30)))
+            if event.date > gen.now:
+                status = 'cancelled' if rng.random() < 0.1 else 'registered'
+            else:
+                status = 'attended' if rng.random() < 0.75 else 'absent'
+            attendances.append(EventAttendance(member_id=profile.pk, event_id=event.pk, status=status,
+                                               registered_at=min(registered, gen.now)))
+        for program in rng.sample(programs, gen.activity(min(len(programs), 5))):
+            participations.append(ProgramParticipation(
+                member_id=profile.pk, program_id=program.pk, role=gen.weighted(ROLE_WEIGHTS),
+                status=gen.weighted(PARTICIPATION_STATUS_WEIGHTS),
+                certificate_issued=rng.random() < 0.2, enrolled_at=gen.between(user.date_joined, gen.now),
+            ))
+        # The verified sign-up code, sometimes after an expired or mistyped one
+        codes = 2 if rng.random() < 0.25 else 1
+        for code in range(codes):
+            created = user.date_joined - timedelta(minutes=rng.uniform(1, 10) * (codes - code))
+            verified = code == codes - 1
+            otps.append(OTPVerification(
+                email=user.email, otp=f'{rng.randint(0, 999999):06d}', created_at=created,
+                expires_at=created + timedelta(minutes=10), is_verified=verified,
+                attempts=rng.choice([0, 0, 0, 1]) if verified else rng.randint(0, 5),
+            ))
+
+    EventAttendance.objects.using(using).bulk_create(attendances, batch_size=batch_size)
+    ProgramParticipation.objects.using(using).bulk_create(participations, batch_size=batch_size)
+    OTPVerification.objects.using(using).bulk_create(otps, batch_size=batch_size)
+
+    counts['User'] += len(users)
+    counts['MemberProfile'] += len(profiles)
+    counts['EventAttendance'] += len(attendances)
+    counts['ProgramParticipation'] += len(participations)
+    counts['OTPVerification'] += len(otps)
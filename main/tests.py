@@ -1,3 +1,1109 @@
-from django.test import TestCase
+import os
+import re
+import tempfile
+import threading
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.template import engines
+from django.template.loader import render_to_string
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from . import contact_buffer, scheduler
+from .admin_dashboard import DashboardStats
+from .backup_utils import list_backups, load_manifest, verify_backup
+from .benchmark_utils import logged_in_client
+from .broadcast_utils import get_broadcast_recipients, queue_broadcast, send_broadcast, send_queued_broadcasts
+from .media_backup_utils import list_manifests
+from .models import (
+    ArchivedContactMessage, ArchivedEventAttendance, ContactMessage, Event, EventAttendance, GalleryCategory,
+    GalleryImage, GreetingDay, MemberProfile, OTPVerification, Program, ProgramParticipation, QueuedBroadcast,
+    ScheduledJob, TeamMember,
+)
+from .forms import ContactForm
+from .db_copy_utils import copy_database, load_state, verify_copy
+from .donor_utils import compatible_donor_groups, find_donors
+from .greeting_utils import celebrating, send_due_greetings, send_greetings
+from .otp_store import get_otp_store, otp_expiry
+from .otp_utils import verify_otp
+from .retention_utils import apply_retention
+from .seed_utils import seed
+from shanti_yuwa_club import metrics
+from shanti_yuwa_club.db_routers import PrimaryReplicaRouter, has_written, reset_pinning
+from shanti_yuwa_club.middleware import AdminSessionMiddleware, ReplicaPinningMiddleware
+from .throttling import get_client_ip, is_rate_limited, parse_rate
 
-# Create your tests here.
+
+# ========================
+# START-UP
+# ========================
+
+class StartupTests(SimpleTestCase):
+
+    def test_no_template_loads_crispy_forms(self):
+        # crispy_forms isn't installed; a template loading its tags would fail to compile
+        project_dirs = [path for path in engines['django'].template_dirs if str(path).startswith(str(settings.BASE_DIR))]
+        self.assertTrue(project_dirs)
+        for template_dir in project_dirs:
+            for root, dirs, files in os.walk(template_dir):
+                for name in files:
+                    with open(os.path.join(root, name), encoding='utf-8') as f:
+                        self.assertNotIn('crispy', f.read(), os.path.join(root, name))
+
+
+# ========================
+# QUERY BUDGETS
+# ========================
+
+class QueryBudgetMixin:
+    """
+    assertMaxQueries() fails when a block runs more queries than its budget
+    and lists every query, so an N+1 shows up in the test output.
+    """
+
+    def assertMaxQueries(self, budget, func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as captured:
+            result = func(*args, **kwargs)
+        executed = len(captured.captured_queries)
+        if executed > budget:
+            queries = '\n'.join(
+                f"{number}. {query['sql']}" for number, query in enumerate(captured.captured_queries, 1)
+            )
+            self.fail(f"{executed} queries run, budget is {budget}:\n{queries}")
+        return result
+
+
+def build_club(size):
+    """
+    A club where everything a page can list grows with `size`: gallery
+    categories and images, programs, upcoming and past events, team members,
+    and the registrations and enrolments of the returned member.
+    """
+    now = timezone.now()
+    categories = GalleryCategory.objects.bulk_create(
+        [GalleryCategory(name=f'Category {n}') for n in range(size)]
+    )
+    GalleryImage.objects.bulk_create([
+        GalleryImage(title=f'Photo {n}', category=category, image='gallery/photo.jpg')
+        for category in categories for n in range(3)
+    ])
+    programs = Program.objects.bulk_create([
+        Program(title=f'Program {n}', slug=f'program-{n}', short_description='Short description',
+                content='<p>Content</p>', image='programs/program.jpg')
+        for n in range(size + 3)
+    ])
+    events = Event.objects.bulk_create([
+        Event(title=f'Event {n}', date=now + timedelta(days=n - size), location='Club Hall',
+              description='<p>Description</p>', image='events/event.jpg')
+        for n in range(2 * size + 1)
+    ])
+    TeamMember.objects.bulk_create([
+        TeamMember(name=f'Team Member {n}', position='Coordinator', bio='Bio', image='team/member.jpg')
+        for n in range(size)
+    ])
+
+    user = User.objects.create_user('member', 'member@example.com', 'password', first_name='Sita')
+    profile = user.member_profile
+    others = [
+        User.objects.create_user(f'other{n}', f'other{n}@example.com', 'password').member_profile
+        for n in range(size)
+    ]
+    for member in [profile] + others:
+        EventAttendance.objects.bulk_create([
+            EventAttendance(member=member, event=event, status='attended' if event.date < now else 'registered')
+            for event in events
+        ])
+        ProgramParticipation.objects.bulk_create([
+            ProgramParticipation(member=member, program=program) for program in programs[:size]
+        ])
+    return user
+
+
+class ViewQueryBudgets(QueryBudgetMixin):
+    """
+    The most queries each view in main/views.py and main/otp_views.py may
+    run. Subclasses run the same budgets against a small and a large club,
+    so a query count that grows with the data fails one of them.
+    """
+    SIZE = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = build_club(cls.SIZE)
+        cls.program = Program.objects.filter(is_active=True).order_by('pk').first()
+        cls.event = Event.objects.filter(date__gte=timezone.now()).order_by('date').first()
+
+    def setUp(self):
+        # Cached pages and throttle counters would hide queries or reject requests
+        cache.clear()
+
+    def get(self, budget, name, *args, **kwargs):
+        response = self.assertMaxQueries(budget, self.client.get, reverse(name, args=args), **kwargs)
+        self.assertLess(response.status_code, 400)
+        return response
+
+    def post(self, budget, name, data, **kwargs):
+        # Forms are measured on the success path, which redirects
+        response = self.assertMaxQueries(budget, self.client.post, reverse(name), data, **kwargs)
+        self.assertEqual(response.status_code, 302)
+        return response
+
+    def login(self):
+        self.client.force_login(self.user)
+
+    # Public pages, anonymous
+
+    def test_public_pages_anonymous(self):
+        self.get(6, 'home')
+        self.get(1, 'about')
+        self.get(2, 'programs')
+        self.get(2, 'program_detail', self.program.slug)
+        self.get(3, 'gallery')
+        self.get(0, 'contact')
+
+    def test_public_pages_member(self):
+        self.login()
+        self.get(10, 'home')
+        self.get(3, 'about')
+        self.get(6, 'programs')
+        self.get(4, 'program_detail', self.program.slug)
+        self.get(5, 'gallery')
+        self.get(2, 'contact')
+
+    def test_contact_form(self):
+        self.post(1, 'contact', {'name': 'Ram', 'email': 'ram@example.com', 'subject': 'Hi', 'message': 'Hello'})
+
+    def test_contact_form_write_behind(self):
+        data = {'name': 'Ram', 'email': 'ram@example.com', 'subject': 'Hi', 'message': 'Hello'}
+        with tempfile.TemporaryDirectory() as tmp, self.settings(
+            CONTACT_WRITE_BEHIND=True, CONTACT_SPOOL_FILE=os.path.join(tmp, 'contact.jsonl'),
+        ):
+            self.post(0, 'contact', data)
+            self.post(0, 'contact', {**data, 'message': '  hello '})  # duplicate
+            self.post(0, 'contact', {**data, 'message': 'Hello again'})
+            self.assertFalse(ContactMessage.objects.exists())
+            flushed_at = timezone.now()
+            # One INSERT and one UPDATE of created_at, inside a savepoint
+            self.assertMaxQueries(4, contact_buffer.flush)
+            self.assertEqual(sorted(ContactMessage.objects.values_list('message', flat=True)),
+                             ['Hello', 'Hello again'])
+            # Messages keep the time they were submitted, not the time of the flush
+            self.assertFalse(ContactMessage.objects.filter(created_at__gte=flushed_at).exists())
+            self.assertEqual(contact_buffer.flush(), 0)
+            self.assertEqual(os.listdir(tmp), [])
+
+    # Member portal
+
+    def test_member_pages_anonymous(self):
+        self.get(0, 'member_register')
+        self.get(0, 'member_login')
+        for name in ['member_dashboard', 'member_profile', 'member_events', 'member_programs']:
+            self.get(0, name)
+
+    def test_member_pages(self):
+        self.login()
+        self.get(11, 'member_dashboard')
+        self.get(5, 'member_profile')
+        self.get(7, 'member_events')
+        self.get(7, 'member_programs')
+
+    def test_member_login_form(self):
+        self.post(9, 'member_login', {'username': 'member', 'password': 'password'})
+
+    def test_member_logout(self):
+        self.login()
+        self.get(4, 'member_logout')
+
+    def test_member_profile_form(self):
+        self.login()
+        self.post(6, 'member_profile', {'phone': '9800000000', 'address': 'Kathmandu', 'bio': 'Hello',
+                                        'first_name': 'Sita', 'last_name': 'Thapa', 'email': 'member@example.com'})
+
+    def test_event_registration(self):
+        self.login()
+        self.get(5, 'register_for_event', self.event.pk)
+        self.get(5, 'cancel_event_registration', self.event.pk)
+
+    def test_program_enrollment(self):
+        self.login()
+        self.get(5, 'enroll_in_program', self.program.pk)
+
+    # OTP verification
+
+    def test_otp_pages(self):
+        self.get(0, 'send-otp')
+        self.get(0, 'verify-otp')
+
+    def test_otp_flow(self):
+        self.post(3, 'send-otp', {'email': 'new@example.com'})
+        self.assertEqual(len(mail.outbox), 1)
+        otp = re.search(r'\b\d{6}\b', mail.outbox[0].body).group()
+        self.post(10, 'verify-otp', {'email': 'new@example.com', 'otp': otp})
+
+
+FAST_HASHER = override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+
+
+@FAST_HASHER
+class SmallClubQueryBudgetTests(ViewQueryBudgets, TestCase):
+    SIZE = 2
+
+
+@FAST_HASHER
+class LargeClubQueryBudgetTests(ViewQueryBudgets, TestCase):
+    SIZE = 25
+
+
+# ========================
+# RETENTION
+# ========================
+
+@FAST_HASHER
+@override_settings(CONTACT_MESSAGE_RETENTION_DAYS=30, EVENT_ATTENDANCE_RETENTION_DAYS=30, OTP_RETENTION_HOURS=1)
+class RetentionTests(TestCase):
+
+    def test_apply_retention(self):
+        now = timezone.now()
+        old, recent = now - timedelta(days=31), now - timedelta(days=29)
+        messages = ContactMessage.objects.bulk_create([
+            ContactMessage(name='Ram', email='ram@example.com', subject=subject, message='Hello', is_read=is_read)
+            for subject, is_read in [('old read', True), ('old unread', False), ('recent read', True)]
+        ])
+        ContactMessage.objects.filter(subject__startswith='old').update(created_at=old)
+        ContactMessage.objects.filter(subject__startswith='recent').update(created_at=recent)
+        past, last_month = Event.objects.bulk_create([
+            Event(title=f'Event {n}', date=date, location='Club Hall', description='Description', image='events/event.jpg')
+            for n, date in enumerate([old, recent])
+        ])
+        profile = User.objects.create_user('member', 'member@example.com', 'password').member_profile
+        EventAttendance.objects.bulk_create([
+            EventAttendance(member=profile, event=event, status='attended') for event in [past, last_month]
+        ])
+        OTPVerification.objects.bulk_create([
+            OTPVerification(email='ram@example.com', otp='123456', expires_at=expires_at)
+            for expires_at in [now - timedelta(hours=2), now]
+        ])
+
+        self.assertEqual(apply_retention(dry_run=True), {'contact_messages': 1, 'event_attendance': 1, 'otps': 1})
+        self.assertEqual(apply_retention(batch_size=1), {'contact_messages': 1, 'event_attendance': 1, 'otps': 1})
+
+        archived = ArchivedContactMessage.objects.get()
+        self.assertEqual((archived.pk, archived.subject, archived.created_at), (messages[0].pk, 'old read', old))
+        self.assertEqual(list(ContactMessage.objects.order_by('subject').values_list('subject', flat=True)),
+                         ['old unread', 'recent read'])
+        self.assertEqual(ArchivedEventAttendance.objects.get().event, past)
+        self.assertEqual(EventAttendance.objects.get().event, last_month)
+        self.assertEqual(OTPVerification.objects.count(), 1)
+        self.assertEqual(profile.total_events_attended, 2)
+        self.assertEqual(apply_retention(), {'contact_messages': 0, 'event_attendance': 0, 'otps': 0})
+
+        # Archived attendance still shows in the member's history and the dashboard
+        response = logged_in_client(profile.user).get(reverse('member_events'))
+        self.assertEqual([attendance.event for attendance in response.context['event_history']], [last_month, past])
+        EventAttendance.objects.all().delete()
+        self.assertEqual(DashboardStats.get_member_engagement()['active'], 1)
+
+
+# ========================
+# BLOOD DONOR LOOKUP
+# ========================
+
+@FAST_HASHER
+class DonorLookupTests(QueryBudgetMixin, TestCase):
+
+    def test_compatible_donor_groups(self):
+        self.assertEqual(compatible_donor_groups('O-'), ('O-',))
+        self.assertEqual(set(compatible_donor_groups('A+')), {'A+', 'A-', 'O+', 'O-'})
+        self.assertEqual(set(compatible_donor_groups('AB-')), {'AB-', 'A-', 'B-', 'O-'})
+        self.assertEqual(len(compatible_donor_groups('AB+')), 8)
+        self.assertEqual(compatible_donor_groups('B+')[0], 'B+')
+
+    def test_find_donors(self):
+        now = timezone.now()
+        members = {}
+        for username, group, verified, last_login in [
+            ('recent', 'O-', True, now), ('older', 'A+', True, now - timedelta(days=30)),
+            ('never', 'O+', True, None), ('unverified', 'O-', False, now), ('incompatible', 'B+', True, now),
+        ]:
+            user = User.objects.create_user(username, f'{username}@example.com', 'password', last_login=last_login)
+            MemberProfile.objects.filter(user=user).update(blood_group=group, is_verified=verified)
+            members[username] = user
+
+        donors = self.assertMaxQueries(1, list, find_donors('A+'))
+        self.assertEqual([profile.user.username for profile in donors], ['recent', 'older', 'never'])
+
+        staff = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        response = logged_in_client(staff).get(reverse('admin:member-donor-search'), {'blood_group': 'A+'})
+        self.assertContains(response, 'recent@example.com')
+        self.assertNotContains(response, 'incompatible@example.com')
+
+
+# ========================
+# BIRTHDAY AND ANNIVERSARY GREETINGS
+# ========================
+
+@FAST_HASHER
+@override_settings(BROADCAST_RATE_LIMIT=0)
+class GreetingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for username, born, joined in [
+            ('leapling', date(2000, 2, 29), date(2020, 3, 1)),
+            ('february', date(1999, 2, 28), date(2024, 2, 29)),
+            ('newyear', date(1998, 1, 2), date(2025, 12, 30)),
+            ('nobirthday', None, date(2026, 2, 28)),
+        ]:
+            profile = User.objects.create_user(username, f'{username}@example.com', 'password').member_profile
+            profile.date_of_birth = born
+            profile.save(update_fields=['date_of_birth'])
+            # joined_date is auto_now_add; set it the way a real join date would have been
+            profile.joined_date = joined
+            profile.save()
+
+    def test_keys_follow_saved_dates(self):
+        profile = MemberProfile.objects.get(user__username='leapling')
+        self.assertEqual((profile.birthday_key, profile.anniversary_key), (229, 301))
+        self.assertIsNone(MemberProfile.objects.get(user__username='nobirthday').birthday_key)
+
+    def usernames(self, kind, start, days=1):
+        return [profile.user.username for profile in celebrating(kind, start, days)]
+
+    def test_feb_29(self):
+        # Greeted on Feb 28 when there is no Feb 29, on Feb 29 otherwise
+        self.assertEqual(sorted(self.usernames('birthday', date(2027, 2, 28))), ['february', 'leapling'])
+        self.assertEqual(self.usernames('birthday', date(2028, 2, 28)), ['february'])
+        self.assertEqual(self.usernames('birthday', date(2028, 2, 29)), ['leapling'])
+        self.assertEqual(sorted(self.usernames('anniversary', date(2027, 2, 28))), ['february', 'nobirthday'])
+
+    def test_week_across_new_year(self):
+        profiles = celebrating('birthday', date(2026, 12, 28), days=7)
+        self.assertEqual([(p.user.username, p.celebrated_on) for p in profiles], [('newyear', date(2027, 1, 2))])
+        anniversaries = celebrating('anniversary', date(2026, 12, 28), days=7)
+        self.assertEqual([(p.user.username, p.years) for p in anniversaries], [('newyear', 1)])
+        # Members who joined this year have no anniversary yet
+        self.assertEqual(self.usernames('anniversary', date(2025, 12, 28), days=7), [])
+
+    def test_send_greetings(self):
+        self.assertEqual(send_greetings(date(2027, 2, 28)), {'birthday': 2, 'anniversary': 2})
+        self.assertEqual(sorted(message.subject for message in mail.outbox), [
+            '1 year with Shanti Yuwa Club', '3 years with Shanti Yuwa Club',
+            'Happy birthday, february!', 'Happy birthday, leapling!',
+        ])
+        self.assertIn('Today marks 3 years since you joined', next(
+            message.body for message in mail.outbox if message.to == ['february@example.com'] and 'years' in message.subject
+        ))
+        self.assertIsNone(send_greetings(date(2027, 2, 28)))
+
+    def test_failed_send_is_retried(self):
+        with mock.patch('main.greeting_utils.send_broadcast', side_effect=ConnectionRefusedError):
+            with self.assertRaises(ConnectionRefusedError):
+                send_greetings(date(2027, 2, 28))
+        self.assertEqual(send_greetings(date(2027, 2, 28)), {'birthday': 2, 'anniversary': 2})
+
+    def test_failed_anniversaries_do_not_resend_birthdays(self):
+        def fail_anniversaries(*args, context=None, **kwargs):
+            if context:
+                raise ConnectionRefusedError
+            return send_broadcast(*args, **kwargs)
+
+        with mock.patch('main.greeting_utils.send_broadcast', side_effect=fail_anniversaries):
+            with self.assertRaises(ConnectionRefusedError):
+                send_greetings(date(2027, 2, 28))
+        self.assertEqual(len(mail.outbox), 2)
+        record = GreetingDay.objects.get(date=date(2027, 2, 28))
+        self.assertEqual((record.birthdays_sent, record.anniversaries_sent), (2, None))
+        # The next hourly run sends only the anniversaries
+        self.assertEqual(send_due_greetings(date(2027, 2, 28)), {date(2027, 2, 28): {'birthday': 0, 'anniversary': 2}})
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(send_due_greetings(date(2027, 2, 28)), {})
+
+    def test_missed_days_are_caught_up(self):
+        # Nothing sent yet: only today
+        self.assertEqual(list(send_due_greetings(date(2027, 2, 26))), [date(2027, 2, 26)])
+        self.assertEqual(send_due_greetings(date(2027, 2, 26)), {})
+        # The scheduler was down on the 27th and 28th
+        sent = send_due_greetings(date(2027, 3, 1))
+        self.assertEqual(list(sent), [date(2027, 2, 27), date(2027, 2, 28), date(2027, 3, 1)])
+        self.assertEqual(sent[date(2027, 2, 28)], {'birthday': 2, 'anniversary': 2})
+        self.assertEqual(GreetingDay.objects.get(date=date(2027, 3, 1)).anniversaries_sent, 1)
+
+
+# ========================
+# THROTTLING
+# ========================
+
+@override_settings(THROTTLE_TRUST_X_FORWARDED_FOR=True, THROTTLE_PROXY_COUNT=1)
+class ThrottleTests(TestCase):
+
+    def setUp(self):
+        # Throttle windows live in the cache
+        cache.clear()
+
+    def test_sliding_window(self):
+        with mock.patch('main.throttling.time.time', return_value=1000.0) as clock:
+            self.assertFalse(is_rate_limited('test', 'client', '2/m'))
+            clock.return_value = 1030.0
+            self.assertFalse(is_rate_limited('test', 'client', '2/m'))
+            self.assertTrue(is_rate_limited('test', 'client', '2/m'))
+            self.assertFalse(is_rate_limited('test', 'other client', '2/m'))
+            # The first hit leaves the window a minute later; the rejected one was never recorded
+            clock.return_value = 1060.5
+            self.assertFalse(is_rate_limited('test', 'client', '2/m'))
+            self.assertTrue(is_rate_limited('test', 'client', '2/m'))
+
+    def test_client_ip_from_forwarded_for(self):
+        factory = RequestFactory()
+        request = factory.get('/', HTTP_X_FORWARDED_FOR='6.6.6.6, 203.0.113.7', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(get_client_ip(request), '203.0.113.7')
+        with override_settings(THROTTLE_PROXY_COUNT=2):
+            self.assertEqual(get_client_ip(request), '6.6.6.6')
+        # Fewer entries than proxies: the header was not written by them
+        with override_settings(THROTTLE_PROXY_COUNT=3):
+            self.assertEqual(get_client_ip(request), '10.0.0.1')
+        with override_settings(THROTTLE_TRUST_X_FORWARDED_FOR=False):
+            self.assertEqual(get_client_ip(request), '10.0.0.1')
+
+    def test_spoofed_forwarded_for_does_not_bypass_throttle(self):
+        limit, _ = parse_rate(settings.THROTTLE_RATES['contact_ip'])
+        for attempt in range(limit + 2):
+            self.client.post(reverse('contact'), {
+                'name': 'Spammer', 'email': 'spam@example.com',
+                'subject': f'Offer {attempt}', 'message': 'Buy now',
+            }, HTTP_X_FORWARDED_FOR=f'198.51.100.{attempt}, 203.0.113.7')
+        self.assertEqual(ContactMessage.objects.count(), limit)
+
+    def test_failed_contact_write_is_not_a_duplicate(self):
+        form = ContactForm({'name': 'Ram', 'email': 'ram@example.com', 'subject': 'Hi', 'message': 'Hello'})
+        self.assertTrue(form.is_valid())
+        with mock.patch.object(ContactForm, 'save', side_effect=OSError):
+            with self.assertRaises(OSError):
+                contact_buffer.submit(form)
+        self.assertTrue(contact_buffer.submit(form))
+        self.assertFalse(contact_buffer.submit(form))
+        self.assertEqual(ContactMessage.objects.count(), 1)
+
+
+# ========================
+# BROADCAST EMAILS
+# ========================
+
+@FAST_HASHER
+@override_settings(BROADCAST_RATE_LIMIT=0)
+class BroadcastTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user('obrien', 'obrien@example.com', 'password', first_name="Seán O'Brien")
+        for number in range(4):
+            User.objects.create_user(f'member{number}', f'member{number}@example.com', 'password')
+        cls.staff = User.objects.create_superuser('staff', 'staff@example.com', 'password')
+
+    def test_plain_text_is_not_escaped(self):
+        recipients = get_broadcast_recipients(queryset=User.objects.filter(username='obrien'))
+        sent = send_broadcast(recipients, 'Hello {{ first_name }}', 'Dear {{ first_name }} & co')
+        self.assertEqual(sent, 1)
+        email = mail.outbox[0]
+        self.assertEqual(email.subject, "Hello Seán O'Brien")
+        self.assertEqual(email.body, "Dear Seán O'Brien & co")
+        html, mimetype = email.alternatives[0]
+        # Escaped once in the HTML version, although the rendered text is marked safe
+        self.assertIn('Hello Seán O&#x27;Brien', html)
+        self.assertIn('Dear Seán O&#x27;Brien &amp; co', html)
+
+    def test_admin_action_queues_broadcast(self):
+        profiles = MemberProfile.objects.filter(user__username__startswith='member')
+        response = logged_in_client(self.staff).post(reverse('admin:main_memberprofile_changelist'), {
+            'action': 'email_members', '_selected_action': [profile.pk for profile in profiles],
+            'apply': '1', 'subject': 'News', 'message': 'Hello {{ first_name }}',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+        broadcast = QueuedBroadcast.objects.get()
+        self.assertEqual((broadcast.status, broadcast.recipient_count, broadcast.created_by), ('queued', 4, self.staff))
+
+        self.assertEqual(send_queued_broadcasts(), 4)
+        broadcast.refresh_from_db()
+        self.assertEqual((broadcast.status, broadcast.recipients_done, broadcast.sent_count), ('sent', 4, 4))
+        self.assertEqual(sorted(email.to[0] for email in mail.outbox), [f'member{n}@example.com' for n in range(4)])
+        self.assertEqual(send_queued_broadcasts(), 0)
+
+    @override_settings(BROADCAST_BATCH_SIZE=2)
+    def test_interrupted_broadcast_resumes(self):
+        broadcast = queue_broadcast(get_broadcast_recipients(queryset=User.objects.filter(username__startswith='member')), 'News', 'Hello')
+        # Stopped after the first batch
+        QueuedBroadcast.objects.filter(pk=broadcast.pk).update(status='sending', recipients_done=2, sent_count=2)
+        self.assertEqual(send_queued_broadcasts(), 2)
+        self.assertEqual(sorted(email.to[0] for email in mail.outbox), ['member2@example.com', 'member3@example.com'])
+        broadcast.refresh_from_db()
+        self.assertEqual((broadcast.status, broadcast.sent_count), ('sent', 4))
+
+
+# ========================
+# ASGI
+# ========================
+
+@FAST_HASHER
+class AsgiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', 'staff@example.com', 'password', is_staff=True)
+
+    def setUp(self):
+        # The profiling slot is held in the cache
+        cache.clear()
+
+    def test_project_middleware_is_async_capable(self):
+        for path in settings.MIDDLEWARE:
+            if path.startswith('shanti_yuwa_club.'):
+                self.assertTrue(import_string(path).async_capable, path)
+
+    async def test_async_request_metrics(self):
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get(reverse('programs'))
+        # Queries run in a sync thread, yet count towards the request
+        self.assertRegex(response['Server-Timing'], r'desc="[1-9]\d* queries"')
+
+    async def test_profiled_async_request(self):
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get(reverse('programs'), {'_profile': '1'})
+        self.assertIn('attachment', response['Content-Disposition'])
+        report = response.content.decode()
+        # The query log saw the view's queries, run in a sync thread
+        self.assertRegex(report, r'Queries:\s+[1-9]')
+        self.assertIn('main_program', report)
+
+
+# ========================
+# METRICS
+# ========================
+
+@FAST_HASHER
+@override_settings(METRICS_TOKEN='secret')
+class MetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', 'staff@example.com', 'password', is_staff=True)
+
+    def test_metrics_access(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertContains(response, 'django_http_request_duration_seconds')
+        # Staff signed in to the admin only have the admin session cookie
+        admin_client = logged_in_client(self.staff)
+        del admin_client.cookies[settings.SESSION_COOKIE_NAME]
+        self.assertContains(admin_client.get(reverse('admin_metrics')), 'django_http_responses_total')
+        self.assertEqual(self.client.get(reverse('admin_metrics')).status_code, 302)
+
+    def test_server_timing_does_not_load_the_user(self):
+        client = logged_in_client(self.staff)
+        self.assertRegex(client.get(reverse('admin:index'))['Server-Timing'], r'desc="[1-9]\d* queries"')
+        # The metrics endpoint authenticates by token and never looks at the session
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertNotIn('Server-Timing', response)
+        self.assertFalse([query for query in queries if 'django_session' in query['sql']])
+
+    def test_request_counters(self):
+        cache.set('present', 1)
+        request_metrics, token = metrics.start_request()
+        try:
+            cache.get('present')
+            cache.get('missing')
+            cache.get_many(['present', 'missing'])
+            User.objects.count()
+            render_to_string('emails/otp_verification.html', {'otp': '123456'})
+        finally:
+            metrics.finish_request(token)
+        self.assertEqual((request_metrics.cache_hits, request_metrics.cache_misses), (2, 2))
+        self.assertEqual(request_metrics.db_queries, 1)
+        self.assertGreater(request_metrics.template_time, 0)
+        # Outside a request nothing is counted
+        cache.get('present')
+        User.objects.count()
+        self.assertEqual((request_metrics.cache_hits, request_metrics.db_queries), (2, 1))
+
+
+# ========================
+# OTP STORE
+# ========================
+
+@override_settings(OTP_STORE='main.otp_store.CacheOTPStore', OTP_AUDIT_TRAIL=False)
+class CacheOTPStoreTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.store = get_otp_store()
+
+    def test_verify_without_database_writes(self):
+        with self.assertNumQueries(0):
+            self.store.create('Ram@Example.com ', '123456', otp_expiry())
+            self.assertEqual(verify_otp('ram@example.com', '123456'), (True, 'Email verified successfully!'))
+        self.assertEqual(verify_otp('ram@example.com', '123456'), (False, 'This OTP has already been used.'))
+
+    def test_attempts_are_limited(self):
+        self.store.create('ram@example.com', '123456', otp_expiry())
+        for remaining in [4, 3, 2, 1, 0]:
+            self.assertEqual(verify_otp('ram@example.com', '000000'), (False, f'Invalid OTP. Attempts remaining: {remaining}'))
+        # The right code no longer helps
+        self.assertEqual(verify_otp('ram@example.com', '123456'),
+                         (False, 'Too many failed attempts. Please request a new OTP.'))
+        # A new code resets the counter
+        self.store.create('ram@example.com', '654321', otp_expiry())
+        self.assertEqual(self.store.get('ram@example.com')['attempts'], 0)
+        self.assertTrue(verify_otp('ram@example.com', '654321')[0])
+
+    def test_expiry(self):
+        self.store.create('ram@example.com', '123456', timezone.now() - timedelta(seconds=1))
+        # Kept for a grace period, so the user is told it expired
+        self.assertEqual(verify_otp('ram@example.com', '123456'), (False, 'OTP has expired. Please request a new one.'))
+        cache.delete(self.store._key('ram@example.com'))
+        self.assertEqual(verify_otp('ram@example.com', '123456'),
+                         (False, 'No OTP found for this email. Please request a new one.'))
+
+
+# ========================
+# READ REPLICAS
+# ========================
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_PIN_SECONDS=10)
+class ReplicaPinningTests(SimpleTestCase):
+    """Routing decisions only: no query runs, so no replica database is needed"""
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+        reset_pinning()
+
+    def write_view(self, request):
+        self.assertEqual(self.router.db_for_read(MemberProfile), 'replica')
+        self.assertEqual(self.router.db_for_write(MemberProfile), 'default')
+        # Read your writes within the request
+        self.assertEqual(self.router.db_for_read(MemberProfile), 'default')
+        return HttpResponse()
+
+    def read_view(self, request):
+        self.read_from = self.router.db_for_read(MemberProfile)
+        return HttpResponse()
+
+    def test_sessions_read_from_primary(self):
+        self.assertEqual(self.router.db_for_read(MemberProfile), 'replica')
+        self.assertEqual(self.router.db_for_read(Session), 'default')
+
+    def test_write_pins_the_browser(self):
+        response = ReplicaPinningMiddleware(self.write_view)(self.factory.post('/'))
+        cookie = response.cookies[ReplicaPinningMiddleware.COOKIE_NAME]
+        self.assertEqual(cookie['max-age'], 10)
+        # Pinning ends with the request
+        self.assertFalse(has_written())
+        self.assertEqual(self.router.db_for_read(MemberProfile), 'replica')
+
+        request = self.factory.get('/')
+        request.COOKIES[ReplicaPinningMiddleware.COOKIE_NAME] = '1'
+        response = ReplicaPinningMiddleware(self.read_view)(request)
+        self.assertEqual(self.read_from, 'default')
+        self.assertNotIn(ReplicaPinningMiddleware.COOKIE_NAME, response.cookies)
+
+        ReplicaPinningMiddleware(self.read_view)(self.factory.get('/'))
+        self.assertEqual(self.read_from, 'replica')
+
+    def test_write_in_async_request(self):
+        # A sync view under ASGI: its writes happen in a worker thread
+        middleware = ReplicaPinningMiddleware(sync_to_async(self.write_view))
+        response = async_to_sync(middleware)(self.factory.post('/'))
+        self.assertIn(ReplicaPinningMiddleware.COOKIE_NAME, response.cookies)
+
+
+# ========================
+# BACKUP AND RESTORE
+# ========================
+
+@FAST_HASHER
+class BackupRestoreTests(TestCase):
+
+    def setUp(self):
+        self.backup_dir = self.enterContext(tempfile.TemporaryDirectory())
+        self.member = User.objects.create_user('member', 'member@example.com', 'password', first_name='Sita')
+        self.member.member_profile.blood_group = 'O-'
+        self.member.member_profile.save()
+        self.event = Event.objects.create(
+            title='Blood Donation Camp', date=timezone.now(), location='Club Hall',
+            description='<p>Bring a friend</p>', image='events/camp.jpg',
+        )
+        EventAttendance.objects.create(member=self.member.member_profile, event=self.event, status='attended')
+        ContactMessage.objects.create(name='Ram', email='ram@example.com', subject='नमस्ते', message='Hello')
+        ContactMessage.objects.update(created_at=timezone.now() - timedelta(days=400))
+
+    def snapshot(self):
+        return {
+            model: list(model.objects.order_by('pk').values())
+            for model in [User, MemberProfile, Event, EventAttendance, ContactMessage]
+        }
+
+    def backup(self):
+        call_command('backup', output_dir=self.backup_dir, jobs=1, keep=0, stdout=StringIO())
+        return list_backups(self.backup_dir)[0]
+
+    def restore(self, path):
+        call_command('restore_backup', path, flush=True, interactive=False, stdout=StringIO())
+
+    def test_round_trip(self):
+        before = self.snapshot()
+        path = self.backup()
+        self.assertEqual(verify_backup(path), [])
+
+        ContactMessage.objects.all().delete()
+        self.member.delete()
+        User.objects.create_user('newcomer', 'newcomer@example.com', 'password')
+        self.restore(path)
+
+        # Rows, primary keys and auto_now_add timestamps come back as they were,
+        # without the post_save signal creating a second profile
+        self.assertEqual(self.snapshot(), before)
+        self.assertFalse(User.objects.filter(username='newcomer').exists())
+        # Sequences were reset past the restored keys
+        user = User.objects.create_user('after', 'after@example.com', 'password')
+        self.assertGreater(user.pk, max(row['id'] for row in before[User]))
+        self.assertTrue(self.client.login(username='member', password='password'))
+
+    def test_corrupted_backup_is_refused(self):
+        path = self.backup()
+        entry = next(entry for entry in load_manifest(path)['tables'] if entry['model'] == 'main.contactmessage')
+        with open(os.path.join(path, entry['file']), 'ab') as f:
+            f.write(b'garbage')
+        ContactMessage.objects.all().delete()
+
+        with self.assertRaisesMessage(CommandError, 'checksum mismatch'):
+            self.restore(path)
+        self.assertFalse(ContactMessage.objects.exists())
+
+    def test_restore_refuses_non_empty_tables(self):
+        path = self.backup()
+        with self.assertRaisesMessage(CommandError, '--flush'):
+            call_command('restore_backup', path, stdout=StringIO())
+        self.assertEqual(ContactMessage.objects.count(), 1)
+
+    def test_backups_in_the_same_second(self):
+        first, second = self.backup(), self.backup()
+        self.assertNotEqual(first, second)
+        self.assertEqual(len(list_backups(self.backup_dir)), 2)
+
+        started = timezone.localtime()
+        with mock.patch('main.backup_utils.timezone.localtime', return_value=started):
+            self.backup()
+            with self.assertRaisesMessage(CommandError, 'already exists'):
+                self.backup()
+        self.assertEqual(len(list_backups(self.backup_dir)), 3)
+        self.assertEqual(verify_backup(list_backups(self.backup_dir)[0]), [])
+
+    def test_flush_confirmation_without_a_terminal(self):
+        path = self.backup()
+        with mock.patch('builtins.input', side_effect=EOFError):
+            with self.assertRaisesMessage(CommandError, '--no-input'):
+                call_command('restore_backup', path, flush=True, stdout=StringIO())
+        self.assertEqual(ContactMessage.objects.count(), 1)
+
+
+# ========================
+# ADMIN SESSIONS
+# ========================
+
+@FAST_HASHER
+class AdminSessionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', 'staff@example.com', 'password', is_staff=True)
+
+    def admin_login(self, client):
+        response = client.post(reverse('admin:login'), {'username': 'staff', 'password': 'password'})
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(AdminSessionMiddleware.ADMIN_SESSION_COOKIE_NAME, response.cookies)
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+    def test_cookies_are_separate(self):
+        # A site session doesn't authenticate the admin
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse('member_dashboard')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('admin:index')).status_code, 302)
+
+        # An admin session doesn't authenticate the site
+        client = Client()
+        self.admin_login(client)
+        self.assertEqual(client.get(reverse('admin:index')).status_code, 200)
+        self.assertEqual(client.get(reverse('member_dashboard')).status_code, 302)
+
+    def test_logging_out_of_one_keeps_the_other(self):
+        self.client.force_login(self.staff)
+        self.admin_login(self.client)
+        self.client.post(reverse('admin:logout'))
+        self.assertEqual(self.client.get(reverse('admin:index')).status_code, 302)
+        self.assertEqual(self.client.get(reverse('member_dashboard')).status_code, 200)
+
+        self.admin_login(self.client)
+        self.client.get(reverse('member_logout'))
+        self.assertEqual(self.client.get(reverse('member_dashboard')).status_code, 302)
+        self.assertEqual(self.client.get(reverse('admin:index')).status_code, 200)
+
+    def test_no_cookie_no_session_queries(self):
+        def view(request):
+            request.session.get('anything')
+            return HttpResponse()
+
+        middleware = AdminSessionMiddleware(view)
+        for path in ['/', '/admin/']:
+            with self.assertNumQueries(0):
+                response = middleware(RequestFactory().get(path))
+            self.assertFalse(response.cookies)
+
+
+# ========================
+# SCHEDULER
+# ========================
+
+class SchedulerTests(TestCase):
+
+    def setUp(self):
+        # Register the real jobs first, so the patched registry below doesn't swallow them
+        scheduler.load_jobs()
+        self.jobs = dict(scheduler.registry)
+        self.calls = []
+        self.lock_file = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), 'scheduler.lock')
+        self.enterContext(override_settings(SCHEDULER_LOCK_FILE=self.lock_file))
+        self.enterContext(mock.patch.dict(scheduler.registry, clear=True))
+        scheduler.job(interval=timedelta(minutes=1))(self.every_minute)
+        scheduler.job(interval=timedelta(hours=1), name='hourly')(lambda: self.calls.append('hourly'))
+
+    def every_minute(self):
+        self.calls.append('every_minute')
+
+    def test_jobs_are_registered(self):
+        self.assertEqual({name: entry['interval'] for name, entry in self.jobs.items()}, {
+            'clear_expired_sessions': timedelta(days=1),
+            'archive_old_records': timedelta(days=1),
+            'send_member_greetings': timedelta(hours=1),
+            'send_broadcasts': timedelta(minutes=1),
+            'refresh_dashboard_stats': timedelta(minutes=15),
+            'flush_contact_messages': timedelta(minutes=1),
+        })
+        self.assertEqual(scheduler.registry['every_minute'], {'func': self.every_minute, 'interval': timedelta(minutes=1)})
+        self.assertIn('hourly', scheduler.registry)
+
+    def test_due_jobs_run(self):
+        now = timezone.now()
+        self.assertEqual(scheduler.run_pending(now), ['every_minute', 'hourly'])
+        first_run = ScheduledJob.objects.get(name='every_minute').last_run_at
+        self.assertEqual(scheduler.next_run_at('every_minute', first_run), first_run + timedelta(minutes=1))
+
+        # Not due yet
+        self.assertEqual(scheduler.run_pending(first_run + timedelta(seconds=30)), [])
+        self.assertEqual(scheduler.run_pending(first_run + timedelta(minutes=2)), ['every_minute'])
+        self.assertEqual(self.calls, ['every_minute', 'hourly', 'every_minute'])
+        # The next run moved forward with the last run
+        self.assertGreater(ScheduledJob.objects.get(name='every_minute').last_run_at, first_run)
+
+    def test_failed_job_does_not_stop_the_others(self):
+        scheduler.job(interval=timedelta(minutes=1), name='broken')(mock.Mock(side_effect=ValueError('boom')))
+        with self.assertLogs('main.scheduler', 'ERROR'):
+            self.assertEqual(scheduler.run_pending(), ['every_minute', 'hourly', 'broken'])
+        broken = ScheduledJob.objects.get(name='broken')
+        self.assertEqual(broken.last_status, 'failed')
+        self.assertIn('ValueError: boom', broken.last_error)
+        self.assertEqual(ScheduledJob.objects.get(name='hourly').last_status, 'success')
+
+    def test_only_the_lock_holder_runs_jobs(self):
+        other_process = scheduler.LeaderLock(self.lock_file)
+        self.assertTrue(other_process.acquire())
+        try:
+            with self.assertRaisesMessage(CommandError, 'holds the lock'):
+                call_command('run_scheduler', once=True, stdout=StringIO())
+            # The embedded loop waits for the lock and runs nothing
+            stop = threading.Event()
+            with mock.patch.object(stop, 'wait', side_effect=lambda tick: stop.set()):
+                scheduler.run_forever(stop_event=stop)
+        finally:
+            other_process.release()
+        self.assertEqual(self.calls, [])
+
+        out = StringIO()
+        call_command('run_scheduler', once=True, stdout=out)
+        self.assertIn('Ran 2 job(s)', out.getvalue())
+
+    def test_list(self):
+        ScheduledJob.objects.create(
+            name='hourly', last_run_at=timezone.now(), last_duration=0.5, last_status='success',
+        )
+        out = StringIO()
+        call_command('run_scheduler', list=True, stdout=out)
+        lines = dict(line.split(None, 1) for line in out.getvalue().splitlines())
+        self.assertIn('last run: never  next run: now', lines['every_minute'])
+        self.assertIn('(success, 0.50s)', lines['hourly'])
+        self.assertNotIn('next run: now', lines['hourly'])
+        self.assertEqual(ScheduledJob.objects.count(), 1)
+
+
+# ========================
+# DATABASE COPY
+# ========================
+
+# A second database to copy into. Registered when the tests are loaded, so the
+# test runner creates (and migrates) a test database for it like for 'default'.
+COPY_TARGET = 'copy_target'
+connections.settings.setdefault(COPY_TARGET, connections.configure_settings({
+    'default': connections.settings['default'],
+    COPY_TARGET: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'},
+})[COPY_TARGET])
+
+
+@FAST_HASHER
+class DatabaseCopyTests(TestCase):
+    target = COPY_TARGET
+    databases = {'default', COPY_TARGET}
+
+    def setUp(self):
+        self.state_file = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), 'state.json')
+        users = [User.objects.create_user(f'member{n}', f'member{n}@example.com', 'password') for n in range(5)]
+        event = Event.objects.create(
+            title='Blood Donation Camp', date=timezone.now(), location='Club Hall',
+            description='Description', image='events/camp.jpg',
+        )
+        EventAttendance.objects.bulk_create([EventAttendance(member=user.member_profile, event=event) for user in users])
+        ContactMessage.objects.create(name='Ram', email='ram@example.com', subject='नमस्ते', message='Hello')
+
+    def counts(self, using):
+        return {model: model.objects.using(using).count() for model in [User, MemberProfile, EventAttendance, ContactMessage]}
+
+    def migrate_database(self, **options):
+        call_command('migrate_database', source='default', target=self.target, state_file=self.state_file,
+                     interactive=False, stdout=StringIO(), **options)
+
+    def test_copy(self):
+        self.migrate_database(batch_size=2)
+        self.assertEqual(self.counts(self.target), self.counts('default'))
+        self.assertEqual(self.counts(self.target)[User], 5)
+        self.assertEqual(verify_copy('default', self.target), [])
+        self.assertFalse(os.path.exists(self.state_file))
+
+    def test_resume_after_interruption(self):
+        def interrupt(model, rows):
+            if model is User and rows == 2:
+                raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            copy_database('default', self.target, self.state_file, batch_size=2, progress=interrupt)
+        self.assertEqual(User.objects.using(self.target).count(), 2)
+        self.assertIn('auth.group', load_state(self.state_file, 'default', self.target)['done'])
+
+        copied = copy_database('default', self.target, self.state_file, batch_size=2)
+        # Only the rest of the interrupted table, and the tables after it
+        self.assertEqual(copied['auth.user'], 3)
+        self.assertNotIn('auth.group', copied)
+        self.assertEqual(self.counts(self.target), self.counts('default'))
+        self.assertEqual(verify_copy('default', self.target), [])
+
+    def test_verify_detects_missing_rows(self):
+        self.migrate_database()
+        ContactMessage.objects.using(self.target).all().delete()
+        with self.assertRaisesMessage(CommandError, 'main.contactmessage: 1 rows in default, 0 in copy_target'):
+            self.migrate_database(verify_only=True)
+        # Same count, different content
+        ContactMessage.objects.using(self.target).create(name='Sita', email='sita@example.com', subject='Hi', message='Hello')
+        with self.assertRaisesMessage(CommandError, 'main.contactmessage: checksum differs'):
+            self.migrate_database(verify_only=True)
+
+
+# ========================
+# MEDIA BACKUP
+# ========================
+
+class MediaBackupTests(SimpleTestCase):
+
+    def setUp(self):
+        tmp = self.enterContext(tempfile.TemporaryDirectory())
+        self.media, self.store = os.path.join(tmp, 'media'), os.path.join(tmp, 'store')
+        self.enterContext(override_settings(MEDIA_ROOT=self.media))
+        self.files = {
+            'gallery/camp.jpg': b'camp photo',
+            'programs/camp.jpg': b'camp photo',  # the same photo uploaded twice
+            'team/ram.jpg': b'portrait',
+        }
+        for rel, content in self.files.items():
+            self.write(rel, content)
+
+    def write(self, rel, content):
+        path = os.path.join(self.media, *rel.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+
+    def backup_media(self, *args):
+        out = StringIO()
+        call_command('backup_media', *args, output_dir=self.store, stdout=out)
+        return out.getvalue()
+
+    def stored_objects(self):
+        return sorted(name for _, _, names in os.walk(os.path.join(self.store, 'objects')) for name in names)
+
+    def test_round_trip(self):
+        self.assertIn('3 files: 3 hashed, 2 copied', self.backup_media())
+        # Identical content is stored once
+        self.assertEqual(len(self.stored_objects()), 2)
+
+        # Nothing changed: nothing hashed or copied
+        self.assertIn('3 files: 0 hashed, 0 copied', self.backup_media())
+        self.assertEqual(len(self.stored_objects()), 2)
+
+        self.write('team/ram.jpg', b'new portrait')
+        self.assertIn('3 files: 1 hashed, 1 copied', self.backup_media())
+        self.assertIn('matches the manifest', self.backup_media('--verify'))
+        self.assertEqual(len(list_manifests(self.store)), 3)
+
+        target = os.path.join(self.store, '..', 'restored')
+        self.backup_media('--restore', target)
+        for rel, content in {**self.files, 'team/ram.jpg': b'new portrait'}.items():
+            with open(os.path.join(target, *rel.split('/')), 'rb') as f:
+                self.assertEqual(f.read(), content, rel)
+        self.assertEqual(
+            os.stat(os.path.join(target, 'gallery', 'camp.jpg')).st_mtime_ns,
+            os.stat(os.path.join(self.media, 'gallery', 'camp.jpg')).st_mtime_ns,
+        )
+
+    def test_verify_detects_changes(self):
+        self.backup_media()
+        self.write('gallery/camp.jpg', b'edited')
+        os.remove(os.path.join(self.media, 'team', 'ram.jpg'))
+        with self.assertRaisesMessage(CommandError, 'team/ram.jpg: missing\ngallery/camp.jpg: content differs'):
+            self.backup_media('--verify')
+
+
+# ========================
+# SEED DATA
+# ========================
+
+class SeedTests(TestCase):
+
+    def test_seed_twice(self):
+        # A real account that a generated name would otherwise take
+        User.objects.create_user('member2', 'ram@example.com', password='x', first_name='Ram')
+        first = seed(5, seed=1, batch_size=2)
+        second = seed(5, seed=1, batch_size=2)
+        self.assertEqual((first['User'], second['User']), (5, 5))
+        self.assertEqual((first['GalleryCategory'], second['GalleryCategory']), (6, 0))
+        self.assertEqual(GalleryCategory.objects.count(), 6)
+        self.assertEqual(User.objects.get(username='member2').first_name, 'Ram')
+        self.assertTrue(User.objects.filter(username='member11').exists())
+        self.assertEqual(MemberProfile.objects.count(), 11)
@@ -0,0 +1,106 @@
+"""
+Cache-backed request throttling
+"""
+import hashlib
+import time
+from functools import wraps
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.shortcuts import redirect
+
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """
+    Parse a rate string such as '5/m', '20/10m' or '1/60s'.
+    Returns (number_of_requests, period_in_seconds).
+    """
+    num, period = rate.split('/')
+    multiplier = period[:-1] or '1'
+    return int(num), int(multiplier) * PERIODS[period[-1]]
+
+
+def get_client_ip(request):
+    """
+    Return the client IP. Behind THROTTLE_PROXY_COUNT trusted proxies
+    (THROTTLE_TRUST_X_FORWARDED_FOR), that is the address the outermost proxy
+    appended to X-Forwarded-For: the Nth entry from the right. Entries further
+    left come from the client and can be forged.
+    """
+    if settings.THROTTLE_TRUST_X_FORWARDED_FOR:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= settings.THROTTLE_PROXY_COUNT:
+            return forwarded[-settings.THROTTLE_PROXY_COUNT]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def get_throttle_ident(request, key):
+    """
+    Resolve the identity a throttle is keyed on.
+    `key` is 'ip', 'post:<field>' for a (case-insensitive) POST field,
+    or a callable taking the request.
+    """
+    if callable(key):
+        return key(request)
+    if key == 'ip':
+        return get_client_ip(request)
+    if key.startswith('post:'):
+        return request.POST.get(key[5:], '').strip().lower()
+    raise ValueError(f"Unknown throttle key: {key}")
+
+
+def is_rate_limited(scope, ident, rate):
+    """
+    Return True if `ident` has used up `rate` in `scope`, otherwise record the hit.
+
+    Sliding-window log: the cache holds the timestamps of the allowed hits
+    within the last period (at most `limit` of them), so a '1/m' rate is an
+    exact one-minute cooldown. Rejected hits are not recorded. Concurrent
+    requests may race on the read-modify-write, which can let a request or
+    two through at the edge; that is acceptable for abuse throttling.
+    """
+    limit, period = parse_rate(rate)
+    now = time.time()
+    digest = hashlib.md5(ident.encode('utf-8')).hexdigest()
+    cache_key = f"throttle:{scope}:{digest}"
+
+    history = [ts for ts in cache.get(cache_key, []) if ts > now - period]
+    if len(history) >= limit:
+        return True
+
+    history.append(now)
+    cache.set(cache_key, history, timeout=period)
+    return False
+
+
+def throttle(scope, key='ip', rate=None, methods=('POST',), message=None, json_only=False):
+    """
+    Decorator that rejects requests over the rate configured for `scope`
+    in settings.THROTTLE_RATES, before the view does any database or SMTP work.
+    Stack it to throttle on several keys (e.g. per IP and per email).
+    Set `json_only` for AJAX endpoints that always answer with JSON.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            throttle_rate = rate or settings.THROTTLE_RATES.get(scope)
+            if throttle_rate and request.method in methods:
+                ident = get_throttle_ident(request, key)
+                if ident and is_rate_limited(scope, ident, throttle_rate):
+                    return throttled_response(request, message, json_only)
+            return view_func(request, *args, **kwargs)
+        return _wrapped_view
+    return decorator
+
+
+def throttled_response(request, message=None, json_only=False):
+    """Response returned to a throttled request"""
+    message = message or 'Too many requests. Please wait a moment and try again.'
+    if json_only or request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return JsonResponse({'success': False, 'error': message}, status=429)
+    messages.error(request, message)
+    return redirect(request.get_full_path())
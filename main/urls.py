@@ -1,14 +1,21 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 from . import otp_views
 
+# Public pages are served by the async views when running under ASGI
+if settings.ASYNC_PUBLIC_VIEWS:
+    from . import async_views as public_views
+else:
+    public_views = views
+
 urlpatterns = [
     # Public pages
-    path('', views.home, name='home'),
-    path('about/', views.about, name='about'),
-    path('programs/', views.programs, name='programs'),
-    path('programs/<slug:slug>/', views.program_detail, name='program_detail'),
-    path('gallery/', views.gallery, name='gallery'),
+    path('', public_views.home, name='home'),
+    path('about/', public_views.about, name='about'),
+    path('programs/', public_views.programs, name='programs'),
+    path('programs/<slug:slug>/', public_views.program_detail, name='program_detail'),
+    path('gallery/', public_views.gallery, name='gallery'),
     path('contact/', views.contact, name='contact'),
 
     
@@ -5,8 +5,10 @@ from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
 
 from django.utils import timezone
-from .models import Program, GalleryImage, GalleryCategory, TeamMember, Event, ContactMessage, MemberProfile, EventAttendance, ProgramParticipation
+from .models import Program, GalleryImage, GalleryCategory, TeamMember, Event, ContactMessage, MemberProfile, EventAttendance, ProgramParticipation, ArchivedEventAttendance
 from .forms import ContactForm, MemberRegistrationForm, MemberProfileForm
+from .throttling import throttle
+from . import contact_buffer
 from collections import defaultdict
 
 # Create your views here.
@@ -25,7 +27,7 @@ def home(request):
         # Optimized: Fetch all relevant images in one query
         all_relevant_images = GalleryImage.objects.filter(
             category__in=categories
-        ).order_by('category', '-created_at')
+        ).select_related('category').order_by('category', '-created_at')
         
         # Group by category in Python
         cat_map = defaultdict(list)
@@ -48,7 +50,7 @@ def home(request):
         
         # If we still have slots and didn't fill all 6, add more images
         if len(gallery_images) < 6:
-            additional_images = GalleryImage.objects.exclude(
+            additional_images = GalleryImage.objects.select_related('category').exclude(
                 id__in=[img.id for img in gallery_images]
             ).order_by('-created_at')[:6 - len(gallery_images)]
             gallery_images.extend(additional_images)
@@ -141,12 +143,14 @@ def gallery(request):
     }
     return render(request, 'main/gallery.html', context)
 
+@throttle('contact_ip', key='ip', message='You have sent several messages recently. Please try again later.')
 def contact(request):
     """View for contact page"""
     if request.method == 'POST':
         form = ContactForm(request.POST)
         if form.is_valid():
-            form.save()
+            # Duplicates are dropped without telling the sender
+            contact_buffer.submit(form)
             messages.success(request, 'Your message has been sent. Thank you for contacting us!')
             return redirect('contact')
     else:
@@ -210,6 +214,8 @@ def member_register(request):
 
 
 
+@throttle('login_ip', key='ip', message='Too many login attempts. Please try again in a few minutes.')
+@throttle('login_username', key='post:username', message='Too many login attempts. Please try again in a few minutes.')
 def member_login(request):
     """Login view for members"""
     if request.user.is_authenticated:
@@ -305,15 +311,20 @@ def member_events(request):
     # Get all upcoming events
     upcoming_events = Event.objects.filter(is_active=True, date__gte=timezone.now()).order_by('date')
     
+    # Get member's event history, including attendance moved to the archive by the retention policy
+    event_history = list(EventAttendance.objects.filter(member=profile).select_related('event'))
+    
     # Get member's registered event IDs
-    registered_event_ids = EventAttendance.objects.filter(member=profile).values_list('event_id', flat=True)
+    registered_event_ids = [attendance.event_id for attendance in event_history]
     
-    # Get member's event history
-    event_history = EventAttendance.objects.filter(member=profile).select_related('event').order_by('-event__date')
+    for attendance in ArchivedEventAttendance.objects.filter(member=profile).select_related('event'):
+        attendance.is_archived = True
+        event_history.append(attendance)
+    event_history.sort(key=lambda attendance: attendance.event.date, reverse=True)
     
     context = {
         'upcoming_events': upcoming_events,
-        'registered_event_ids': list(registered_event_ids),
+        'registered_event_ids': registered_event_ids,
         'event_history': event_history,
     }
     return render(request, 'members/events.html', context)
@@ -0,0 +1,22 @@
+"""
+Connection pool metrics for databases running in pool mode (OPTIONS['pool'])
+"""
+from django.db import connections
+
+
+def get_pool_stats():
+    """
+    Return {alias: stats} for every pooled database in this process.
+    Stats come from psycopg_pool's ConnectionPool.get_stats(): pool_size,
+    pool_available, requests_waiting, requests_num, requests_wait_ms,
+    connections_errors, connections_lost, etc.
+    """
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        if connection.vendor != 'postgresql' or not connection.settings_dict['OPTIONS'].get('pool'):
+            continue
+        pool = connection.pool
+        if pool is not None:
+            stats[alias] = pool.get_stats()
+    return stats
@@ -0,0 +1,58 @@
+"""
+Database routers
+
+PrimaryReplicaRouter sends read-only ORM queries to one of the replica aliases in
+settings.DATABASE_REPLICAS and everything else to 'default'. Once a request has
+written, it is pinned to the primary for the rest of the request, and
+ReplicaPinningMiddleware keeps that browser on the primary for
+settings.REPLICA_PIN_SECONDS so it reads its own writes despite replication lag
+(e.g. right after registering or enrolling).
+"""
+import random
+from contextvars import ContextVar
+from django.conf import settings
+
+_pinned = ContextVar('pinned_to_primary', default=False)
+_wrote = ContextVar('wrote_to_primary', default=False)
+
+# Apps whose reads always go to the primary. Sessions are read on every
+# request right after being written at login, so lag there logs users out.
+PRIMARY_ONLY_APPS = {'sessions'}
+
+
+def pin_to_primary():
+    """Send all further reads in this request/context to the primary"""
+    _pinned.set(True)
+
+
+def reset_pinning(pinned=False):
+    """Start a new request context"""
+    _pinned.set(pinned)
+    _wrote.set(False)
+
+
+def has_written():
+    """Whether the current request has routed a write to the primary"""
+    return _wrote.get()
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or _pinned.get() or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _pinned.set(True)
+        _wrote.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primary and replicas hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication; any other alias
+        # (e.g. the migrate_database target) is migrated directly
+        return db not in settings.DATABASE_REPLICAS
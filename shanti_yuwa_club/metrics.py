@@ -0,0 +1,328 @@
+"""
+Per-request performance metrics
+
+PerformanceMiddleware (see middleware.py) opens a RequestMetrics for each
+request. While it is active, database queries (an execute wrapper added to
+each connection), template rendering (the TimedDjangoTemplates backend) and
+cache lookups (the Measured* cache backends) add to it. It lives in a context
+variable, so under ASGI it follows the request into the threads that run sync
+views and ORM calls. The middleware then reports it in a Server-Timing header
+and records it in the process-wide registry, aggregated per URL name.
+
+Each worker process keeps its own registry and publishes a snapshot to the
+cache every METRICS_FLUSH_SECONDS. The /metrics view renders its own registry
+plus the other workers' snapshots in Prometheus text format, with a `worker`
+label, so with a shared cache (REDIS_URL) one scrape covers every worker.
+"""
+import os
+import socket
+import threading
+import time
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template.backends.django import DjangoTemplates, Template as DjangoTemplate
+from django.utils.crypto import constant_time_compare
+
+# Request duration histogram buckets, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WORKERS_CACHE_KEY = 'metrics:workers'
+
+_current = ContextVar('request_metrics', default=None)
+_MISSING = object()
+
+
+def worker_id():
+    # Not a module constant: with preload_app this module is imported before the fork
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class RequestMetrics:
+    """Counters for a single request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total):
+        """Value of the Server-Timing header"""
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.db_queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f};desc="templates"',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+
+def start_request():
+    """Begin collecting for the current request, returning (metrics, token for finish_request)"""
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    """Execute wrapper counting queries and their time"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+# ========================
+# INSTRUMENTATION
+# ========================
+
+def install_db_wrapper(connection, **kwargs):
+    """connection_created receiver: count this connection's queries (each thread has its own)"""
+    if db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
+
+
+def install():
+    """Count database queries on every connection. Called by MainConfig.ready(); idempotent."""
+    connection_created.connect(install_db_wrapper, dispatch_uid='metrics_db_wrapper')
+    # Connections already opened in this thread
+    for connection in connections.all(initialized_only=True):
+        install_db_wrapper(connection)
+
+
+class TimedTemplate(DjangoTemplate):
+    """Adds the render time to the current request's metrics"""
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(context, request)
+        # {% include %} and {% extends %} render inside the engine, so this
+        # only times templates rendered by views and the admin
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing every render (TEMPLATES in settings.py)"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+class CacheMetricsMixin:
+    """Counts hits and misses of get()/get_many() towards the current request"""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        metrics = _current.get()
+        if metrics is not None:
+            if value is _MISSING:
+                metrics.cache_misses += 1
+            else:
+                metrics.cache_hits += 1
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values = super().get_many(keys, version=version)
+        metrics = _current.get()
+        # BaseCache.get_many() calls get() per key, which is already counted
+        if metrics is not None and super(CacheMetricsMixin, type(self)).get_many is not BaseCache.get_many:
+            metrics.cache_hits += len(values)
+            metrics.cache_misses += len(keys) - len(values)
+        return values
+
+
+class MeasuredLocMemCache(CacheMetricsMixin, LocMemCache):
+    pass
+
+
+class MeasuredRedisCache(CacheMetricsMixin, RedisCache):
+    pass
+
+
+# ========================
+# AGGREGATION
+# ========================
+
+class Registry:
+    """Per-process aggregates, keyed by (view, method) and (view, method, status)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.durations = {}   # (view, method) -> [bucket counts..., sum, count]
+        self.responses = {}   # (view, method, status) -> count
+        self.totals = {}      # (view, method) -> {'db_queries': .., 'db_seconds': .., ...}
+        self.last_flush = 0.0
+
+    def record(self, view, method, status, duration, metrics):
+        key = (view, method)
+        with self.lock:
+            histogram = self.durations.setdefault(key, [0] * len(DURATION_BUCKETS) + [0.0, 0])
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    histogram[i] += 1
+            histogram[-2] += duration
+            histogram[-1] += 1
+
+            status_key = (view, method, str(status))
+            self.responses[status_key] = self.responses.get(status_key, 0) + 1
+
+            totals = self.totals.setdefault(key, dict.fromkeys(
+                ['db_queries', 'db_seconds', 'template_seconds', 'cache_hits', 'cache_misses'], 0
+            ))
+            totals['db_queries'] += metrics.db_queries
+            totals['db_seconds'] += metrics.db_time
+            totals['template_seconds'] += metrics.template_time
+            totals['cache_hits'] += metrics.cache_hits
+            totals['cache_misses'] += metrics.cache_misses
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'durations': [[list(key), list(value)] for key, value in self.durations.items()],
+                'responses': [[list(key), value] for key, value in self.responses.items()],
+                'totals': [[list(key), dict(value)] for key, value in self.totals.items()],
+            }
+
+    def publish_due(self):
+        return time.monotonic() - self.last_flush >= settings.METRICS_FLUSH_SECONDS
+
+    def publish(self, force=False):
+        """Share this worker's snapshot through the cache, at most every METRICS_FLUSH_SECONDS"""
+        if not force and not self.publish_due():
+            return
+        self.last_flush = time.monotonic()
+        # Snapshots expire if the worker dies (or is recycled by max_requests)
+        timeout = settings.METRICS_FLUSH_SECONDS * 10
+        cache = caches['default']
+        cache.set(f'metrics:worker:{worker_id()}', self.snapshot(), timeout)
+        workers = cache.get(WORKERS_CACHE_KEY) or []
+        if worker_id() not in workers:
+            cache.set(WORKERS_CACHE_KEY, (workers + [worker_id()])[-100:], None)
+
+
+registry = Registry()
+
+
+def collect_snapshots():
+    """{worker id: snapshot} for this worker (live) and every other worker that published recently"""
+    cache = caches['default']
+    snapshots = {}
+    workers = [worker for worker in cache.get(WORKERS_CACHE_KEY) or [] if worker != worker_id()]
+    if workers:
+        found = cache.get_many([f'metrics:worker:{worker}' for worker in workers])
+        for worker in workers:
+            snapshot = found.get(f'metrics:worker:{worker}')
+            if snapshot is not None:
+                snapshots[worker] = snapshot
+    snapshots[worker_id()] = registry.snapshot()
+    return snapshots
+
+
+# ========================
+# PROMETHEUS EXPOSITION
+# ========================
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def render_prometheus(snapshots, pool_stats=None):
+    lines = [
+        '# HELP django_http_request_duration_seconds Request wall time by URL name',
+        '# TYPE django_http_request_duration_seconds histogram',
+    ]
+    for worker, snapshot in snapshots.items():
+        for (view, method), histogram in snapshot['durations']:
+            # record() keeps cumulative counts (duration <= bound), as Prometheus expects
+            for bound, count in zip(DURATION_BUCKETS, histogram):
+                lines.append('django_http_request_duration_seconds_bucket'
+                             f'{_labels(view=view, method=method, worker=worker, le=bound)} {count}')
+            lines.append('django_http_request_duration_seconds_bucket'
+                         f'{_labels(view=view, method=method, worker=worker, le="+Inf")} {histogram[-1]}')
+            lines.append('django_http_request_duration_seconds_sum'
+                         f'{_labels(view=view, method=method, worker=worker)} {histogram[-2]:.6f}')
+            lines.append('django_http_request_duration_seconds_count'
+                         f'{_labels(view=view, method=method, worker=worker)} {histogram[-1]}')
+
+    lines += [
+        '# HELP django_http_responses_total Responses by URL name and status code',
+        '# TYPE django_http_responses_total counter',
+    ]
+    for worker, snapshot in snapshots.items():
+        for (view, method, status), count in snapshot['responses']:
+            lines.append(f'django_http_responses_total{_labels(view=view, method=method, status=status, worker=worker)} {count}')
+
+    counters = [
+        ('db_queries', 'django_db_queries_total', 'Database queries run by requests'),
+        ('db_seconds', 'django_db_query_seconds_total', 'Time spent in database queries'),
+        ('template_seconds', 'django_template_render_seconds_total', 'Time spent rendering templates'),
+        ('cache_hits', 'django_cache_hits_total', 'Cache lookups that found a value'),
+        ('cache_misses', 'django_cache_misses_total', 'Cache lookups that found nothing'),
+    ]
+    for field, metric, description in counters:
+        lines += [f'# HELP {metric} {description}', f'# TYPE {metric} counter']
+        for worker, snapshot in snapshots.items():
+            for (view, method), totals in snapshot['totals']:
+                value = totals[field]
+                value = f'{value:.6f}' if isinstance(value, float) else value
+                lines.append(f'{metric}{_labels(view=view, method=method, worker=worker)} {value}')
+
+    if pool_stats:
+        lines += ['# HELP django_db_pool Connection pool statistics (psycopg_pool get_stats())',
+                  '# TYPE django_db_pool gauge']
+        for alias, stats in pool_stats.items():
+            for name, value in sorted(stats.items()):
+                lines.append(f'django_db_pool{_labels(alias=alias, stat=name, worker=worker_id())} {value}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """
+    Prometheus metrics, for a scraper sending `Authorization: Bearer <METRICS_TOKEN>`
+    or staff users. Staff signed in to the admin (a separate session cookie) use
+    /admin/metrics/, which serves this view through the admin site.
+    """
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get('Authorization', '')
+    if not (token and constant_time_compare(authorization, f'Bearer {token}')) and not request.user.is_staff:
+        return HttpResponseForbidden("Staff only")
+
+    from .db_pool import get_pool_stats
+    registry.publish(force=True)
+    body = render_prometheus(collect_snapshots(), get_pool_stats())
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,49 +1,213 @@
+import logging
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.contrib.sessions.middleware import SessionMiddleware
 from django.conf import settings
+from . import metrics, profiling
+from .db_routers import reset_pinning, has_written
+
+performance_logger = logging.getLogger('shanti_yuwa_club.performance')
 
 class AdminSessionMiddleware(SessionMiddleware):
     """
     Middleware that uses a different session cookie for the admin site.
     This prevents the admin session from logging in the user on the main site,
     and vice-versa.
+
+    The cookie name is chosen per request, so it works with any SESSION_ENGINE
+    (db, cached_db, cache or signed_cookies). The session store is lazy: a
+    request without a session cookie never touches the session backend unless
+    the view writes to the session.
     """
     ADMIN_SESSION_COOKIE_NAME = 'admin_sessionid'
+    ADMIN_PATH_PREFIX = '/admin/'
+
+    def get_cookie_name(self, request):
+        """Name of the session cookie for this request"""
+        if request.path.startswith(self.ADMIN_PATH_PREFIX):
+            return self.ADMIN_SESSION_COOKIE_NAME
+        return settings.SESSION_COOKIE_NAME
 
     def process_request(self, request):
-        # Determine which cookie to use
-        if request.path.startswith('/admin/'):
-            # Use admin cookie
-            session_key = request.COOKIES.get(self.ADMIN_SESSION_COOKIE_NAME)
-            request.session = self.SessionStore(session_key)
-        else:
-            # Use default mechanism
-            super().process_request(request)
+        # No cookie means a None session key, which SessionStore treats as an
+        # empty session without loading anything from the backend
+        session_key = request.COOKIES.get(self.get_cookie_name(request))
+        request.session = self.SessionStore(session_key)
 
     def process_response(self, request, response):
-        # Let the standard middleware handle saving the session
-        # logic and setting the default cookie.
-        response = super().process_response(request, response)
-        
-        # If we are in the admin path, we need to intercept the cookie
-        if request.path.startswith('/admin/'):
-            cookie_name = settings.SESSION_COOKIE_NAME
-            
-            # Check if the standard middleware set the session cookie
-            if cookie_name in response.cookies:
-                # Rename the cookie in the response to our admin cookie name
-                # SimpleCookie stores Morsel objects. We can move the morsel to a new key.
-                morsel = response.cookies[cookie_name]
-                
-                # Create a new cookie with the admin name
-                response.cookies[self.ADMIN_SESSION_COOKIE_NAME] = morsel.value
-                new_morsel = response.cookies[self.ADMIN_SESSION_COOKIE_NAME]
-                
-                # Copy all attributes (path, domain, secure, httponly, etc.)
-                for key in morsel.keys():
-                    if morsel[key]:
-                        new_morsel[key] = morsel[key]
-                
-                # Remove the original cookie so it doesn't overwrite the main site session
-                del response.cookies[cookie_name]
-                
+        if self.get_cookie_name(request) == settings.SESSION_COOKIE_NAME:
+            return super().process_response(request, response)
+
+        # Let Django's SessionMiddleware handle the admin cookie as if it were
+        # SESSION_COOKIE_NAME, then rename the cookie it sets or deletes
+        admin_cookie = self.ADMIN_SESSION_COOKIE_NAME
+        cookies = request.COOKIES
+        request.COOKIES = {name: value for name, value in cookies.items() if name != settings.SESSION_COOKIE_NAME}
+        if admin_cookie in cookies:
+            request.COOKIES[settings.SESSION_COOKIE_NAME] = cookies[admin_cookie]
+        try:
+            response = super().process_response(request, response)
+        finally:
+            request.COOKIES = cookies
+        if settings.SESSION_COOKIE_NAME in response.cookies:
+            morsel = response.cookies.pop(settings.SESSION_COOKIE_NAME)
+            response.cookies[admin_cookie] = morsel.value
+            response.cookies[admin_cookie].update(morsel)
+        return response
+
+
+class HybridMiddleware:
+    """
+    Base for the project's middleware: runs natively under both WSGI and ASGI,
+    so async views are not forced through a thread switch per middleware.
+    Subclasses implement handle() for the sync path and ahandle() for the async one.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.ahandle(request)
+        return self.handle(request)
+
+
+class ReplicaPinningMiddleware(HybridMiddleware):
+    """
+    Read-your-writes stickiness for PrimaryReplicaRouter.
+    After a request writes to the primary, a short-lived cookie keeps the
+    browser's following requests on the primary until replicas catch up.
+    The pinning state is held in context variables, which sync_to_async
+    carries into and back out of the threads running sync views and ORM calls.
+    """
+    COOKIE_NAME = 'pin_primary'
+
+    def handle(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        reset_pinning(pinned=self.COOKIE_NAME in request.COOKIES)
+        try:
+            response = self.get_response(request)
+            self.set_pin_cookie(response)
+        finally:
+            reset_pinning()
+        return response
+
+    async def ahandle(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        reset_pinning(pinned=self.COOKIE_NAME in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+            self.set_pin_cookie(response)
+        finally:
+            reset_pinning()
         return response
+
+    def set_pin_cookie(self, response):
+        if has_written():
+            response.set_cookie(
+                self.COOKIE_NAME, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE or None,
+                httponly=True,
+                samesite='Lax',
+            )
+
+
+class PerformanceMiddleware(HybridMiddleware):
+    """
+    Per-request instrumentation (see metrics.py).
+    Records wall time, database queries and their time, template render time
+    and cache hits/misses per URL name for the /metrics endpoint, adds a
+    Server-Timing header for staff (or in DEBUG) and logs slow requests.
+    """
+    METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+    def handle(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        request_metrics, token = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.finish_request(token)
+        self.record(request, response, request_metrics)
+        metrics.registry.publish()
+        return response
+
+    async def ahandle(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+
+        request_metrics, token = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.finish_request(token)
+        self.record(request, response, request_metrics)
+        # Publishing writes to the cache; keep that off the event loop
+        if metrics.registry.publish_due():
+            await sync_to_async(metrics.registry.publish)()
+        return response
+
+    def record(self, request, response, request_metrics):
+        duration = request_metrics.elapsed()
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<unresolved>'
+        method = request.method if request.method in self.METHODS else 'other'
+        metrics.registry.record(view, method, response.status_code, duration, request_metrics)
+
+        if duration >= settings.SLOW_REQUEST_SECONDS:
+            performance_logger.warning(
+                "Slow request %s %s (%s): %.0f ms, %d queries in %.0f ms, templates %.0f ms",
+                method, request.path, view, duration * 1000, request_metrics.db_queries,
+                request_metrics.db_time * 1000, request_metrics.template_time * 1000,
+            )
+        if settings.DEBUG or self.loaded_user_is_staff(request):
+            response['Server-Timing'] = request_metrics.server_timing(duration)
+
+    @staticmethod
+    def loaded_user_is_staff(request):
+        """
+        Whether the user, if the request already loaded it, is staff. Never
+        loads the session and user just to decide on the header; staff pages
+        load them anyway.
+        """
+        # Where AuthenticationMiddleware's get_user()/auser() cache the user
+        user = getattr(request, '_cached_user', None) or getattr(request, '_acached_user', None)
+        return getattr(user, 'is_staff', False)
+
+
+class ProfilingMiddleware(HybridMiddleware):
+    """
+    Staff-only, rate-limited request profiling (see profiling.py).
+    `?_profile=1` or an `X-Profile: 1` header replaces the response with a
+    downloadable cProfile/tracemalloc/SQL report. Must come after
+    AuthenticationMiddleware.
+    """
+    def handle(self, request):
+        if not (settings.PROFILING_ENABLED and profiling.is_requested(request) and request.user.is_staff):
+            return self.get_response(request)
+        if not profiling.acquire_slot():
+            response = self.get_response(request)
+            response['X-Profile'] = 'rate-limited'
+            return response
+        return profiling.profile_request(self.get_response, request)
+
+    async def ahandle(self, request):
+        if not (settings.PROFILING_ENABLED and profiling.is_requested(request) and (await request.auser()).is_staff):
+            return await self.get_response(request)
+        if not await sync_to_async(profiling.acquire_slot)():
+            response = await self.get_response(request)
+            response['X-Profile'] = 'rate-limited'
+            return response
+        # cProfile and the query log only see their own thread. Run the profiled
+        # request from a sync thread: sync views and ORM calls below it run there too.
+        return await sync_to_async(profiling.profile_request)(async_to_sync(self.get_response), request)
@@ -0,0 +1,135 @@
+"""
+On-demand profiling of a single request
+
+A staff user adds `?_profile=1` to a URL (or sends an `X-Profile: 1` header)
+and ProfilingMiddleware (see middleware.py) runs the rest of the request
+under cProfile and tracemalloc while recording every SQL query. Instead of
+the page, the response is a plain text report downloaded as an attachment:
+the functions that took the most time, the lines that allocated the most
+memory and the queries with their timings.
+
+Only one request is profiled per PROFILE_INTERVAL_SECONDS across all
+workers (a cache.add() lock), so the hook is safe to leave enabled.
+"""
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.utils import timezone
+from . import metrics
+
+RATE_LIMIT_CACHE_KEY = 'profiling:last'
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+
+
+def is_requested(request):
+    # Only safe methods: the view runs once, and its response is replaced by the report
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    return request.GET.get('_profile') == '1' or request.headers.get('X-Profile') == '1'
+
+
+def acquire_slot():
+    """True if no other request was profiled in the last PROFILE_INTERVAL_SECONDS"""
+    return cache.add(RATE_LIMIT_CACHE_KEY, time.time(), settings.PROFILE_INTERVAL_SECONDS)
+
+
+class QueryLog:
+    """connection.execute_wrapper() hook keeping every query with its duration"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            alias = context['connection'].alias
+            self.queries.append((alias, time.perf_counter() - started, sql, params, many))
+
+
+def profile_request(get_response, request):
+    """Run get_response(request) under the profilers and return the report as a download"""
+    query_log = QueryLog()
+    profiler = cProfile.Profile()
+    # Another tool (or -X tracemalloc) may already be tracing; leave it running
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(10)
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+
+    started = time.perf_counter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(query_log))
+        profiler.enable()
+        try:
+            response = get_response(request)
+            # Include rendering of lazy (TemplateResponse) responses
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        finally:
+            profiler.disable()
+    elapsed = time.perf_counter() - started
+
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    if started_tracing:
+        tracemalloc.stop()
+
+    report = build_report(request, response, elapsed, profiler, before, after, peak, query_log.queries)
+    view = request.resolver_match.view_name if request.resolver_match else 'unresolved'
+    filename = f"profile_{view.replace(':', '_')}_{timezone.now():%Y%m%d_%H%M%S}.txt"
+    download = HttpResponse(report, content_type='text/plain; charset=utf-8')
+    download['Content-Disposition'] = f'attachment; filename="{filename}"'
+    download['Cache-Control'] = 'private, no-store'
+    return download
+
+
+def build_report(request, response, elapsed, profiler, before, after, peak, queries):
+    out = io.StringIO()
+    match = request.resolver_match
+    out.write(f"{request.method} {request.get_full_path()}\n")
+    out.write(f"View:     {match.view_name if match else '-'} ({match._func_path if match else '-'})\n")
+    out.write(f"User:     {request.user.get_username()}\n")
+    out.write(f"Date:     {timezone.now():%Y-%m-%d %H:%M:%S %Z}\n")
+    out.write(f"Status:   {response.status_code}, {len(getattr(response, 'content', b'')):,} bytes\n")
+    out.write(f"Time:     {elapsed * 1000:.1f} ms (under the profiler, so slower than usual)\n")
+    query_time = sum(duration for _, duration, *_ in queries)
+    out.write(f"Queries:  {len(queries)} in {query_time * 1000:.1f} ms\n")
+    request_metrics = metrics.current()
+    if request_metrics is not None:
+        out.write(f"Templates: {request_metrics.template_time * 1000:.1f} ms\n")
+        out.write(f"Cache:    {request_metrics.cache_hits} hits, {request_metrics.cache_misses} misses\n")
+    out.write(f"Memory:   {peak / 1024:.0f} KiB peak traced\n")
+
+    for sort in ('cumulative', 'tottime'):
+        out.write(f"\n\n==== Top {TOP_FUNCTIONS} functions by {sort} time ====\n")
+        stats = pstats.Stats(profiler, stream=out)
+        stats.strip_dirs().sort_stats(sort).print_stats(TOP_FUNCTIONS)
+
+    out.write(f"\n==== Top {TOP_ALLOCATIONS} allocation sites (memory still held at the end) ====\n")
+    differences = after.compare_to(before, 'lineno')
+    for stat in differences[:TOP_ALLOCATIONS]:
+        frame = stat.traceback[0]
+        out.write(f"{stat.size_diff / 1024:>10.1f} KiB {stat.count_diff:>8} blocks  {frame.filename}:{frame.lineno}\n")
+
+    out.write(f"\n==== SQL ({len(queries)} queries, {query_time * 1000:.1f} ms) ====\n")
+    repeated = Counter(sql for _, _, sql, _, _ in queries)
+    for number, (alias, duration, sql, params, many) in enumerate(queries, 1):
+        note = f"  [run {repeated[sql]}x]" if repeated[sql] > 1 else ""
+        note += "  [executemany]" if many else ""
+        out.write(f"\n#{number} {alias} {duration * 1000:.2f} ms{note}\n{sql}\n")
+        if params and not many:
+            out.write(f"params: {params!r}\n")
+    return out.getvalue()
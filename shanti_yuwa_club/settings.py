@@ -12,14 +12,16 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Load environment variables from .env file (only imported when there is one,
+# production gets its environment from the platform)
+if (BASE_DIR / '.env').exists():
+    from dotenv import load_dotenv
+    load_dotenv(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -45,24 +47,28 @@ CSRF_TRUSTED_ORIGINS = [
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # SimpleAdminConfig skips admin autodiscovery in django.setup(); admin modules
+    # are loaded with the URLconf (see urls.py), so management commands, the
+    # scheduler and migrations don't import them
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'main.apps.MainConfig',
-    'crispy_forms',
-    'crispy_bootstrap4',
     'ckeditor',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'shanti_yuwa_club.middleware.ReplicaPinningMiddleware',
+    'shanti_yuwa_club.middleware.PerformanceMiddleware',
     'shanti_yuwa_club.middleware.AdminSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'shanti_yuwa_club.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -71,7 +77,9 @@ ROOT_URLCONF = 'shanti_yuwa_club.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, timing renders for the request metrics
+        'BACKEND': 'shanti_yuwa_club.metrics.TimedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -87,6 +95,11 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'shanti_yuwa_club.wsgi.application'
+ASGI_APPLICATION = 'shanti_yuwa_club.asgi.application'
+
+# Serve home, about, programs, program detail and gallery with the async views in
+# main/async_views.py. Enable when running under an ASGI server (see DEPLOYMENT.md).
+ASYNC_PUBLIC_VIEWS = os.environ.get('ASYNC_PUBLIC_VIEWS', 'False') == 'True'
 
 
 # Database
@@ -99,6 +112,69 @@ DATABASES = {
     }
 }
 
+# Opt-in SQLite performance profile for development and small deployments.
+# WAL lets readers run alongside a writer, BEGIN IMMEDIATE takes the write lock up
+# front (so a read-then-write transaction can't fail with "database is locked"
+# on lock upgrade), and the timeout is the busy_timeout while waiting for it.
+# Benchmark it with `python manage.py benchmark_sqlite`.
+SQLITE_TUNED_OPTIONS = {
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA mmap_size=134217728;'  # 128 MB
+        'PRAGMA cache_size=-20000;'    # 20 MB
+        'PRAGMA temp_store=MEMORY;'
+    ),
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': 20,
+}
+if os.environ.get('SQLITE_TUNED', 'False') == 'True':
+    DATABASES['default']['OPTIONS'] = SQLITE_TUNED_OPTIONS
+
+# Read replicas (see shanti_yuwa_club/db_routers.py)
+# To try the router locally, copy db.sqlite3 to a second file and point
+# SQLITE_REPLICA_PATH at it; read-only queries then go to that file.
+DATABASE_REPLICAS = []
+if os.environ.get('SQLITE_REPLICA_PATH'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / os.environ.get('SQLITE_REPLICA_PATH'),
+        'OPTIONS': DATABASES['default'].get('OPTIONS', {}),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS = ['replica']
+
+# Target database for `manage.py migrate_database`, e.g. to move db.sqlite3 to
+# Postgres: DATABASE_TARGET_URL=postgres://... python manage.py migrate_database
+if os.environ.get('DATABASE_TARGET_URL'):
+    import dj_database_url
+    DATABASES['target'] = dj_database_url.parse(os.environ['DATABASE_TARGET_URL'])
+
+DATABASE_ROUTERS = ['shanti_yuwa_club.db_routers.PrimaryReplicaRouter']
+REPLICA_PIN_SECONDS = 10  # keep a client on the primary this long after it writes
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory is per-process; set REDIS_URL (requires the `redis` package) to share
+# the cache, and therefore the request throttles, between workers. The backends are
+# Django's, counting hits and misses for the request metrics.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'shanti_yuwa_club.metrics.MeasuredRedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'shanti_yuwa_club.metrics.MeasuredLocMemCache',
+            'LOCATION': 'shanti-yuwa-club',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -149,9 +225,6 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-# Crispy Forms
-CRISPY_TEMPLATE_PACK = 'bootstrap4'
-CRISPY_ALLOWED_TEMPLATE_PACKS = 'bootstrap4'
 # Email Configuration
 # For development, use console backend (prints emails to console)
 # For production, configure with your email provider
@@ -167,4 +240,77 @@ EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 
 
 DEFAULT_FROM_EMAIL = 'shantiyuwac@gmail.com'
-SERVER_EMAIL = 'shantiyuwac@gmail.com'
\ No newline at end of file
+SERVER_EMAIL = 'shantiyuwac@gmail.com'
+
+# Sessions
+# With a shared cache (REDIS_URL) sessions are read from the cache and only written through to the database.
+# 'django.contrib.sessions.backends.signed_cookies' avoids server-side storage entirely.
+SESSION_ENGINE = os.environ.get(
+    'SESSION_ENGINE',
+    'django.contrib.sessions.backends.cached_db' if os.environ.get('REDIS_URL') else 'django.contrib.sessions.backends.db',
+)
+
+# Request throttling (see main/throttling.py)
+# Rates are "<requests>/<period>", where period is s, m, h or d with an optional multiplier (e.g. 10m)
+THROTTLE_TRUST_X_FORWARDED_FOR = False
+THROTTLE_PROXY_COUNT = int(os.environ.get('THROTTLE_PROXY_COUNT', '1'))  # proxies appending to X-Forwarded-For
+THROTTLE_RATES = {
+    'otp_ip': '10/h',
+    'otp_email': '1/m',
+    'login_ip': '20/10m',
+    'login_username': '5/10m',
+    'contact_ip': '5/10m',
+}
+
+# OTP verification (see main/otp_store.py)
+# The cache store avoids database writes per OTP, but it needs a cache shared by all
+# workers, so it is only the default when REDIS_URL is configured.
+OTP_STORE = os.environ.get(
+    'OTP_STORE',
+    'main.otp_store.CacheOTPStore' if os.environ.get('REDIS_URL') else 'main.otp_store.DatabaseOTPStore',
+)
+OTP_AUDIT_TRAIL = os.environ.get('OTP_AUDIT_TRAIL', 'False') == 'True'
+OTP_EXPIRY_MINUTES = 10
+
+# Periodic maintenance scheduler (see main/scheduler.py)
+# Either run `python manage.py run_scheduler` as a separate process, or set
+# SCHEDULER_EMBEDDED=True to run it in a background thread of the web server.
+SCHEDULER_EMBEDDED = os.environ.get('SCHEDULER_EMBEDDED', 'False') == 'True'
+SCHEDULER_TICK_SECONDS = 60
+SCHEDULER_LOCK_FILE = os.environ.get('SCHEDULER_LOCK_FILE')
+
+# Contact form write-behind (see main/contact_buffer.py)
+# With CONTACT_WRITE_BEHIND=True submissions are appended to a local spool file and
+# inserted in batches by the scheduler's flush_contact_messages job, so the scheduler
+# must run on every web host. Identical messages are dropped for CONTACT_DEDUPE_SECONDS.
+CONTACT_WRITE_BEHIND = os.environ.get('CONTACT_WRITE_BEHIND', 'False') == 'True'
+CONTACT_SPOOL_FILE = os.environ.get('CONTACT_SPOOL_FILE')
+CONTACT_DEDUPE_SECONDS = 3600
+CONTACT_FLUSH_BATCH_SIZE = 500
+
+# Data retention (see main/retention_utils.py), applied daily by the scheduler or
+# `python manage.py apply_retention`. Archived rows stay browsable in the admin. 0 = keep forever.
+CONTACT_MESSAGE_RETENTION_DAYS = int(os.environ.get('CONTACT_MESSAGE_RETENTION_DAYS', '180'))  # read messages
+EVENT_ATTENDANCE_RETENTION_DAYS = int(os.environ.get('EVENT_ATTENDANCE_RETENTION_DAYS', '365'))  # after the event
+OTP_RETENTION_HOURS = 1  # after expiry
+RETENTION_BATCH_SIZE = 1000
+
+# Member broadcasts (admin action and `send_broadcast` command)
+BROADCAST_BATCH_SIZE = int(os.environ.get('BROADCAST_BATCH_SIZE', '100'))
+BROADCAST_RATE_LIMIT = float(os.environ.get('BROADCAST_RATE_LIMIT', '5'))  # emails per second, 0 = unlimited
+# Daily birthday and membership anniversary emails (see main/greeting_utils.py), sent by the scheduler
+MEMBER_GREETINGS_ENABLED = os.environ.get('MEMBER_GREETINGS_ENABLED', 'True') == 'True'
+
+# Request metrics (see shanti_yuwa_club/metrics.py)
+# Staff users, or a scraper sending "Authorization: Bearer <METRICS_TOKEN>", can read
+# Prometheus metrics at /metrics. Each worker publishes its numbers to the cache
+# every METRICS_FLUSH_SECONDS, so use REDIS_URL to see all workers in one scrape.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True') == 'True'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_FLUSH_SECONDS = 15
+SLOW_REQUEST_SECONDS = float(os.environ.get('SLOW_REQUEST_SECONDS', '1.0'))  # logged as warnings
+
+# Staff can download a cProfile/tracemalloc/SQL report of any page by adding
+# ?_profile=1 (see shanti_yuwa_club/profiling.py). One profile per interval, site-wide.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'True') == 'True'
+PROFILE_INTERVAL_SECONDS = int(os.environ.get('PROFILE_INTERVAL_SECONDS', '30'))
@@ -35,6 +35,34 @@ DATABASES = {
     )
 }
 
+# Connection pool mode (psycopg 3 pool via Django's OPTIONS['pool'])
+# Instead of one persistent connection per worker thread, each process keeps a
+# small shared pool. Size it so that workers x DATABASE_POOL_MAX_SIZE stays under
+# the Postgres connection limit.
+DATABASE_POOL = os.environ.get('DATABASE_POOL', 'False') == 'True'
+if DATABASE_POOL:
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # pooling replaces persistent connections
+    # CONN_HEALTH_CHECKS (set by dj_database_url above) makes the pool check each connection before handing it out
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': int(os.environ.get('DATABASE_POOL_MIN_SIZE', '2')),
+        'max_size': int(os.environ.get('DATABASE_POOL_MAX_SIZE', '10')),
+        'timeout': float(os.environ.get('DATABASE_POOL_TIMEOUT', '10')),  # seconds to wait for a free connection
+        'max_idle': float(os.environ.get('DATABASE_POOL_MAX_IDLE', '300')),
+        'max_lifetime': float(os.environ.get('DATABASE_POOL_MAX_LIFETIME', '3600')),
+    }
+
+# Read replicas - comma-separated DATABASE_REPLICA_URLS, read-only ORM traffic is spread across them
+DATABASE_REPLICAS = []
+for index, replica_url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), start=1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = dj_database_url.parse(replica_url.strip(), conn_max_age=600, conn_health_checks=True)
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+# Target database for `manage.py migrate_database` (copying this database elsewhere)
+if os.environ.get('DATABASE_TARGET_URL'):
+    DATABASES['target'] = dj_database_url.parse(os.environ['DATABASE_TARGET_URL'])
+
 # CSRF Settings
 CSRF_TRUSTED_ORIGINS = [
     'https://*.onrender.com',
@@ -58,6 +86,10 @@ SECURE_CONTENT_TYPE_NOSNIFF = True
 SECURE_BROWSER_XSS_FILTER = True
 X_FRAME_OPTIONS = 'DENY'
 
+# Render terminates TLS at a proxy, which appends the client IP to X-Forwarded-For.
+# Set THROTTLE_PROXY_COUNT if more proxies (e.g. a CDN) sit in front of it.
+THROTTLE_TRUST_X_FORWARDED_FOR = True
+
 # Static files - Using WhiteNoise
 MIDDLEWARE.insert(1, 'whitenoise.middleware.WhiteNoiseMiddleware')
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
@@ -111,4 +143,5 @@ LOGGING = {
 }
 
 # Performance optimizations
-CONN_MAX_AGE = 600  # Database connection pooling
+# Persistent connections are configured per database above (conn_max_age=600),
+# or replaced by a connection pool with DATABASE_POOL=True.
@@ -18,9 +18,17 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from .metrics import metrics_view
+
+# Admin modules are discovered here rather than in django.setup()
+# (SimpleAdminConfig), so only processes that serve URLs import them
+admin.autodiscover()
 
 urlpatterns = [
+    # Same view for staff signed in to the admin, which uses its own session cookie
+    path('admin/metrics/', admin.site.admin_view(metrics_view), name='admin_metrics'),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('', include('main.urls')),
 ]
 
@@ -0,0 +1,91 @@
+"""
+Warm-up run before a server starts accepting traffic
+
+Compiles every template into the cached loader, populates the URL resolver
+and primes the dashboard cache, so the first requests after a deploy don't
+pay for it. Under gunicorn with preload_app this runs once in the master
+process and the workers inherit the result.
+"""
+import logging
+import os
+import time
+from django.apps import apps
+from django.db import connections
+from django.template import TemplateSyntaxError, engines
+from django.urls import NoReverseMatch, get_resolver, reverse
+
+logger = logging.getLogger(__name__)
+
+
+def compile_templates():
+    """Load every .html template so the cached loader holds the compiled version"""
+    count = 0
+    for engine in engines.all():
+        template_dirs = list(engine.template_dirs)
+        for app_config in apps.get_app_configs():
+            app_templates = os.path.join(app_config.path, 'templates')
+            if os.path.isdir(app_templates):
+                template_dirs.append(app_templates)
+
+        for template_dir in template_dirs:
+            for root, _, files in os.walk(template_dir):
+                for filename in files:
+                    if not filename.endswith(('.html', '.txt')):
+                        continue
+                    name = os.path.relpath(os.path.join(root, filename), template_dir).replace(os.sep, '/')
+                    try:
+                        engine.get_template(name)
+                        count += 1
+                    except (TemplateSyntaxError, UnicodeDecodeError, LookupError) as e:
+                        logger.debug("Skipping template %s: %s", name, e)
+    return count
+
+
+def resolve_urls():
+    """Populate the URL resolver (imports every view module) and reverse each argument-free route"""
+    resolver = get_resolver()
+    names = [name for name in resolver.reverse_dict.keys() if isinstance(name, str)]
+    count = 0
+    for name in names:
+        try:
+            reverse(name)
+            count += 1
+        except NoReverseMatch:
+            pass  # needs arguments
+    return count
+
+
+def prime_caches():
+    """Fill caches that are expensive to compute on the first request"""
+    from main.admin_dashboard import DashboardStats
+    DashboardStats.refresh_cache()
+
+
+def warm_up():
+    """Run every warm-up step, returning {step: seconds}. Failures are logged, never raised."""
+    timings = {}
+    for step in (compile_templates, resolve_urls, prime_caches):
+        start = time.perf_counter()
+        try:
+            result = step()
+        except Exception:
+            logger.exception("Warm-up step %s failed", step.__name__)
+            result = None
+        timings[step.__name__] = time.perf_counter() - start
+        logger.info("Warm-up %s: %s in %.2fs", step.__name__, result, timings[step.__name__])
+
+    close_database_connections()
+    return timings
+
+
+def close_database_connections():
+    """
+    Don't hand database connections opened here to forked workers. With
+    DATABASE_POOL, close() only returns a connection to the psycopg pool,
+    whose sockets and threads would be shared by every worker, so the pools
+    are closed too; each worker opens its own on first use.
+    """
+    connections.close_all()
+    for connection in connections.all(initialized_only=True):
+        if hasattr(connection, 'close_pool'):
+            connection.close_pool()
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shanti_yuwa_club.settings')
 
 application = get_wsgi_application()
+
+# Optionally run the maintenance scheduler in this server process (see main/scheduler.py).
+# gunicorn.conf.py starts it in each worker instead, since this module is preloaded in the master.
+from django.conf import settings
+
+if settings.SCHEDULER_EMBEDDED and not os.environ.get('SCHEDULER_STARTED_BY_SERVER'):
+    from main.scheduler import start_embedded_scheduler
+    start_embedded_scheduler()